@@ -0,0 +1,67 @@
+"""Initial schema: jobs, images, lessons, users
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created by Base.metadata.create_all() already have these tables
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "jobs" not in existing:
+        op.create_table(
+            "jobs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("error_message", sa.Text(), nullable=True),
+            sa.Column("lesson_id", sa.String(), nullable=True),
+        )
+    if "images" not in existing:
+        op.create_table(
+            "images",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("jobs.id"), nullable=True),
+            sa.Column("filename", sa.String(), nullable=True),
+            sa.Column("file_path", sa.String(), nullable=True),
+            sa.Column("tag", sa.String(), nullable=True),
+            sa.Column("ocr_result", sa.Text(), nullable=True),
+            sa.Column("processed_at", sa.DateTime(), nullable=True),
+        )
+    if "lessons" not in existing:
+        op.create_table(
+            "lessons",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("jobs.id"), nullable=True),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("steps", sa.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=True, unique=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("users")
+    op.drop_table("lessons")
+    op.drop_table("images")
+    op.drop_table("jobs")
@@ -0,0 +1,35 @@
+"""Result cache table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 09:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "cache_entries" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "cache_entries",
+            sa.Column("key", sa.String(), primary_key=True),
+            sa.Column("namespace", sa.String(), nullable=True),
+            sa.Column("value", sa.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("last_accessed", sa.DateTime(), nullable=True),
+            sa.Column("hits", sa.Integer(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_entries")
@@ -0,0 +1,38 @@
+"""Expiry time of result cache entries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 09:06:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CACHE_COLUMNS = [
+    sa.Column("expires_at", sa.DateTime(), nullable=True),
+]
+
+
+def upgrade() -> None:
+    existing_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("cache_entries")}
+
+    missing = [column for column in CACHE_COLUMNS if column.name not in existing_columns]
+    if missing:
+        with op.batch_alter_table("cache_entries") as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("cache_entries") as batch_op:
+        for column in reversed(CACHE_COLUMNS):
+            batch_op.drop_column(column.name)
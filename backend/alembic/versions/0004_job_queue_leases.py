@@ -0,0 +1,42 @@
+"""Job queue payload and lease columns
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15 09:07:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOB_COLUMNS = [
+    sa.Column("file_paths", sa.JSON(), nullable=True),
+    sa.Column("attempts", sa.Integer(), nullable=True),
+    sa.Column("lease_owner", sa.String(), nullable=True),
+    sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+    sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+]
+
+
+def upgrade() -> None:
+    existing_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("jobs")}
+
+    missing = [column for column in JOB_COLUMNS if column.name not in existing_columns]
+    if missing:
+        with op.batch_alter_table("jobs") as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("jobs") as batch_op:
+        for column in reversed(JOB_COLUMNS):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,47 @@
+"""Per-stage job progress columns
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15 09:08:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOB_COLUMNS = [
+    sa.Column("total_images", sa.Integer(), nullable=True),
+    sa.Column("images_ocr_done", sa.Integer(), nullable=True),
+    sa.Column("images_validated", sa.Integer(), nullable=True),
+    sa.Column("images_explained", sa.Integer(), nullable=True),
+    sa.Column("current_stage", sa.String(), nullable=True),
+    sa.Column("started_at", sa.DateTime(), nullable=True),
+    sa.Column("progress_updated_at", sa.DateTime(), nullable=True),
+    sa.Column("ocr_done_at", sa.DateTime(), nullable=True),
+    sa.Column("llm_done_at", sa.DateTime(), nullable=True),
+    sa.Column("completed_at", sa.DateTime(), nullable=True),
+]
+
+
+def upgrade() -> None:
+    existing_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("jobs")}
+
+    missing = [column for column in JOB_COLUMNS if column.name not in existing_columns]
+    if missing:
+        with op.batch_alter_table("jobs") as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("jobs") as batch_op:
+        for column in reversed(JOB_COLUMNS):
+            batch_op.drop_column(column.name)
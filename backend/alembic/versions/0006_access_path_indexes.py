@@ -0,0 +1,45 @@
+"""Indexes for the worker claim, per-job lookups and cache eviction
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-15 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns) - keep in sync with the Index declarations in db/models.py
+INDEXES = [
+    # Images and the lesson of a job: written by the worker, read per job
+    ("ix_images_job_id", "images", ["job_id"]),
+    ("ix_lessons_job_id", "lessons", ["job_id"]),
+    # Worker claim: WHERE status = 'queued' ORDER BY created_at
+    ("ix_jobs_status_created_at", "jobs", ["status", "created_at"]),
+    # Claim of expired leases and the reaper: WHERE status IN (...) AND lease_expires_at < now
+    ("ix_jobs_status_lease_expires_at", "jobs", ["status", "lease_expires_at"]),
+    # Result cache: LRU eviction ORDER BY last_accessed and counts per namespace
+    ("ix_cache_entries_namespace_last_accessed", "cache_entries", ["namespace", "last_accessed"]),
+    # Result cache: TTL sweep WHERE namespace = ? AND expires_at <= now
+    ("ix_cache_entries_namespace_expires_at", "cache_entries", ["namespace", "expires_at"]),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,30 @@
+"""Content hash of uploaded images
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-15 10:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "content_hash" not in {column["name"] for column in inspector.get_columns("images")}:
+        with op.batch_alter_table("images") as batch_op:
+            batch_op.add_column(sa.Column("content_hash", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch_op:
+        batch_op.drop_column("content_hash")
@@ -0,0 +1,30 @@
+"""Per-claim job lease token
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-15 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "lease_token" not in {column["name"] for column in inspector.get_columns("jobs")}:
+        with op.batch_alter_table("jobs") as batch_op:
+            batch_op.add_column(sa.Column("lease_token", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_column("lease_token")
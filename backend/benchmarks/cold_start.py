@@ -0,0 +1,108 @@
+"""Cold-start cost of the OCR model: construction, warm-up, first-request latency and app readiness.
+
+Each scenario runs in a fresh interpreter so nothing is already imported
+or loaded:
+
+    cold    construct LaTeXOCR, then OCR one image (the first request pays the model load)
+    warm    construct LaTeXOCR, warm_up(), then OCR one image
+    app     import main, run its startup, then poll /ready until 200
+
+Without --image, a generated worksheet image is used.
+Run from the backend directory:
+
+    python -m benchmarks.cold_start
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+async def ocr_scenario(image: str, warm: bool) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    from services.latex_ocr import LaTeXOCR
+    ocr = LaTeXOCR()
+    timings["construct_s"] = time.perf_counter() - start
+
+    if warm:
+        start = time.perf_counter()
+        await ocr.warm_up()
+        timings["warm_up_s"] = time.perf_counter() - start
+
+    for name in ("first_request_s", "second_request_s"):
+        start = time.perf_counter()
+        await ocr.extract_latex(image)
+        timings[name] = time.perf_counter() - start
+
+    await ocr.shutdown()
+    timings["ocr_method"] = ocr.ocr_method
+    return timings
+
+async def app_scenario() -> dict:
+    import httpx
+
+    timings = {}
+    start = time.perf_counter()
+    import main
+    timings["import_main_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async with main.lifespan(main.app):
+        timings["startup_s"] = time.perf_counter() - start
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+        timings["ready_s"] = time.perf_counter() - start
+    return timings
+
+def child(scenario: str, image: str):
+    if scenario == "app":
+        result = asyncio.run(app_scenario())
+    else:
+        result = asyncio.run(ocr_scenario(image, warm=scenario == "warm"))
+    print(json.dumps(result))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", help="image to OCR (default: a generated one)")
+    parser.add_argument("--scenarios", default="cold,warm,app")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.image)
+        return
+
+    # Not at module level: children must not have cv2 imported before they are timed
+    from benchmarks.sample_image import check_image, write_sample_image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.image is None:
+            args.image = os.path.join(tmp, "worksheet.png")
+            write_sample_image(args.image)
+        check_image(args.image)
+
+        # The app scenario creates tables; keep them out of the real database
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}", EMBEDDED_WORKER="false")
+        env.pop("ASYNC_DATABASE_URL", None)
+        for scenario in args.scenarios.split(","):
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.cold_start", "--child", scenario, "--image", args.image],
+                env=env, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                print(f"{scenario:>5}  failed:\n{completed.stderr}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(f"{scenario:>5}  " + "  ".join(
+                f"{key[:-2]} {1000 * value:8.1f} ms" if key.endswith("_s") else f"{key} {value}"
+                for key, value in result.items()
+            ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""ms/image and peak RSS of deskew at several resolutions: previous minAreaRect vs services.deskew.
+
+"legacy" is the previous implementation: the coordinates of every pixel
+> 0 (nearly all of a grayscale photo) collected with np.where and fed to
+cv2.minAreaRect. "projection" is Deskewer's projection profile on a
+downsampled, binarized copy. Each measurement runs in a fresh process so
+peak RSS is not inherited; the reported figure is peak RSS above the
+loaded image, next to the peak of NumPy allocations (tracemalloc), which
+small temporaries freed back to the heap do not hide. Estimated angles
+are printed against the applied skew.
+
+Run from the backend directory:
+
+    python -m benchmarks.deskew --megapixels 1,12,48 --skew 4
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import cv2
+import numpy as np
+
+def synthetic_page(width: int, height: int, skew: float) -> np.ndarray:
+    """Gray paper with lighting gradient, noise and lines of math, rotated by skew degrees"""
+
+    rng = np.random.default_rng(0)
+    page = np.full((height, width), 200, np.float32) + np.linspace(0, 40, width, dtype=np.float32)[None, :]
+    page = page.clip(0, 255).astype(np.uint8)
+    scale = height / 900
+    for row in range(8):
+        cv2.putText(page, "x^2 + 3x - 4 = (x+4)(x-1)", (int(60 * scale), int((100 + row * 100) * scale)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.4 * scale, 30, max(1, int(3 * scale)))
+    M = cv2.getRotationMatrix2D((width // 2, height // 2), skew, 1.0)
+    page = cv2.warpAffine(page, M, (width, height), borderMode=cv2.BORDER_REPLICATE)
+    noise = rng.normal(0, 8, page.shape).astype(np.int16)
+    return np.clip(page.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+def legacy_angle(gray: np.ndarray) -> float:
+    coords = np.column_stack(np.where(gray > 0))
+    angle = cv2.minAreaRect(coords)[-1]
+    return -(90 + angle) if angle < -45 else -angle
+
+def measure(path: str, method: str, repeats: int):
+    """Runs in a child process: (median ms, peak RSS MB above the loaded image, peak NumPy MB, angle)"""
+
+    from services.deskew import Deskewer
+
+    gray = np.load(path)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    estimate = legacy_angle if method == "legacy" else Deskewer().estimate_angle
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        angle = estimate(gray)
+        timings.append(time.perf_counter() - start)
+
+    # ru_maxrss is in KB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+
+    tracemalloc.start()
+    estimate(gray)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return 1000 * sorted(timings)[len(timings) // 2], peak / 1024, traced_peak / 2 ** 20, angle
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megapixels", default="1,12,48")
+    parser.add_argument("--skew", type=float, default=4.0, help="applied skew in degrees")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"applied skew {args.skew} degrees")
+    with tempfile.TemporaryDirectory() as tmp:
+        for megapixels in (float(mp) for mp in args.megapixels.split(",")):
+            width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+            height = int(width * 3 / 4)
+            path = os.path.join(tmp, f"page_{megapixels:g}mp.npy")
+            np.save(path, synthetic_page(width, height, args.skew))
+
+            for method in ("legacy", "projection"):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    ms, peak_mb, traced_mb, angle = pool.submit(measure, path, method, args.repeats).result()
+                print(f"{megapixels:5g} MP  {method:<10} {ms:9.1f} ms/image  peak RSS +{peak_mb:7.1f} MB  "
+                      f"numpy peak {traced_mb:7.1f} MB  angle {angle:6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Cold import time of `main` against a budget; exits 1 on a regression.
+
+Imports `main` in fresh interpreters with -X importtime and checks two
+things:
+
+    - the median wall time of `import main` stays under --budget seconds
+    - none of the heavy modules that are meant to load lazily (torch, the
+      OCR libraries, OpenCV, openai, sympy) is imported
+
+and prints the slowest modules imported directly by main's dependencies.
+
+Run from the backend directory (e.g. in CI after dependency changes):
+
+    python -m benchmarks.import_time --budget 1.0
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Loaded on first use (model load, first image, first LLM call, SymPy warm-up), never by importing main
+DEFERRED_MODULES = ["torch", "pix2tex", "easyocr", "paddleocr", "pytesseract", "cv2", "openai", "sympy"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print("ELAPSED", elapsed)
+print("LOADED", ",".join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+def import_once(env):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(deferred=DEFERRED_MODULES)],
+        env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr)
+
+    elapsed, loaded = None, []
+    for line in completed.stdout.splitlines():
+        if line.startswith("ELAPSED "):
+            elapsed = float(line.split()[1])
+        elif line.startswith("LOADED "):
+            loaded = [name for name in line[len("LOADED "):].split(",") if name]
+
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in completed.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            modules.append((int(parts[1]), parts[2].rstrip()))
+    return elapsed, loaded, modules
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET", "1.0")),
+                        help="max median seconds for a cold `import main`")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # main creates tables on import; keep them out of the real database
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        env.pop("ASYNC_DATABASE_URL", None)
+        runs = [import_once(env) for _ in range(args.runs)]
+
+    median = statistics.median(elapsed for elapsed, _, _ in runs)
+    loaded = sorted({name for _, names, _ in runs for name in names})
+
+    # Direct children of main's imports (two levels of indentation in -X importtime output)
+    _, _, modules = runs[-1]
+    top_level = [(cumulative, name.strip()) for cumulative, name in modules
+                 if name.startswith("   ") and not name.startswith("    ")]
+    print(f"slowest imports under main (last run):")
+    for cumulative, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    print(f"\nimport main: median {median:.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+    failed = False
+    if median > args.budget:
+        print(f"FAIL: import time over budget by {median - args.budget:.3f}s")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported modules that should load lazily: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Conversions/sec of the LaTeX -> SymPy translator before and after precompiling and memoizing.
+
+Run from the backend directory:
+
+    python -m benchmarks.latex_translator --rounds 200
+"""
+import argparse
+import contextlib
+import io
+import re
+import time
+from typing import Optional
+
+import sympy as sp
+
+from services.latex_translator import LatexTranslator
+
+# LaTeX as it comes out of the OCR backends, including noisy and garbled output
+CORPUS = [
+    r"x^2 + 5x + 6 = 0",
+    r"x^{2}+5x+6",
+    r"2x + 3 = 7",
+    r"\frac{3}{4} + \frac{1}{2} = \frac{5}{4}",
+    r"\int_{0}^{1} x^2 \, dx = \frac{1}{3}",
+    r"\sqrt{x^2 + y^2}",
+    r"\sin(x) + \cos(x)",
+    r"\alpha x^{2} + \beta x + \gamma",
+    r"\lambda_{1} + \lambda_{2}",
+    r"\log(x) - \ln(y)",
+    r"\sum_{i=1}^{n} i^2",
+    r"\overline{z} \cdot z",
+    r"\langle u,v\rangle",
+    r"e^{i\pi} + 1",
+    r"\frac{\sigma}{\sqrt{n}}",
+    r"\theta^{2} - \mu + \nu",
+    r"\tan(\theta) = \frac{\sin(\theta)}{\cos(\theta)}",
+    r"\begin{array}{cc} x+1 & y^2 \\ \frac{a}{b} & c \end{array}",
+    r"\begin{array}{c} x_{n}+1 \end{array}",
+    r"\begin{array}{cc} \lambda_{1}+\mu & a_{n} \end{array}",
+    r"{\cal{L}}(x) = x^3 - 2x",
+    r"\varepsilon^{2} + \delta",
+    r"\scriptstyle{\frac{\scriptstyle x}{y}}",
+    r"a_{n+1} = 2a_{n} + 1",
+]
+
+class LegacyTranslator:
+    """Verbatim copy of the pre-translator SymPyService parsing code"""
+
+    def _latex_to_sympy(self, latex_expr: str) -> Optional[sp.Expr]:
+        """Convert LaTeX expression to SymPy expression with enhanced error handling"""
+        
+        try:
+            # Clean up the LaTeX
+            expr = latex_expr.strip()
+            
+            # Handle complex array structures - extract meaningful content
+            if '\\begin{array}' in expr:
+                return self._handle_array_expression(expr)
+            
+            # Handle overline notation
+            expr = re.sub(r'\\overline\{([^}]+)\}', r'\1', expr)
+            
+            # Handle calligraphic fonts
+            expr = re.sub(r'\\cal\{([^}]+)\}', r'\1', expr)
+            
+            # Handle angle brackets (inner products)
+            expr = re.sub(r'\\langle([^\\]+)\\rangle', r'(\1)', expr)
+            
+            # Handle common LaTeX patterns
+            # Fractions: \frac{a}{b} -> a/b
+            expr = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'(\1)/(\2)', expr)
+            
+            # Powers: x^{n} -> x**n, x^n -> x**n
+            expr = re.sub(r'\^\{([^}]+)\}', r'**(\1)', expr)
+            expr = re.sub(r'\^([a-zA-Z0-9])', r'**\1', expr)
+            
+            # Square roots: \sqrt{x} -> sqrt(x)
+            expr = re.sub(r'\\sqrt\{([^}]+)\}', r'sqrt(\1)', expr)
+            
+            # Subscripts: x_{n} -> x_n (keep for variable names)
+            expr = re.sub(r'_\{([^}]+)\}', r'_\1', expr)
+            
+            # Greek letters - convert to English equivalents
+            greek_map = {
+                r'\\gamma': 'gamma', r'\\alpha': 'alpha', r'\\beta': 'beta',
+                r'\\delta': 'delta', r'\\epsilon': 'epsilon', r'\\varepsilon': 'epsilon',
+                r'\\lambda': 'lambda', r'\\mu': 'mu', r'\\nu': 'nu',
+                r'\\pi': 'pi', r'\\theta': 'theta', r'\\sigma': 'sigma'
+            }
+            for latex_greek, english in greek_map.items():
+                expr = re.sub(latex_greek, english, expr)
+            
+            # Integrals: \int -> (remove for now, handle separately)
+            expr = re.sub(r'\\int(_\{[^}]+\})?\^?\{?[^}]*\}?', '', expr)
+            expr = re.sub(r'\\,?\s*dx?', '', expr)
+            
+            # Trigonometric functions
+            expr = re.sub(r'\\sin', 'sin', expr)
+            expr = re.sub(r'\\cos', 'cos', expr)
+            expr = re.sub(r'\\tan', 'tan', expr)
+            
+            # Logarithms
+            expr = re.sub(r'\\log', 'log', expr)
+            expr = re.sub(r'\\ln', 'ln', expr)
+            
+            # Sum notation
+            expr = re.sub(r'\\sum(_\{[^}]+\})?\^?\{?[^}]*\}?', 'sum', expr)
+            
+            # Remove remaining LaTeX commands
+            expr = re.sub(r'\\[a-zA-Z]+', '', expr)
+            
+            # Clean up spaces and formatting
+            expr = expr.replace(' ', '')
+            expr = expr.replace('{', '(').replace('}', ')')
+            
+            # Handle special characters that might cause issues
+            expr = re.sub(r'[^\w\d\+\-\*\/\(\)\.\=\,\_]', '', expr)
+            
+            # If expression is too complex or empty, return a simple placeholder
+            if len(expr) < 2 or len(expr) > 200:
+                return sp.Symbol('complex_expression')
+            
+            # Parse with SymPy
+            return sp.sympify(expr)
+            
+        except Exception as e:
+            # Return a symbolic representation for complex expressions
+            print(f"LaTeX parsing failed: {e}")
+            return sp.Symbol('unparseable_expression')
+    
+    def _handle_array_expression(self, latex_expr: str) -> sp.Expr:
+        """Handle LaTeX array expressions by extracting meaningful mathematical content"""
+        
+        try:
+            # Extract content between array delimiters
+            array_content = re.search(r'\\begin\{array\}.*?\\end\{array\}', latex_expr, re.DOTALL)
+            if not array_content:
+                return sp.Symbol('array_expression')
+            
+            content = array_content.group(0)
+            
+            # Remove array structure commands
+            content = re.sub(r'\\begin\{array\}\{[^}]*\}', '', content)
+            content = re.sub(r'\\end\{array\}', '', content)
+            
+            # Split by row separators and extract meaningful expressions
+            rows = content.split('\\\\')
+            expressions = []
+            
+            for row in rows:
+                # Split by column separators
+                cells = re.split(r'&', row)
+                for cell in cells:
+                    cell = cell.strip()
+                    if cell and len(cell) > 2:
+                        # Clean up cell content
+                        cell = re.sub(r'\{+', '{', cell)
+                        cell = re.sub(r'\}+', '}', cell)
+                        
+                        # Extract mathematical expressions (ignore pure formatting)
+                        if any(char in cell for char in '+-*/^=()[]'):
+                            expressions.append(cell)
+            
+            # If we found expressions, try to parse the first meaningful one
+            for expr in expressions:
+                try:
+                    cleaned = self._clean_expression_for_parsing(expr)
+                    if cleaned and len(cleaned) > 1:
+                        return sp.sympify(cleaned)
+                except:
+                    continue
+            
+            # Fallback to symbolic representation
+            return sp.Symbol('complex_array_expression')
+            
+        except Exception as e:
+            print(f"Array parsing failed: {e}")
+            return sp.Symbol('array_expression')
+    
+    def _clean_expression_for_parsing(self, expr: str) -> str:
+        """Clean expression for SymPy parsing"""
+        
+        # Remove complex LaTeX formatting
+        expr = re.sub(r'\\overline\{([^}]+)\}', r'\1', expr)
+        expr = re.sub(r'\\cal\{([^}]+)\}', r'\1', expr)
+        expr = re.sub(r'\\langle([^\\]+)\\rangle', r'(\1)', expr)
+        
+        # Handle fractions
+        expr = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'(\1)/(\2)', expr)
+        
+        # Handle powers
+        expr = re.sub(r'\^\{([^}]+)\}', r'**(\1)', expr)
+        expr = re.sub(r'\^([a-zA-Z0-9])', r'**\1', expr)
+        
+        # Handle subscripts (convert to variable names)
+        expr = re.sub(r'([a-zA-Z]+)_\{([^}]+)\}', r'\1_\2', expr)
+        expr = re.sub(r'([a-zA-Z]+)_([a-zA-Z0-9])', r'\1_\2', expr)
+        
+        # Convert Greek letters
+        greek_map = {
+            r'\\gamma': 'gamma', r'\\alpha': 'alpha', r'\\beta': 'beta',
+            r'\\delta': 'delta', r'\\epsilon': 'epsilon', r'\\varepsilon': 'epsilon',
+            r'\\lambda': 'lambda', r'\\mu': 'mu', r'\\nu': 'nu',
+            r'\\pi': 'pi', r'\\theta': 'theta', r'\\sigma': 'sigma'
+        }
+        for latex_greek, english in greek_map.items():
+            expr = re.sub(latex_greek, english, expr)
+        
+        # Remove remaining LaTeX commands
+        expr = re.sub(r'\\[a-zA-Z]+', '', expr)
+        
+        # Clean up formatting
+        expr = expr.replace('{', '(').replace('}', ')')
+        expr = re.sub(r'[^\w\d\+\-\*\/\(\)\.\=\,\_]', '', expr)
+        expr = expr.replace(' ', '')
+        
+        return expr
+
+
+def rate(convert, corpus, rounds: int) -> float:
+    # Parse failures print a line each; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for latex in corpus:
+                convert(latex)
+        return rounds * len(corpus) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    legacy = LegacyTranslator()
+    translator = LatexTranslator()
+    uncached = LatexTranslator(cache_size=0)
+
+    # Same output as the legacy code for every corpus entry
+    with contextlib.redirect_stdout(io.StringIO()):
+        for latex in CORPUS:
+            assert str(legacy._latex_to_sympy(latex)) == str(translator.to_sympy(latex)), latex
+
+    print(f"corpus: {len(CORPUS)} expressions x {args.rounds} rounds")
+    print(f"legacy regex + sympify   {rate(legacy._latex_to_sympy, CORPUS, args.rounds):10.1f} conversions/sec")
+    print(f"compiled, no memo        {rate(uncached.to_sympy, CORPUS, args.rounds):10.1f} conversions/sec")
+    print(f"compiled + LRU memo      {rate(translator.to_sympy, CORPUS, args.rounds):10.1f} conversions/sec")
+    print(f"translate() string only  {rate(translator.translate, CORPUS, args.rounds):10.1f} conversions/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Explanations for one multi-image job: a request per image vs micro-batched requests.
+
+Explains --images distinct expressions the way the pipeline's LLM stage
+does (PIPELINE_LLM_WORKERS concurrent workers) against
+benchmarks.openrouter_stub and reports requests sent, prompt characters
+sent (the instructions are repeated once per request) and wall time:
+
+    single   LLMService.generate_explanation per image
+    batched  ExplanationBatcher -> LLMService.generate_explanations_batch
+
+Run from the backend directory:
+
+    python -m benchmarks.llm_batching --images 20 --latency-ms 300 --chunk-ms 5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.openrouter_stub import create_app
+from benchmarks.stub_server import StubServer
+
+async def explain_job(images: int, workers: int, batched: bool) -> dict:
+    from services.llm_batcher import ExplanationBatcher
+    from services.llm_service import LLMService
+
+    llm = LLMService()
+    llm.cache_enabled = False
+    batcher = ExplanationBatcher(llm)
+    await llm._get_client()  # import openai outside the measurement
+
+    expressions = [f"x^2 + {i}x + 6 = 0" for i in range(images)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, latex in enumerate(expressions):
+        queue.put_nowait((i, latex))
+    results = [None] * images
+
+    async def worker():
+        while not queue.empty():
+            i, latex = queue.get_nowait()
+            context = f"This is image {i+1} from a sequence of math problems"
+            if batched:
+                results[i] = await batcher.explain(latex, context)
+            else:
+                results[i] = await llm.generate_explanation(latex, context)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    wall = time.perf_counter() - start
+    await llm.shutdown()
+
+    assert all(result["source"] == "nemotron_openrouter" for result in results)
+    return {"wall_s": wall, "batch": llm.stats()["batch"], "batcher": batcher.stats()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PIPELINE_LLM_WORKERS", "8")))
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--chunk-ms", type=float, default=5)
+    parser.add_argument("--chunk-chars", type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ.update(OPENROUTER_API_KEY="stub", LLM_RATE_LIMIT_RPM="0")
+    for mode in ("single", "batched"):
+        with StubServer(create_app(args.latency_ms, args.chunk_ms, args.chunk_chars)) as stub:
+            os.environ["OPENROUTER_BASE_URL"] = stub.base_url
+            result = asyncio.run(explain_job(args.images, args.workers, batched=mode == "batched"))
+            server = httpx.get(f"{stub.base_url}/stats").json()
+
+        line = (f"{mode:>8}  requests {server['requests']:3d}  prompt chars {server['prompt_chars']:7d}  "
+                f"wall {1000 * result['wall_s']:8.1f} ms")
+        if mode == "batched":
+            line += (f"  avg batch {result['batcher']['avg_batch_size']}  fallbacks {result['batch']['fallbacks']}"
+                     f"  tokens/explanation {result['batch']['tokens_per_explanation']}")
+        print(line)
+
+if __name__ == "__main__":
+    main()
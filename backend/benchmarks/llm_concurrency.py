@@ -0,0 +1,82 @@
+"""LLM call concurrency against a local chat-completions stub: executor threads vs the async client.
+
+Fires --calls concurrent explanation requests at benchmarks.openrouter_stub,
+which answers after --latency-ms, and records how many requests it served at once:
+
+    executor  the previous code path: sync OpenAI client in run_in_executor(None, ...),
+              capped by the default thread pool (min(32, cpus + 4) threads)
+    async     LLMService: AsyncOpenAI on a shared pool, LLM_MAX_CONCURRENCY in flight
+    limited   LLMService with the token bucket at --rpm requests/minute
+
+Run from the backend directory:
+
+    python -m benchmarks.llm_concurrency --calls 128 --latency-ms 500
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.openrouter_stub import create_app
+from benchmarks.stub_server import StubServer
+
+async def executor(base_url: str, calls: int) -> dict:
+    from openai import OpenAI
+
+    client = OpenAI(base_url=base_url, api_key="stub")
+    loop = asyncio.get_running_loop()
+
+    async def call():
+        return await loop.run_in_executor(None, lambda: client.chat.completions.create(
+            model="stub", messages=[{"role": "user", "content": "x^2+5x+6=0"}]
+        ))
+
+    await asyncio.gather(*(call() for _ in range(calls)))
+    client.close()
+    return {}
+
+async def service(calls: int) -> dict:
+    from services.llm_service import LLMService
+
+    llm = LLMService()
+    llm.cache_enabled = False
+    try:
+        results = await asyncio.gather(*(llm.generate_explanation(f"x^2 + {i}x + 6 = 0") for i in range(calls)))
+    finally:
+        await llm.shutdown()
+    assert all(result["source"] == "nemotron_openrouter" for result in results)
+    return llm.stats()
+
+def main():
+    import httpx
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=128)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--concurrency", type=int, default=64, help="LLM_MAX_CONCURRENCY for the async client")
+    parser.add_argument("--rpm", type=float, default=600, help="rate limit for the limited scenario")
+    parser.add_argument("--scenarios", default="executor,async,limited")
+    args = parser.parse_args()
+
+    for scenario in args.scenarios.split(","):
+        with StubServer(create_app(args.latency_ms, chunk_ms=0)) as stub:
+            os.environ.update(OPENROUTER_API_KEY="stub", OPENROUTER_BASE_URL=stub.base_url,
+                              LLM_MAX_CONCURRENCY=str(args.concurrency),
+                              LLM_RATE_LIMIT_RPM=str(args.rpm if scenario == "limited" else 0))
+            start = time.perf_counter()
+            if scenario == "executor":
+                stats = asyncio.run(executor(stub.base_url, args.calls))
+            else:
+                stats = asyncio.run(service(args.calls))
+            wall = time.perf_counter() - start
+            server = httpx.get(f"{stub.base_url}/stats").json()
+
+        line = (f"{scenario:>8}  wall {wall:7.2f} s  {args.calls / wall:7.1f} calls/s  "
+                f"server peak concurrency {server['peak']:4d}")
+        if stats:
+            line += (f"  http2 {stats['http2']}  avg queue wait {stats['avg_queue_wait_ms']:8.1f} ms"
+                     f"  max {stats['max_queue_wait_ms']:8.1f} ms  avg request {stats['avg_request_ms']:7.1f} ms")
+        print(line)
+
+if __name__ == "__main__":
+    main()
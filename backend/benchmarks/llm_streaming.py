@@ -0,0 +1,85 @@
+"""Time to first explanation content: whole completion vs streamed steps, against benchmarks.openrouter_stub.
+
+For each mode one explanation is generated through LLMService while a
+status-stream subscriber (EventBus, as used by /status/{id}/stream) listens
+to the job's JobProgress:
+
+    whole     the completion is awaited and parsed in one piece (LLM_STREAMING=false)
+    streamed  steps are parsed incrementally and published as each one closes
+
+Run from the backend directory:
+
+    python -m benchmarks.llm_streaming --latency-ms 300 --chunk-ms 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.openrouter_stub import create_app
+from benchmarks.stub_server import StubServer
+
+async def explain(streaming: bool) -> dict:
+    from services.event_bus import EventBus
+    from services.job_progress import JobProgress
+    from services.llm_service import LLMService
+
+    os.environ["LLM_STREAMING"] = "true" if streaming else "false"
+    llm = LLMService()
+    llm.cache_enabled = False
+    bus = EventBus()
+    progress = JobProgress("bench", 1, event_bus=bus)
+    progress._store = lambda values: asyncio.sleep(0)  # no database writes in the benchmark
+    validation = {"valid": True}
+
+    await llm._get_client()  # import openai outside the measurement
+    arrivals = []
+    start = time.perf_counter()
+
+    async def listen(events):
+        seen = 0
+        while True:
+            event = await events.get()
+            partial = event.get("partial_steps") or [{}]
+            steps = len(partial[0].get("explanation", {}).get("steps", []))
+            if steps > seen:
+                arrivals.extend([time.perf_counter() - start] * (steps - seen))
+                seen = steps
+            if partial[0].get("complete"):
+                return
+
+    async with bus.subscribe("bench") as events:
+        listener = asyncio.create_task(listen(events))
+        latex = "x^2 + 5x + 6 = 0"
+        explanation = await llm.generate_explanation(
+            latex, on_step=lambda step: progress.explanation_step(0, latex, validation, step)
+        )
+        progress.explanation_done(0, latex, validation, explanation)
+        progress.advance("ocr")
+        progress.advance("sympy")
+        progress.advance("llm")
+        await asyncio.wait_for(listener, timeout=10)
+    total = time.perf_counter() - start
+    await llm.shutdown()
+
+    assert explanation["source"] == "nemotron_openrouter", explanation
+    return {"first_step_s": arrivals[0], "last_step_s": arrivals[-1], "total_s": total,
+            "steps": len(arrivals)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=300, help="time to the first token")
+    parser.add_argument("--chunk-ms", type=float, default=20, help="delay between streamed chunks")
+    parser.add_argument("--chunk-chars", type=int, default=16)
+    args = parser.parse_args()
+
+    with StubServer(create_app(args.latency_ms, args.chunk_ms, args.chunk_chars)) as stub:
+        os.environ.update(OPENROUTER_API_KEY="stub", OPENROUTER_BASE_URL=stub.base_url, LLM_RATE_LIMIT_RPM="0")
+        for mode in ("whole", "streamed"):
+            result = asyncio.run(explain(streaming=mode == "streamed"))
+            print(f"{mode:>8}  first step {1000 * result['first_step_s']:8.1f} ms  "
+                  f"last step {1000 * result['last_step_s']:8.1f} ms  "
+                  f"complete {1000 * result['total_s']:8.1f} ms  steps {result['steps']}")
+
+if __name__ == "__main__":
+    main()
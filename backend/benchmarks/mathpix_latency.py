@@ -0,0 +1,114 @@
+"""Mathpix fallback latency against the local stub: blocking per-call requests vs MathpixClient.
+
+Each scenario gets a fresh stub server (benchmarks.mathpix_stub) on a
+background thread and fires --calls concurrent recognitions while a ticker
+measures event-loop lag (how late a 10ms sleep wakes up):
+
+    blocking  the previous code path: a synchronous POST with a new connection per call
+    pooled    MathpixClient: async, keep-alive pool, bounded concurrency
+    flaky     MathpixClient against a stub failing --error-rate of requests (retries)
+    down      MathpixClient against a stub that always fails (circuit breaker)
+
+Run from the backend directory:
+
+    python -m benchmarks.mathpix_latency --calls 32 --latency-ms 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.mathpix_stub import create_app
+from benchmarks.stub_server import StubServer
+from services.mathpix_client import MathpixClient
+
+PAYLOAD = {"src": "data:image/png;base64,iVBORw0KGgo=", "formats": ["latex_styled", "text"]}
+
+async def measure(call, calls: int) -> dict:
+    lag = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag.append(time.perf_counter() - start - 0.01)
+
+    async def one():
+        start = time.perf_counter()
+        try:
+            await call()
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(calls)))
+    wall = time.perf_counter() - start
+    done.set()
+    await ticking
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "wall_s": wall,
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+        "max_loop_lag_ms": 1000 * max(lag, default=0.0),
+        "ok": sum(ok for _, ok in results)
+    }
+
+async def blocking(url: str, calls: int) -> dict:
+    async def call():
+        # What OCRService._mathpix_ocr did: a blocking POST inside a coroutine
+        response = httpx.post(url, json=PAYLOAD, headers={"app_id": "x", "app_key": "x"}, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    return await measure(call, calls)
+
+async def pooled(url: str, calls: int) -> tuple:
+    client = MathpixClient(app_id="x", app_key="x", api_url=url)
+    try:
+        result = await measure(lambda: client.recognize(PAYLOAD), calls)
+    finally:
+        await client.close()
+    return result, client.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--scenarios", default="blocking,pooled,flaky,down")
+    args = parser.parse_args()
+
+    for scenario in args.scenarios.split(","):
+        options = {"latency_ms": args.latency_ms}
+        if scenario == "flaky":
+            options["error_rate"] = args.error_rate
+        elif scenario == "down":
+            options["error_rate"] = 1.0
+
+        with StubServer(create_app(**options), "/v3/text") as stub:
+            client_stats = {}
+            if scenario == "blocking":
+                result = asyncio.run(blocking(stub.url, args.calls))
+            else:
+                result, client_stats = asyncio.run(pooled(stub.url, args.calls))
+            server = httpx.get(f"{stub.base_url}/stats").json()
+
+        line = (f"{scenario:>8}  wall {1000 * result['wall_s']:8.1f} ms  p50 {result['p50_ms']:8.1f} ms  "
+                f"p95 {result['p95_ms']:8.1f} ms  loop lag {result['max_loop_lag_ms']:8.1f} ms  "
+                f"ok {result['ok']}/{args.calls}  server requests {server['requests']}  "
+                f"connections {server['connections']}")
+        if client_stats:
+            line += (f"  retries {client_stats['retries']}  short-circuited {client_stats['short_circuited']}"
+                     f"  breaker {client_stats['breaker']}")
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Local stand-in for the Mathpix /v3/text endpoint, for benchmarks and manual testing.
+
+Answers every POST with a fixed LaTeX result after --latency-ms; a share of
+requests (--error-rate) gets --error-status instead, with Retry-After on 429.
+Point the backend at it with MATHPIX_API_URL:
+
+    python -m benchmarks.mathpix_stub --port 8765 --latency-ms 300 --error-rate 0.1
+    MATHPIX_API_URL=http://127.0.0.1:8765/v3/text MATHPIX_APP_ID=x MATHPIX_APP_KEY=x uvicorn main:app
+"""
+import argparse
+import asyncio
+import random
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+RESULT = {
+    "latex_styled": "x^2 + 5x + 6 = 0",
+    "latex_confidence": 0.97,
+    "text": "\\( x^2 + 5x + 6 = 0 \\)"
+}
+
+def create_app(latency_ms: float = 300, error_rate: float = 0.0, error_status: int = 503,
+               retry_after: float = 0.0) -> Starlette:
+    counters = {"requests": 0, "errors": 0, "connections": set()}
+
+    async def text(request: Request):
+        counters["requests"] += 1
+        if request.client:
+            counters["connections"].add((request.client.host, request.client.port))
+        await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        if random.random() < error_rate:
+            counters["errors"] += 1
+            headers = {"Retry-After": str(retry_after)} if error_status == 429 else None
+            return JSONResponse({"error": "stub failure"}, status_code=error_status, headers=headers)
+        return JSONResponse(RESULT)
+
+    async def stats(request: Request):
+        return JSONResponse({"requests": counters["requests"], "errors": counters["errors"],
+                             "connections": len(counters["connections"])})
+
+    return Starlette(routes=[Route("/v3/text", text, methods=["POST"]), Route("/stats", stats)])
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.error_rate, args.error_status, args.retry_after)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
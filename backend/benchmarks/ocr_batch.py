@@ -0,0 +1,61 @@
+"""Images/sec of LaTeXOCR at batch sizes 1, 4 and 16.
+
+Only EasyOCR batches model calls; with pix2tex or tesseract
+extract_latex_batch runs the images one at a time, so every batch size
+should measure about the same. Without --image, a generated worksheet
+image is used.
+
+Run from the backend directory:
+
+    python -m benchmarks.ocr_batch --images 32
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.sample_image import check_image, write_sample_image
+from services.latex_ocr import LaTeXOCR
+
+async def run(ocr: LaTeXOCR, paths, batch_size: int) -> float:
+    start = time.perf_counter()
+    if batch_size == 1:
+        for path in paths:
+            await ocr.extract_latex(path)
+    else:
+        for i in range(0, len(paths), batch_size):
+            await ocr.extract_latex_batch(paths[i:i + batch_size])
+    return len(paths) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", help="image to OCR (default: a generated one)")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--batch-sizes", default="1,4,16")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.image is None:
+            args.image = os.path.join(tmp, "worksheet.png")
+            write_sample_image(args.image)
+        check_image(args.image)
+        extension = os.path.splitext(args.image)[1]
+        paths = []
+        for i in range(args.images):
+            path = os.path.join(tmp, f"scrap_{i}{extension}")
+            shutil.copyfile(args.image, path)
+            paths.append(path)
+
+        ocr = LaTeXOCR()
+        # Warm up so model loading is not counted
+        asyncio.run(ocr.extract_latex(paths[0]))
+        print(f"OCR method: {ocr.ocr_method}, images: {len(paths)}")
+
+        for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+            rate = asyncio.run(run(ocr, paths, batch_size))
+            print(f"batch_size={batch_size:>3}  {rate:8.2f} images/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Local stand-in for OpenRouter's /chat/completions, for benchmarks and manual testing.
+
+Answers with an explanation JSON after --latency-ms. Streaming requests
+get the same JSON as SSE chunks of --chunk-chars characters, one every
+--chunk-ms, after the initial latency. Batched prompts (numbered
+"N. Expression:" lines) get an "explanations" array with one entry per
+expression, minus a --drop-rate share; answers longer than max_tokens
+(at ~4 characters per token) are cut off like a real truncated completion.
+Point the backend at it with OPENROUTER_BASE_URL:
+
+    python -m benchmarks.openrouter_stub --port 8766 --latency-ms 300 --chunk-ms 20
+    OPENROUTER_BASE_URL=http://127.0.0.1:8766 OPENROUTER_API_KEY=x uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+EXPLANATION = {
+    "problem_type": "Quadratic Equation",
+    "steps": [
+        {"step_number": 1, "description": "Write the equation in standard form", "latex": "x^2 + 5x + 6 = 0",
+         "explanation": "All terms are on one side, so we can factor or use the quadratic formula."},
+        {"step_number": 2, "description": "Factor the quadratic", "latex": "(x + 2)(x + 3) = 0",
+         "explanation": "We need two numbers whose product is 6 and whose sum is 5: 2 and 3."},
+        {"step_number": 3, "description": "Apply the zero product property", "latex": "x + 2 = 0 \\quad x + 3 = 0",
+         "explanation": "A product is zero only when one of its factors is zero."},
+        {"step_number": 4, "description": "Solve each linear equation", "latex": "x = -2 \\quad x = -3",
+         "explanation": "Subtract the constant from both sides of each equation."}
+    ],
+    "key_concepts": ["Factoring", "Zero product property"],
+    "common_mistakes": ["Sign errors when reading off the roots", "Dividing by x and losing a root"],
+    "final_answer": "x = -2, x = -3"
+}
+
+BATCH_ITEM_PATTERN = re.compile(r"^\s*(\d+)\. Expression:", re.MULTILINE)
+
+def answer(prompt: str, max_tokens: int, drop_rate: float) -> tuple:
+    """(content, finish_reason)"""
+    numbers = [int(number) for number in BATCH_ITEM_PATTERN.findall(prompt)]
+    if numbers:
+        document = {"explanations": [{"index": number, **EXPLANATION} for number in numbers
+                                     if random.random() >= drop_rate]}
+    else:
+        document = EXPLANATION
+    content = "```json\n" + json.dumps(document, indent=2) + "\n```"
+    return content[:max_tokens * 4], "length" if len(content) > max_tokens * 4 else "stop"
+
+def create_app(latency_ms: float = 300, chunk_ms: float = 20, chunk_chars: int = 16,
+               drop_rate: float = 0.0) -> Starlette:
+    counters = {"in_flight": 0, "peak": 0, "requests": 0, "batched": 0, "prompt_chars": 0}
+
+    def chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+        return "data: " + json.dumps({
+            "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }) + "\n\n"
+
+    async def completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        prompt = body["messages"][-1]["content"]
+        content, finish_reason = answer(prompt, body.get("max_tokens") or 4096, drop_rate)
+        counters["requests"] += 1
+        counters["batched"] += bool(BATCH_ITEM_PATTERN.search(prompt))
+        counters["prompt_chars"] += sum(len(message["content"]) for message in body["messages"])
+        completion_id = f"stub-{counters['requests']}"
+        counters["in_flight"] += 1
+        counters["peak"] = max(counters["peak"], counters["in_flight"])
+
+        if body.get("stream"):
+            async def events():
+                try:
+                    await asyncio.sleep(latency_ms / 1000)
+                    yield chunk(completion_id, model, {"role": "assistant", "content": ""})
+                    for start in range(0, len(content), chunk_chars):
+                        await asyncio.sleep(chunk_ms / 1000)
+                        yield chunk(completion_id, model, {"content": content[start:start + chunk_chars]})
+                    yield chunk(completion_id, model, {}, finish_reason=finish_reason)
+                    yield "data: [DONE]\n\n"
+                finally:
+                    counters["in_flight"] -= 1
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        try:
+            # A non-streamed answer takes as long as streaming all of it
+            await asyncio.sleep((latency_ms + chunk_ms * -(-len(content) // chunk_chars)) / 1000)
+        finally:
+            counters["in_flight"] -= 1
+        return JSONResponse({
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+
+    async def stats(request: Request):
+        return JSONResponse({key: value for key, value in counters.items() if key != "in_flight"})
+
+    return Starlette(routes=[Route("/chat/completions", completions, methods=["POST"]),
+                             Route("/stats", stats)])
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--chunk-ms", type=float, default=20)
+    parser.add_argument("--chunk-chars", type=int, default=16)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of batched explanations left out")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency_ms, args.chunk_ms, args.chunk_chars, args.drop_rate),
+                host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Query plans and timings of the hot queries on seeded tables, without and with the indexes.
+
+Seeds a temporary SQLite database (jobs, 3 images per job, lessons for
+completed jobs, result cache entries), then for each access path prints
+SQLite's EXPLAIN QUERY PLAN and the median run time, first with only
+primary keys and then with the indexes from migration 0003.
+
+Run from the backend directory:
+
+    python -m benchmarks.query_plans --jobs 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+from db.models import Base, Job, Image, Lesson, CacheEntry
+from services.job_queue import JobQueue, ACTIVE_STATUSES
+
+STATUSES = ["completed"] * 90 + ["error"] * 4 + ["queued"] * 2 + ACTIVE_STATUSES
+
+def seed(engine, jobs: int, cache_entries: int):
+    now = datetime.utcnow()
+    rows, images, lessons = [], [], []
+    for i in range(jobs):
+        job_id = str(uuid.uuid4())
+        status = random.choice(STATUSES)
+        active = status in ACTIVE_STATUSES
+        rows.append({
+            "id": job_id, "status": status, "attempts": 1,
+            "created_at": now - timedelta(seconds=jobs - i),
+            "lease_owner": "worker" if active else None,
+            "lease_expires_at": now + timedelta(seconds=random.randint(-120, 60)) if active else None
+        })
+        images += [{"id": str(uuid.uuid4()), "job_id": job_id, "filename": f"{n}.png",
+                    "file_path": f"uploads/{job_id}_{n}.png"} for n in range(3)]
+        if status == "completed":
+            lessons.append({"id": str(uuid.uuid4()), "job_id": job_id, "title": "Lesson", "steps": []})
+
+    entries = [{
+        "key": f"{namespace}:{uuid.uuid4().hex}", "namespace": namespace, "value": {},
+        "created_at": now, "last_accessed": now - timedelta(seconds=random.randint(0, 86400)),
+        "expires_at": now + timedelta(seconds=random.randint(-3600, 86400)) if namespace == "llm" else None,
+        "hits": 0
+    } for namespace in ("ocr", "llm") for _ in range(cache_entries // 2)]
+
+    with engine.begin() as connection:
+        for model, values in ((Job, rows), (Image, images), (Lesson, lessons), (CacheEntry, entries)):
+            for start in range(0, len(values), 10000):
+                connection.execute(insert(model), values[start:start + 10000])
+    return random.choice(rows)["id"]
+
+def access_paths(job_id: str):
+    now = datetime.utcnow()
+    queue = JobQueue(worker_id="bench")
+    return {
+        "claim: expired leases": queue.expired_candidates(now),
+        "claim: oldest queued jobs": queue.queued_candidates(),
+        "reap: expired final attempts": select(Job.id).where(
+            Job.status.in_(ACTIVE_STATUSES), Job.lease_expires_at < now, Job.attempts >= queue.max_attempts),
+        "images of a job": select(Image).where(Image.job_id == job_id),
+        "lesson of a job": select(Lesson).where(Lesson.job_id == job_id),
+        "cache: LRU eviction": select(CacheEntry.key).where(CacheEntry.namespace == "ocr")
+            .order_by(CacheEntry.last_accessed.asc()).limit(100),
+        "cache: entries per namespace": select(func.count()).select_from(CacheEntry)
+            .where(CacheEntry.namespace == "ocr"),
+        "cache: TTL sweep": select(CacheEntry.key).where(CacheEntry.namespace == "llm", CacheEntry.expires_at <= now),
+    }
+
+def measure(engine, job_id: str, repeats: int):
+    with engine.connect() as connection:
+        for name, statement in access_paths(job_id).items():
+            compiled = statement.compile(engine, compile_kwargs={"render_postcompile": True})
+            params = tuple(compiled.params[key] for key in compiled.positiontup)
+            plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, params).all()
+
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                connection.execute(statement).all()
+                timings.append(time.perf_counter() - start)
+
+            print(f"  {name:<30} {1000 * statistics.median(timings):9.3f} ms")
+            for row in plan:
+                print(f"      {row[-1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200000)
+    parser.add_argument("--cache-entries", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        Base.metadata.create_all(bind=engine)
+        indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+        for index in indexes:
+            index.drop(engine)
+
+        start = time.perf_counter()
+        job_id = seed(engine, args.jobs, args.cache_entries)
+        print(f"seeded {args.jobs} jobs, {3 * args.jobs} images, {args.cache_entries} cache entries "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        print("\nprimary keys only")
+        measure(engine, job_id, args.repeats)
+
+        for index in indexes:
+            index.create(engine)
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+
+        print("\nwith indexes")
+        measure(engine, job_id, args.repeats)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
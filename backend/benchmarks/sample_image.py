@@ -0,0 +1,21 @@
+"""A real, decodable worksheet image for the OCR benchmarks.
+
+sample_data/quadratic_equation.png is a text placeholder, not a PNG, so
+benchmarks that pointed at it only timed decode failures.
+"""
+import cv2
+import numpy as np
+
+def write_sample_image(path: str, text: str = "x^2 - 5x + 6 = 0", width: int = 800, height: int = 200):
+    """Render text in black on white paper and save it to path (format from the extension)"""
+
+    page = np.full((height, width), 255, np.uint8)
+    cv2.putText(page, text, (40, height // 2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 1.8, 0, 3, cv2.LINE_AA)
+    if not cv2.imwrite(path, page):
+        raise RuntimeError(f"Could not write {path}")
+
+def check_image(path: str):
+    """Raise SystemExit unless path decodes as an image"""
+
+    if cv2.imread(path) is None:
+        raise SystemExit(f"{path} is not a readable image; omit --image to use a generated one")
@@ -0,0 +1,88 @@
+"""Identical worksheets uploaded at once: duplicate work with and without request coalescing.
+
+--jobs copies of the same --images expressions are explained and validated
+concurrently, each job through its own ExplanationBatcher the way
+LessonBuilder runs them, against benchmarks.openrouter_stub with the
+result caches off (all requests are in flight together, so a cache could
+not help yet):
+
+    isolated   every job has its own LLMService and SymPyService (no shared in-flight calls)
+    shared     one LLMService and SymPyService, whose single-flight layer collapses duplicates
+
+Reports LLM requests sent, SymPy validations computed and wall time.
+Run from the backend directory:
+
+    python -m benchmarks.single_flight --jobs 4 --images 6
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.openrouter_stub import create_app
+from benchmarks.stub_server import StubServer
+
+async def run_jobs(jobs: int, images: int, shared: bool) -> dict:
+    from services.llm_batcher import ExplanationBatcher
+    from services.llm_service import LLMService
+    from services.sympy_service import SymPyService
+
+    services = [(LLMService(), SymPyService()) for _ in range(1 if shared else jobs)]
+    for llm, sympy_service in services:
+        llm.cache_enabled = False
+        await llm._get_client()  # import openai outside the measurement
+        await sympy_service.warm_up()
+    expressions = [f"x^2 - {(i + 1) ** 2} = 0" for i in range(images)]
+
+    async def job(number: int):
+        llm, sympy_service = services[number % len(services)]
+        batcher = ExplanationBatcher(llm)
+
+        async def image(i: int, latex: str):
+            validation = await sympy_service.validate_expression(latex)
+            explanation = await batcher.explain(latex, f"This is image {i+1} from a sequence of math problems")
+            return validation, explanation
+
+        return await asyncio.gather(*(image(i, latex) for i, latex in enumerate(expressions)))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(job(number) for number in range(jobs)))
+    wall = time.perf_counter() - start
+
+    validations = sum(sympy_service.single_flight.stats()["executions"] for _, sympy_service in services)
+    coalesced = {
+        "llm": sum(llm.single_flight.stats()["coalesced"] for llm, _ in services),
+        "sympy": sum(sympy_service.single_flight.stats()["coalesced"] for _, sympy_service in services)
+    }
+    for llm, sympy_service in services:
+        await llm.shutdown()
+        await sympy_service.shutdown()
+
+    assert all(explanation["source"] == "nemotron_openrouter" for job in results for _, explanation in job)
+    assert all(validation["valid"] for job in results for validation, _ in job)
+    return {"wall_s": wall, "validations": validations, "coalesced": coalesced}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent uploads of the same worksheet")
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--chunk-ms", type=float, default=5)
+    parser.add_argument("--chunk-chars", type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ.update(OPENROUTER_API_KEY="stub", LLM_RATE_LIMIT_RPM="0")
+    for mode in ("isolated", "shared"):
+        with StubServer(create_app(args.latency_ms, args.chunk_ms, args.chunk_chars)) as stub:
+            os.environ["OPENROUTER_BASE_URL"] = stub.base_url
+            result = asyncio.run(run_jobs(args.jobs, args.images, shared=mode == "shared"))
+            server = httpx.get(f"{stub.base_url}/stats").json()
+
+        print(f"{mode:>8}  llm requests {server['requests']:3d}  prompt chars {server['prompt_chars']:7d}  "
+              f"sympy validations {result['validations']:3d}  wall {1000 * result['wall_s']:8.1f} ms  "
+              f"coalesced llm {result['coalesced']['llm']} sympy {result['coalesced']['sympy']}")
+
+if __name__ == "__main__":
+    main()
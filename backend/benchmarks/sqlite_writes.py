@@ -0,0 +1,116 @@
+"""Jobs/sec with N concurrent uploaders on SQLite: default journal vs WAL vs WAL + write queue.
+
+Each simulated job makes the writes a real one does: insert the job and
+its images, a handful of progress updates, then the final status update.
+
+    default     rollback journal, one transaction per write (previous setup)
+    wal         production PRAGMAs, one transaction per write
+    wal+queue   production PRAGMAs, writes batched by db.write_queue.WriteQueue
+
+Run from the backend directory:
+
+    python -m benchmarks.sqlite_writes --uploaders 1,8,32 --jobs 400
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.database import configure_sqlite
+from db.models import Base, Job, Image
+from db.write_queue import WriteQueue
+
+IMAGES_PER_JOB = 3
+PROGRESS_UPDATES = 6
+
+def new_job():
+    job_id = str(uuid.uuid4())
+    job = Job(id=job_id, status="queued", created_at=datetime.utcnow(), total_images=IMAGES_PER_JOB)
+    images = [Image(id=str(uuid.uuid4()), job_id=job_id, filename=f"{i}.png", file_path=f"uploads/{i}.png")
+              for i in range(IMAGES_PER_JOB)]
+    return job, images
+
+class DirectWriter:
+    """One short transaction per write, as the endpoints and workers did before"""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def _add(self, instances):
+        db = self.session_factory()
+        try:
+            db.add_all(instances)
+            db.commit()
+        finally:
+            db.close()
+
+    def _update(self, job_id, values):
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def add(self, *instances):
+        await asyncio.to_thread(self._add, list(instances))
+
+    async def update(self, model, key, values):
+        await asyncio.to_thread(self._update, key, values)
+
+    async def close(self):
+        pass
+
+async def uploader(writer, jobs_left, errors):
+    while jobs_left[0] > 0:
+        jobs_left[0] -= 1
+        try:
+            job, images = new_job()
+            job_id = job.id
+            await writer.add(job, *images)
+            for step in range(PROGRESS_UPDATES):
+                await writer.update(Job, job_id, {Job.images_ocr_done: step, Job.status: "processing"})
+            await writer.update(Job, job_id, {Job.status: "completed", Job.completed_at: datetime.utcnow()})
+        except Exception as e:
+            errors.append(e)
+
+async def run(writer, uploaders: int, jobs: int):
+    errors = []
+    jobs_left = [jobs]
+    start = time.perf_counter()
+    await asyncio.gather(*(uploader(writer, jobs_left, errors) for _ in range(uploaders)))
+    await writer.close()
+    return (jobs - len(errors)) / (time.perf_counter() - start), errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploaders", default="1,8,32")
+    parser.add_argument("--jobs", type=int, default=400)
+    args = parser.parse_args()
+
+    print(f"jobs={args.jobs}  writes/job={2 + PROGRESS_UPDATES}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for uploaders in (int(n) for n in args.uploaders.split(",")):
+            for mode in ("default", "wal", "wal+queue"):
+                path = os.path.join(tmp, f"{mode}-{uploaders}.db")
+                engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+                if mode != "default":
+                    configure_sqlite(engine)
+                Base.metadata.create_all(bind=engine)
+                session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+                writer = WriteQueue(session_factory) if mode == "wal+queue" else DirectWriter(session_factory)
+                rate, errors = asyncio.run(run(writer, uploaders, args.jobs))
+                engine.dispose()
+
+                locked = sum("locked" in str(e) for e in errors)
+                print(f"uploaders={uploaders:>3}  {mode:<10} {rate:8.1f} jobs/sec  errors={len(errors)} (locked={locked})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""p50/p99 latency of GET /status under concurrent load: blocking, threadpool and async sessions.
+
+"sync" is the original handler: a blocking SQLAlchemy session opened with
+next(get_db()) inside an async endpoint. "threadpool" runs the sync
+session's calls in worker threads (ThreadedSession, the SQLite default).
+"async" uses an AsyncSession on aiosqlite (the default on other
+databases). All run in-process against a seeded SQLite database, driven
+through httpx's ASGI transport.
+
+With --writer-hold-ms a background thread plays the job worker, repeatedly
+holding SQLite's write lock. A blocked sync query stalls the whole event
+loop; a blocked async query only stalls its own request.
+
+Run from the backend directory:
+
+    python -m benchmarks.status_load --rate 400 --requests 4000 --writer-hold-ms 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+
+def build_apps():
+    from fastapi import FastAPI, HTTPException, Depends
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from db.database import get_db, get_async_db, ThreadedSession
+    from db.models import Job
+    from services.job_progress import job_status
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/status/{job_id}")
+    async def sync_status(job_id: str):
+        db = next(get_db())
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        response = job_status(job)
+        db.close()
+        return response
+
+    threadpool_app = FastAPI()
+
+    async def get_threaded_db():
+        db = ThreadedSession()
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    @threadpool_app.get("/status/{job_id}")
+    async def threadpool_status(job_id: str, db: ThreadedSession = Depends(get_threaded_db)):
+        job = await db.get(Job, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job_status(job)
+
+    async_app = FastAPI()
+
+    @async_app.get("/status/{job_id}")
+    async def async_status(job_id: str, db: AsyncSession = Depends(get_async_db)):
+        job = await db.get(Job, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job_status(job)
+
+    return {"sync": sync_app, "threadpool": threadpool_app, "async": async_app}
+
+def seed(jobs: int):
+    from datetime import datetime
+    from db.database import engine, SessionLocal
+    from db.models import Base, Job
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    ids = []
+    for _ in range(jobs):
+        job_id = str(uuid.uuid4())
+        db.add(Job(id=job_id, status="processing", created_at=datetime.utcnow(), total_images=4,
+                   images_ocr_done=2, started_at=datetime.utcnow()))
+        ids.append(job_id)
+    db.commit()
+    db.close()
+    return ids
+
+def hold_write_lock(stop: threading.Event, job_ids, hold_ms: float, interval_ms: float):
+    """Progress writes the way a busy worker makes them: exclusive lock, update, commit"""
+    from db.database import engine
+
+    with engine.connect() as connection:
+        raw = connection.connection.driver_connection
+        raw.isolation_level = None
+        while not stop.is_set():
+            raw.execute("BEGIN EXCLUSIVE")
+            raw.execute("UPDATE jobs SET images_validated = images_validated + 1 WHERE id = ?",
+                        (random.choice(job_ids),))
+            time.sleep(hold_ms / 1000)
+            raw.execute("COMMIT")
+            time.sleep(interval_ms / 1000)
+
+async def load(app, job_ids, rate: float, requests: int, missing_ratio: float):
+    """Open-loop load: request i is due at i / rate seconds and its latency counts from then.
+
+    Counting from the due time keeps a blocked event loop from hiding its own
+    delay (coordinated omission): requests that could not even be sent are late too.
+    """
+    import httpx
+    from db.database import async_engine
+    async with async_engine.connect():
+        pass  # first connect initializes the dialect; see warm_up_async_db
+
+    latencies = []
+
+    async def one(client, due: float):
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        job_id = str(uuid.uuid4()) if random.random() < missing_ratio else random.choice(job_ids)
+        response = await client.get(f"/status/{job_id}")
+        latencies.append(time.perf_counter() - due)
+        assert response.status_code in (200, 404), response.text
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, start + i / rate) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    # Close pooled aiosqlite connections; their threads would otherwise keep the process alive
+    await async_engine.dispose()
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": 1000 * statistics.median(latencies),
+        "p99": 1000 * latencies[int(0.99 * (len(latencies) - 1))]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rate", type=float, default=400, help="offered load in requests/sec")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--missing-ratio", type=float, default=0.1, help="share of requests for unknown jobs (404)")
+    parser.add_argument("--writer-hold-ms", type=float, default=0, help="simulated worker write lock hold time")
+    parser.add_argument("--writer-interval-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before db.database is imported
+        database = os.path.join(tmp, "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+
+        job_ids = seed(args.jobs)
+        apps = build_apps()
+        print(f"rate={args.rate:g}/s requests={args.requests} missing={args.missing_ratio:.0%} "
+              f"writer_hold={args.writer_hold_ms}ms")
+
+        for name, app in apps.items():
+            stop = threading.Event()
+            writer = None
+            if args.writer_hold_ms > 0:
+                writer = threading.Thread(target=hold_write_lock, daemon=True,
+                                          args=(stop, job_ids, args.writer_hold_ms, args.writer_interval_ms))
+                writer.start()
+            try:
+                result = asyncio.run(load(app, job_ids, args.rate, args.requests, args.missing_ratio))
+            finally:
+                stop.set()
+                if writer is not None:
+                    writer.join()
+            print(f"{name:>10}  {result['rps']:8.1f} req/s  p50 {result['p50']:7.2f} ms  p99 {result['p99']:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
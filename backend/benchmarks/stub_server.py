@@ -0,0 +1,35 @@
+"""Runs an ASGI stub (e.g. benchmarks.mathpix_stub) with uvicorn on a background thread and a free port."""
+import socket
+import threading
+import time
+
+import uvicorn
+
+class StubServer:
+    def __init__(self, app, path: str = ""):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.path = path
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning",
+                                limit_concurrency=1000)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def url(self) -> str:
+        return self.base_url + self.path
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
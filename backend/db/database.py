@@ -1,6 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -8,13 +13,79 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./math_app.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Async drivers for the same database: aiosqlite for SQLite, asyncpg for PostgreSQL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def _async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    """Connection pool settings shared by the sync and async engines"""
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+    if "sqlite" in url:
+        options["connect_args"] = {"check_same_thread": False}
+        if is_async:
+            # aiosqlite defaults to NullPool, i.e. a new connection and thread per session
+            options["poolclass"] = AsyncAdaptedQueuePool
+    else:
+        options["pool_pre_ping"] = True
+    return options
+
+def configure_sqlite(engine: Engine):
+    """Apply the production SQLite profile to every new connection of engine.
+
+    WAL lets readers run alongside the single writer instead of failing with
+    "database is locked"; synchronous=NORMAL is durable against application
+    crashes in WAL mode and skips an fsync per commit.
+    """
+    pragmas = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    }
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+# Sync engine: background workers, caches and migrations (always off the event loop)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if engine.dialect.name == "sqlite":
+    configure_sqlite(engine)
+
+# Async engine: request handlers, so queries never block the event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, is_async=True))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if async_engine.dialect.name == "sqlite":
+    configure_sqlite(async_engine.sync_engine)
+
+# Request handlers read through AsyncSession on server databases. On SQLite a sync
+# session in the threadpool is faster: aiosqlite hops through a thread per connection
+# and a queue for every call, which costs more than the query itself
+_async_sessions = os.getenv("DB_ASYNC_SESSIONS", "auto").lower()
+USE_ASYNC_SESSIONS = _async_sessions == "true" or (_async_sessions == "auto" and engine.dialect.name != "sqlite")
+
 Base = declarative_base()
 
 def get_db():
@@ -23,3 +94,49 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def warm_up_async_db():
+    """Open the first pooled connection before serving requests.
+
+    SQLAlchemy runs its one-time dialect initialization under a thread lock on
+    first connect; concurrent first requests on one event loop can deadlock on it.
+    """
+    if not USE_ASYNC_SESSIONS:
+        return
+    async with async_engine.connect():
+        pass
+
+async def get_async_db():
+    """FastAPI dependency: one session per request, closed even when the handler raises"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+class ThreadedSession:
+    """The part of AsyncSession that request handlers use, backed by a sync Session in worker threads"""
+
+    def __init__(self):
+        self._session = SessionLocal()
+
+    async def get(self, model, key):
+        return await asyncio.to_thread(self._session.get, model, key)
+
+    async def close(self):
+        await asyncio.to_thread(self._session.close)
+
+@asynccontextmanager
+async def read_session():
+    """Session for request handlers: AsyncSession, or ThreadedSession unless USE_ASYNC_SESSIONS"""
+    if USE_ASYNC_SESSIONS:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = ThreadedSession()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+async def get_read_db():
+    """FastAPI dependency: read_session() per request"""
+    async with read_session() as db:
+        yield db
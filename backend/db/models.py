@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, JSON, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -7,21 +7,49 @@ class Job(Base):
     __tablename__ = "jobs"
     
     id = Column(String, primary_key=True)
-    status = Column(String, default="uploaded")  # uploaded, processing, ocr_done, llm_done, lesson_built, completed, error
+    status = Column(String, default="uploaded")  # uploaded, queued, processing, ocr_done, llm_done, lesson_built, completed, error
     created_at = Column(DateTime, default=datetime.utcnow)
     error_message = Column(Text, nullable=True)
     lesson_id = Column(String, nullable=True)
     
+    # Durable queue: payload plus the lease held by the worker processing the job
+    file_paths = Column(JSON, nullable=True)
+    attempts = Column(Integer, default=0)
+    lease_owner = Column(String, nullable=True)
+    lease_token = Column(String, nullable=True)  # new on every claim, so a re-claim by the same worker is distinct
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    
+    # Progress of the current attempt, written in batches by JobProgress
+    total_images = Column(Integer, default=0)
+    images_ocr_done = Column(Integer, default=0)
+    images_validated = Column(Integer, default=0)
+    images_explained = Column(Integer, default=0)
+    current_stage = Column(String, nullable=True)  # ocr, sympy, llm, building, saving
+    started_at = Column(DateTime, nullable=True)
+    progress_updated_at = Column(DateTime, nullable=True)
+    ocr_done_at = Column(DateTime, nullable=True)
+    llm_done_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    
     # Relationships
     images = relationship("Image", back_populates="job")
+    
+    __table_args__ = (
+        # Worker claim: oldest queued jobs first
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+        # Worker claim and reaper: jobs in a given state whose lease has expired
+        Index("ix_jobs_status_lease_expires_at", "status", "lease_expires_at"),
+    )
 
 class Image(Base):
     __tablename__ = "images"
     
     id = Column(String, primary_key=True)
-    job_id = Column(String, ForeignKey("jobs.id"))
+    job_id = Column(String, ForeignKey("jobs.id"), index=True)
     filename = Column(String)
     file_path = Column(String)
+    content_hash = Column(String, nullable=True)  # SHA-256 of the uploaded bytes
     tag = Column(String, nullable=True)  # pic1, pic2, etc.
     ocr_result = Column(Text, nullable=True)
     processed_at = Column(DateTime, nullable=True)
@@ -33,7 +61,7 @@ class Lesson(Base):
     __tablename__ = "lessons"
     
     id = Column(String, primary_key=True)
-    job_id = Column(String, ForeignKey("jobs.id"))
+    job_id = Column(String, ForeignKey("jobs.id"), index=True)
     title = Column(String)
     steps = Column(JSON)  # Structured lesson data
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -44,3 +72,21 @@ class User(Base):
     id = Column(String, primary_key=True)
     email = Column(String, unique=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class CacheEntry(Base):
+    __tablename__ = "cache_entries"
+    
+    key = Column(String, primary_key=True)  # namespace:content key
+    namespace = Column(String)  # ocr, llm, ...
+    value = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed = Column(DateTime, default=datetime.utcnow)  # drives LRU eviction
+    expires_at = Column(DateTime, nullable=True)  # null = no TTL
+    hits = Column(Integer, default=0)
+    
+    __table_args__ = (
+        # LRU eviction and per-namespace counts
+        Index("ix_cache_entries_namespace_last_accessed", "namespace", "last_accessed"),
+        # TTL expiry sweep
+        Index("ix_cache_entries_namespace_expires_at", "namespace", "expires_at"),
+    )
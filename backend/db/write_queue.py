@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from .database import SessionLocal
+
+class WriteQueue:
+    """Single writer that commits queued inserts and status updates in batched transactions.
+
+    SQLite allows one writer at a time, so many small transactions from
+    concurrent uploads and jobs mostly wait on each other's locks and fsyncs.
+    Writes queued while a transaction is committing (or within `linger_ms`)
+    share the next one; updates to the same row are coalesced into one UPDATE
+    with the latest values.
+    If a batch fails, its writes are retried one by one so a single bad write
+    only fails its own caller.
+    """
+
+    def __init__(self, session_factory=None, max_batch: Optional[int] = None, linger_ms: Optional[float] = None):
+        self.session_factory = session_factory or SessionLocal
+        self.max_batch = max(1, max_batch or int(os.getenv("DB_WRITE_BATCH_SIZE", "256")))
+        self.linger = (linger_ms if linger_ms is not None else float(os.getenv("DB_WRITE_LINGER_MS", "0"))) / 1000
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.transactions = 0
+        self.retried_batches = 0
+        self.commit_seconds = 0.0
+
+    def _ensure_started(self):
+        if self._writer is None or self._writer.done():
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._run())
+
+    async def add(self, *instances):
+        """Insert new ORM instances; returns once they are committed"""
+        await self._submit(("add", list(instances)))
+
+    async def update(self, model, key: Any, values: Dict[Any, Any], **conditions) -> int:
+        """UPDATE model row `key` with values if it matches conditions; returns rows updated"""
+        return await self._submit(("update", model, key, values, tuple(sorted(conditions.items()))))
+
+    async def _submit(self, operation: Tuple) -> Any:
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+        await self._queue.put((operation, future))
+        return await future
+
+    async def close(self):
+        """Commit everything queued so far and stop the writer"""
+        if self._writer is not None and not self._writer.done():
+            await self._queue.put(None)
+            await self._writer
+        self._writer = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                return
+
+            # Everything queued while the previous batch was committing joins this one;
+            # an optional linger trades a little latency for larger batches
+            batch = [first]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.max_batch:
+                try:
+                    if self._queue.empty() and loop.time() < deadline:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=deadline - loop.time())
+                    else:
+                        item = self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._commit(batch)
+
+    async def _commit(self, batch: List[Tuple[Tuple, asyncio.Future]]):
+        # Coalesce updates per (model, key, conditions); later values win
+        adds: List[Tuple[List[Any], List[asyncio.Future]]] = []
+        updates: Dict[Tuple, Dict[str, Any]] = {}
+        for operation, future in batch:
+            if operation[0] == "add":
+                adds.append((operation[1], [future]))
+                continue
+            _, model, key, values, conditions = operation
+            merge_key = (model, key, conditions)
+            if merge_key in updates:
+                updates[merge_key]["values"].update(values)
+                updates[merge_key]["futures"].append(future)
+                self.coalesced += 1
+            else:
+                updates[merge_key] = {"values": dict(values), "futures": [future]}
+
+        writes = [("add", instances, None, futures) for instances, futures in adds]
+        writes += [("update", merge_key, update["values"], update["futures"]) for merge_key, update in updates.items()]
+
+        start = time.perf_counter()
+        try:
+            results = await asyncio.to_thread(self._write, writes)
+            outcomes = [(writes[i][3], result, None) for i, result in enumerate(results)]
+        except Exception:
+            # Retry each write alone so only the failing ones report an error
+            self.retried_batches += 1
+            outcomes = []
+            for write in writes:
+                try:
+                    outcomes.append((write[3], (await asyncio.to_thread(self._write, [write]))[0], None))
+                except Exception as e:
+                    outcomes.append((write[3], None, e))
+        self.commit_seconds += time.perf_counter() - start
+        self.batches += 1
+
+        for futures, result, error in outcomes:
+            for future in futures:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _write(self, writes: List[Tuple]) -> List[Any]:
+        """Apply writes in one transaction; runs on a worker thread"""
+
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            results = []
+            for kind, target, values, _ in writes:
+                if kind == "add":
+                    db.add_all(target)
+                    db.flush()  # later updates in this batch may target these rows
+                    results.append(None)
+                else:
+                    model, key, conditions = target
+                    query = db.query(model).filter(model.id == key)
+                    for name, expected in conditions:
+                        query = query.filter(getattr(model, name) == expected)
+                    results.append(query.update(values, synchronize_session=False))
+            db.commit()
+            self.transactions += 1
+            return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "transactions": self.transactions,
+            "retried_batches": self.retried_batches,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_size": round(self.submitted / self.batches, 2) if self.batches else None,
+            "avg_commit_ms": round(1000 * self.commit_seconds / self.batches, 2) if self.batches else None
+        }
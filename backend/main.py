@@ -1,24 +1,59 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from typing import List, Optional
 import os
+import json
 import uuid
-import shutil
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from db.database import engine, get_db
+from db.database import engine, async_engine, get_read_db, read_session, warm_up_async_db
 from db.models import Base, Job, Lesson, Image
+from db.write_queue import WriteQueue
 from services.ocr_service import OCRService
 from services.llm_service import LLMService
 from services.sympy_service import SymPyService
 from services.lesson_builder import LessonBuilder
-from sqlalchemy.orm import Session
+from services.job_queue import JobWorker
+from services.job_progress import job_status
+from services.event_bus import EventBus
+from services.upload_storage import UploadStorage, RequestSizeLimit
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Math Scrap to Lesson API", version="1.0.0")
+# Background warm-ups started at startup; /ready reports ready once they have finished
+warm_up_tasks: dict = {}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_async_db()
+    # Load the OCR model and start OCR/SymPy workers in the background so the server
+    # accepts connections immediately; a request arriving first loads the model itself
+    if os.getenv("OCR_WARMUP", "true").lower() == "true":
+        warm_up_tasks["ocr"] = asyncio.create_task(ocr_service.warm_up())
+    warm_up_tasks["sympy"] = asyncio.create_task(sympy_service.warm_up())
+    # Run a job worker in this process unless dedicated workers (worker.py) are deployed
+    worker_task = None
+    if os.getenv("EMBEDDED_WORKER", "true").lower() == "true":
+        worker_task = asyncio.create_task(job_worker.run())
+    yield
+    # Stop claiming jobs, then pipeline workers, then let running OCR and SymPy calls finish
+    if worker_task is not None:
+        job_worker.stop()
+        await worker_task
+    await asyncio.gather(*warm_up_tasks.values(), return_exceptions=True)
+    await lesson_builder.shutdown()
+    await write_queue.close()
+    await ocr_service.shutdown()
+    await llm_service.shutdown()
+    await sympy_service.shutdown()
+    await async_engine.dispose()
+
+app = FastAPI(title="Math Scrap to Lesson API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -29,14 +64,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Ensure upload directory exists
-os.makedirs("uploads", exist_ok=True)
-
 # Initialize services
+upload_storage = UploadStorage()
 ocr_service = OCRService()
 llm_service = LLMService()
 sympy_service = SymPyService()
 lesson_builder = LessonBuilder(ocr_service, llm_service, sympy_service)
+event_bus = EventBus()
+write_queue = WriteQueue()
+job_worker = JobWorker(lesson_builder, event_bus=event_bus, write_queue=write_queue)
+
+# Stop reading oversized upload bodies early instead of spooling them to disk first
+app.add_middleware(RequestSizeLimit, max_bytes=upload_storage.max_request_size)
 
 @app.get("/")
 async def root():
@@ -44,7 +83,6 @@ async def root():
 
 @app.post("/upload")
 async def upload_images(
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     tags: Optional[str] = None
 ):
@@ -53,81 +91,64 @@ async def upload_images(
     # Generate job ID
     job_id = str(uuid.uuid4())
     
-    # Create job in database
-    db = next(get_db())
-    job = Job(
-        id=job_id,
-        status="uploaded",
-        created_at=datetime.utcnow()
-    )
-    db.add(job)
-    db.commit()
-    
-    # Save uploaded files
-    file_paths = []
-    for i, file in enumerate(files):
-        if not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail=f"File {file.filename} is not an image")
-        
-        # Generate unique filename
-        file_extension = file.filename.split('.')[-1]
-        filename = f"{job_id}_{i}.{file_extension}"
-        file_path = f"uploads/{filename}"
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        file_paths.append(file_path)
-        
-        # Create image record
-        image = Image(
+    # Stream uploaded files to disk (size-capped, hashed, renamed into place when complete)
+    saved = await upload_storage.save_all(files, job_id)
+    file_paths = [entry["file_path"] for entry in saved]
+    images = [
+        Image(
             id=str(uuid.uuid4()),
             job_id=job_id,
-            filename=filename,
-            file_path=file_path,
+            filename=entry["filename"],
+            file_path=entry["file_path"],
+            content_hash=entry["content_hash"],
             tag=tags.split(',')[i] if tags and i < len(tags.split(',')) else None
         )
-        db.add(image)
-    
-    db.commit()
-    db.close()
+        for i, entry in enumerate(saved)
+    ]
     
-    # Start background processing
-    background_tasks.add_task(process_images, job_id, file_paths)
+    # Create the queued job and its images in one write, batched with concurrent uploads;
+    # any worker process may claim the job from here on
+    job = Job(
+        id=job_id,
+        status="queued",
+        created_at=datetime.utcnow(),
+        file_paths=file_paths,
+        total_images=len(file_paths)
+    )
+    try:
+        await write_queue.add(job, *images)
+    except Exception:
+        await upload_storage.discard(file_paths)
+        raise
     
     return {"job_id": job_id, "message": "Upload successful, processing started"}
 
 @app.get("/status/{job_id}")
-async def get_job_status(job_id: str):
+async def get_job_status(job_id: str, db=Depends(get_read_db)):
     """Get processing status for a job"""
-    db = next(get_db())
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    response = {
-        "job_id": job_id,
-        "status": job.status,
-        "created_at": job.created_at,
-        "ocr_done": job.status in ["ocr_done", "llm_done", "lesson_built", "completed"],
-        "llm_done": job.status in ["llm_done", "lesson_built", "completed"],
-        "lesson_built": job.status in ["lesson_built", "completed"],
-        "lesson_id": job.lesson_id if job.lesson_id else None
-    }
-    
-    if job.error_message:
-        response["error"] = job.error_message
+    return job_status(job)
+
+@app.get("/status/{job_id}/stream")
+async def stream_job_status(job_id: str):
+    """Push status updates as Server-Sent Events until the job completes or fails"""
+    if await load_job_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    db.close()
-    return response
+    return StreamingResponse(
+        status_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/lesson/{lesson_id}")
-async def get_lesson(lesson_id: str):
+async def get_lesson(lesson_id: str, db=Depends(get_read_db)):
     """Get structured lesson data"""
-    db = next(get_db())
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    lesson = await db.get(Lesson, lesson_id)
     
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
@@ -140,45 +161,91 @@ async def get_lesson(lesson_id: str):
         "job_id": lesson.job_id
     }
     
-    db.close()
     return response
 
-async def process_images(job_id: str, file_paths: List[str]):
-    """Background task to process uploaded images"""
-    db = next(get_db())
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 200 once background warm-ups have finished, 503 before or if one failed"""
     
-    try:
-        # Update job status
-        job = db.query(Job).filter(Job.id == job_id).first()
-        job.status = "processing"
-        db.commit()
-        
-        # Build lesson from images
-        lesson_data = await lesson_builder.build_lesson(job_id, file_paths)
-        
-        # Create lesson record
-        lesson = Lesson(
-            id=str(uuid.uuid4()),
-            job_id=job_id,
-            title=lesson_data["title"],
-            steps=lesson_data["steps"]
-        )
-        db.add(lesson)
-        
-        # Update job with lesson ID
-        job.lesson_id = lesson.id
-        job.status = "completed"
-        db.commit()
-        
-    except Exception as e:
-        # Update job with error
-        job = db.query(Job).filter(Job.id == job_id).first()
-        job.status = "error"
-        job.error_message = str(e)
-        db.commit()
+    checks = {}
+    for name, task in warm_up_tasks.items():
+        if not task.done():
+            checks[name] = "warming_up"
+        elif task.cancelled() or task.exception() is not None:
+            checks[name] = "failed" if task.cancelled() else f"failed: {task.exception()}"
+        else:
+            checks[name] = "ready"
+    ready = all(state == "ready" for state in checks.values())
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "checks": checks, "ocr_model": ocr_service.latex_ocr.status()}
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Processing pipeline metrics for sizing workers"""
+    return {
+        "pipeline": lesson_builder.pipeline_stats(),
+        "ocr_pool": ocr_service.latex_ocr.pool.stats(),
+        "ocr_preprocess": ocr_service.preprocessing.stats(),
+        "ocr_batching": ocr_service.latex_ocr.batch_stats(),
+        "ocr_cache": ocr_service.cache.stats(),
+        "mathpix": ocr_service.mathpix.stats(),
+        "llm": llm_service.stats(),
+        "llm_batching": lesson_builder.batching_stats(),
+        "llm_cache": llm_service.cache.stats(),
+        "event_bus": event_bus.stats(),
+        "db_write_queue": write_queue.stats(),
+        "uploads": upload_storage.stats(),
+        "sympy_parse_cache": sympy_service.parse_cache_stats(),
+        "sympy_pool": sympy_service.pool.stats(),
+        "single_flight": {
+            "ocr": ocr_service.single_flight.stats(),
+            "llm": llm_service.single_flight.stats(),
+            "sympy": sympy_service.single_flight.stats()
+        }
+    }
+
+async def load_job_status(job_id: str) -> Optional[dict]:
+    """Status payload for job_id read from the database, or None if it does not exist"""
+    async with read_session() as db:
+        job = await db.get(Job, job_id)
+        return job_status(job) if job else None
+
+def format_sse(payload: dict) -> str:
+    return f"event: status\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+def is_stale(event: dict, snapshot: dict) -> bool:
+    """Whether event was published before the state snapshot already reflects"""
+    return (event.get("updated_at") is not None and snapshot.get("updated_at") is not None
+            and event["updated_at"] < snapshot["updated_at"])
+
+async def status_events(job_id: str):
+    """Stream of status events: pipeline events as they happen, DB re-reads when quiet"""
+    refresh_seconds = float(os.getenv("STATUS_STREAM_REFRESH_SECONDS", "5"))
     
-    finally:
-        db.close()
+    # Subscribe before reading the snapshot, so nothing published in between is missed;
+    # events queued meanwhile that the snapshot already covers are skipped below
+    async with event_bus.subscribe(job_id) as events:
+        snapshot = await load_job_status(job_id)
+        if snapshot is None:
+            return
+        yield format_sse(snapshot)
+        
+        while snapshot["status"] not in ("completed", "error"):
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=refresh_seconds)
+                if is_stale(event, snapshot):
+                    continue
+                snapshot = {**snapshot, **event}
+            except asyncio.TimeoutError:
+                # Jobs claimed by a separate worker process publish nothing here
+                latest = await load_job_status(job_id)
+                if latest is None:
+                    return
+                snapshot = latest
+            yield format_sse(snapshot)
 
 if __name__ == "__main__":
     import uvicorn
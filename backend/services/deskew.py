@@ -0,0 +1,68 @@
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np  # OpenCV and NumPy are imported where used; they are slow to import
+
+class Deskewer:
+    """Estimates and corrects text skew with a projection profile on a small binarized copy.
+
+    Memory stays bounded by `max_side`: the image is downsampled and
+    binarized first, and only its (capped) foreground pixels are projected,
+    instead of collecting the coordinates of every pixel of the full frame.
+    Candidate angles are scored by how sharply the rotated text rows
+    separate (sum of squared row counts), first coarsely, then refined.
+    """
+
+    def __init__(self, max_angle: Optional[float] = None, min_angle: Optional[float] = None,
+                 max_side: Optional[int] = None, max_points: Optional[int] = None):
+        self.max_angle = max_angle if max_angle is not None else float(os.getenv("OCR_DESKEW_MAX_ANGLE", "15"))
+        self.min_angle = min_angle if min_angle is not None else float(os.getenv("OCR_DESKEW_MIN_ANGLE", "0.5"))
+        self.max_side = max_side or int(os.getenv("OCR_DESKEW_MAX_SIDE", "1024"))
+        self.max_points = max_points or 200000
+
+    def estimate_angle(self, gray: "np.ndarray") -> float:
+        """Text skew in degrees, counter-clockwise as in cv2.getRotationMatrix2D"""
+        import cv2
+        import numpy as np
+
+        scale = min(1.0, self.max_side / max(gray.shape[:2]))
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+        _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        ys, xs = np.nonzero(binary)
+        if len(ys) < 50:
+            return 0.0
+        # Otsu on a blank or dark frame can select most of the image; text is the minority
+        if len(ys) > binary.size / 2:
+            return 0.0
+        if len(ys) > self.max_points:
+            keep = np.random.default_rng(0).choice(len(ys), self.max_points, replace=False)
+            ys, xs = ys[keep], xs[keep]
+        ys = ys.astype(np.float32) - small.shape[0] / 2
+        xs = xs.astype(np.float32) - small.shape[1] / 2
+
+        coarse = np.arange(-self.max_angle, self.max_angle + 0.5, 1.0)
+        best = coarse[np.argmax([self._score(ys, xs, angle) for angle in coarse])]
+        fine = np.arange(best - 1.0, best + 1.05, 0.1)
+        best = fine[np.argmax([self._score(ys, xs, angle) for angle in fine])]
+        return float(round(best, 2))
+
+    def _score(self, ys: "np.ndarray", xs: "np.ndarray", angle: float) -> float:
+        """Sharpness of the row profile after rotating the points by angle"""
+        import numpy as np
+
+        theta = np.deg2rad(angle)
+        rows = ys * np.cos(theta) + xs * np.sin(theta)
+        counts = np.bincount((rows - rows.min()).astype(np.int32))
+        return float(np.dot(counts, counts))
+
+    def deskew(self, gray: "np.ndarray") -> "np.ndarray":
+        import cv2
+
+        angle = self.estimate_angle(gray)
+        if abs(angle) <= self.min_angle:  # Only rotate if significant skew
+            return gray
+        (h, w) = gray.shape[:2]
+        M = cv2.getRotationMatrix2D((w // 2, h // 2), -angle, 1.0)
+        return cv2.warpAffine(gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
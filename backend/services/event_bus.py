@@ -0,0 +1,55 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+class EventBus:
+    """In-process pub/sub of job events, keyed by job ID.
+
+    Each subscriber gets a small bounded queue. Events are status snapshots,
+    so when a slow subscriber falls behind its oldest events are dropped and
+    it still receives the latest state.
+    """
+
+    def __init__(self, max_queue: Optional[int] = None):
+        self.max_queue = max(1, max_queue or int(os.getenv("EVENT_BUS_MAX_QUEUE", "16")))
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def publish(self, job_id: str, event: Dict[str, Any]):
+        """Deliver event to every subscriber of job_id; never blocks the publisher"""
+
+        self.published += 1
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+            self.delivered += 1
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Queue of events for job_id, for as long as the context is open"""
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs_watched": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
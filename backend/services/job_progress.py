@@ -0,0 +1,263 @@
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+from db.database import SessionLocal
+from db.models import Job
+from db.write_queue import WriteQueue
+from .event_bus import EventBus
+
+# Lesson pipeline stages in order, with the Job column counting images past each
+STAGE_COLUMNS = {
+    "ocr": "images_ocr_done",
+    "sympy": "images_validated",
+    "llm": "images_explained",
+}
+STAGES = list(STAGE_COLUMNS)
+
+class JobProgress:
+    """Per-image stage counts for one job, written to the jobs row in batches.
+
+    Stage handlers call advance() as each image clears a stage. Counts are
+    flushed at most every `flush_interval` seconds, plus immediately when the
+    job reaches a new status (all images past OCR, all explained), so a job
+    with many images does not commit once per image.
+    """
+
+    def __init__(self, job_id: str, total_images: int, lease_owner: Optional[str] = None,
+                 lease_token: Optional[str] = None, flush_interval: Optional[float] = None, event_bus: Optional[EventBus] = None,
+                 write_queue: Optional[WriteQueue] = None):
+        self.job_id = job_id
+        self.total_images = total_images
+        self.lease_owner = lease_owner
+        self.lease_token = lease_token
+        self.event_bus = event_bus
+        self.write_queue = write_queue
+        self.started_at = datetime.utcnow()
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("JOB_PROGRESS_FLUSH_INTERVAL", "1.0"))
+
+        self.counts = {stage: 0 for stage in STAGES}
+        self._status = "processing"
+        self._stage_done_at: Dict[str, datetime] = {}
+        self._last_flush = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._dirty = False
+        # Explanation steps per image as the LLM streams them; pushed to stream subscribers, never stored
+        self._partial_steps: Dict[int, Dict[str, Any]] = {}
+
+        self.flushes = 0
+
+    def advance(self, stage: str):
+        """One image cleared stage"""
+        self._count(STAGES.index(stage), STAGES.index(stage) + 1)
+
+    def finish_image(self, stage: str):
+        """One image stops at stage (no LaTeX, or an error): count it as past every remaining stage"""
+        self._count(STAGES.index(stage), len(STAGES))
+
+    def explanation_step(self, image_index: int, latex: str, validation: Dict[str, Any], step: Dict[str, Any]):
+        """One explanation step of image_index finished streaming"""
+
+        entry = self._partial_entry(image_index, latex, validation)
+        entry["explanation"]["steps"].append(step)
+        self._publish()
+
+    def explanation_done(self, image_index: int, latex: str, validation: Dict[str, Any],
+                         explanation: Dict[str, Any]):
+        """Full explanation of image_index (streamed, cached or mock); published with the next progress event"""
+
+        entry = self._partial_entry(image_index, latex, validation)
+        entry["explanation"] = explanation
+        entry["complete"] = True
+
+    def _partial_entry(self, image_index: int, latex: str, validation: Dict[str, Any]) -> Dict[str, Any]:
+        if image_index not in self._partial_steps:
+            self._partial_steps[image_index] = {
+                "step_id": f"step_{image_index + 1}",
+                "image_index": image_index,
+                "latex": latex,
+                "validation": validation,
+                "explanation": {"steps": []},
+                "complete": False
+            }
+        return self._partial_steps[image_index]
+
+    def _count(self, first: int, last: int):
+        for stage in STAGES[first:last]:
+            self.counts[stage] = min(self.total_images, self.counts[stage] + 1)
+            if self.counts[stage] == self.total_images:
+                self._stage_done_at.setdefault(stage, datetime.utcnow())
+        self._dirty = True
+        self._publish()
+
+        status = self._derive_status()
+        if status != self._status:
+            self._status = status
+            self._schedule_flush(force=True)
+        else:
+            self._schedule_flush()
+
+    def _derive_status(self) -> str:
+        if self.counts["llm"] >= self.total_images:
+            return "llm_done"
+        if self.counts["ocr"] >= self.total_images:
+            return "ocr_done"
+        return "processing"
+
+    def _current_stage(self) -> str:
+        for stage in STAGES:
+            if self.counts[stage] < self.total_images:
+                return stage
+        return "building"
+
+    def _schedule_flush(self, force: bool = False):
+        if self._flush_task is not None and not self._flush_task.done():
+            return  # the running flush picks up these counts when it re-checks _dirty
+        if not force and time.monotonic() - self._last_flush < self.flush_interval:
+            return
+        self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        while self._dirty:
+            self._dirty = False
+            self._last_flush = time.monotonic()
+            values = self._values()
+            try:
+                await self._store(values)
+            except Exception as e:
+                print(f"Progress update for job {self.job_id} failed: {e}")
+                return
+
+    def _publish(self, status: Optional[str] = None, current_stage: Optional[str] = None):
+        """Push the in-memory state to stream subscribers, ahead of the batched DB write"""
+
+        if self.event_bus is None:
+            return
+        snapshot = Job(
+            id=self.job_id,
+            status=status or self._derive_status(),
+            current_stage=current_stage or self._current_stage(),
+            total_images=self.total_images,
+            started_at=self.started_at,
+            progress_updated_at=datetime.utcnow(),
+            ocr_done_at=self._stage_done_at.get("ocr"),
+            llm_done_at=self._stage_done_at.get("llm"),
+            **{column: self.counts[stage] for stage, column in STAGE_COLUMNS.items()}
+        )
+        event = job_status(snapshot)
+        del event["created_at"]  # not tracked here; subscribers keep the value from the first snapshot
+        if self._partial_steps:
+            # Cumulative, like the rest of the snapshot, so a subscriber that drops events loses nothing
+            event["partial_steps"] = [self._partial_steps[index] for index in sorted(self._partial_steps)]
+        self.event_bus.publish(self.job_id, event)
+
+    def _values(self) -> Dict[Any, Any]:
+        values = {getattr(Job, column): self.counts[stage] for stage, column in STAGE_COLUMNS.items()}
+        values[Job.status] = self._status
+        values[Job.current_stage] = self._current_stage()
+        values[Job.progress_updated_at] = datetime.utcnow()
+        if "ocr" in self._stage_done_at:
+            values[Job.ocr_done_at] = self._stage_done_at["ocr"]
+        if "llm" in self._stage_done_at:
+            values[Job.llm_done_at] = self._stage_done_at["llm"]
+        return values
+
+    async def _store(self, values: Dict[Any, Any]):
+        """Write through the shared write queue when there is one, else in a worker thread"""
+
+        if self.write_queue is None:
+            await asyncio.to_thread(self._write, values)
+            return
+        conditions = {}
+        if self.lease_owner is not None:
+            conditions = {"lease_owner": self.lease_owner, "lease_token": self.lease_token}
+        await self.write_queue.update(Job, self.job_id, values, **conditions)
+        self.flushes += 1
+
+    def _write(self, values: Dict[Any, Any]):
+        db = SessionLocal()
+        try:
+            query = db.query(Job).filter(Job.id == self.job_id)
+            if self.lease_owner is not None:
+                query = query.filter(Job.lease_owner == self.lease_owner, Job.lease_token == self.lease_token)
+            query.update(values, synchronize_session=False)
+            db.commit()
+            self.flushes += 1
+        finally:
+            db.close()
+
+    async def lesson_built(self):
+        """Wait for pending writes and record that the lesson has been assembled"""
+
+        if self._flush_task is not None:
+            await self._flush_task
+        for stage in STAGES:
+            self.counts[stage] = self.total_images
+            self._stage_done_at.setdefault(stage, datetime.utcnow())
+        values = self._values()
+        values[Job.status] = "lesson_built"
+        values[Job.current_stage] = "saving"
+        await self._store(values)
+        self._publish(status="lesson_built", current_stage="saving")
+
+def job_status(job: Job) -> Dict[str, Any]:
+    """Status payload shared by GET /status and the status stream"""
+
+    response = {
+        "job_id": job.id,
+        "status": job.status,
+        "created_at": job.created_at,
+        "ocr_done": job.status in ["ocr_done", "llm_done", "lesson_built", "completed"],
+        "llm_done": job.status in ["llm_done", "lesson_built", "completed"],
+        "lesson_built": job.status in ["lesson_built", "completed"],
+        "lesson_id": job.lesson_id if job.lesson_id else None,
+        **progress_summary(job)
+    }
+    
+    if job.error_message:
+        response["error"] = job.error_message
+    
+    return response
+
+def progress_summary(job: Job) -> Dict[str, Any]:
+    """Percent complete and a linear ETA from the counts persisted on job"""
+
+    total = job.total_images or 0
+    done_units = sum(getattr(job, column) or 0 for column in STAGE_COLUMNS.values())
+    total_units = total * len(STAGES)
+
+    if job.status == "completed":
+        percent = 100.0
+    elif job.status == "lesson_built":
+        percent = 99.0
+    elif total_units:
+        # Hold back the last percent for assembling and saving the lesson
+        percent = round(99.0 * done_units / total_units, 1)
+    else:
+        percent = 0.0
+
+    eta_seconds = None
+    if job.started_at and job.status not in ("completed", "error") and 0 < percent < 100:
+        elapsed = ((job.progress_updated_at or datetime.utcnow()) - job.started_at).total_seconds()
+        remaining = elapsed * (100 - percent) / percent
+        # Time since the last write already counts against the remaining estimate
+        if job.progress_updated_at:
+            remaining -= (datetime.utcnow() - job.progress_updated_at).total_seconds()
+        eta_seconds = round(max(0.0, remaining), 1)
+
+    return {
+        "current_stage": job.current_stage,
+        "images_total": total,
+        "images_ocr_done": job.images_ocr_done or 0,
+        "images_validated": job.images_validated or 0,
+        "images_explained": job.images_explained or 0,
+        "percent_complete": percent,
+        "eta_seconds": eta_seconds,
+        "started_at": job.started_at,
+        "updated_at": job.progress_updated_at,
+        "ocr_done_at": job.ocr_done_at,
+        "llm_done_at": job.llm_done_at,
+        "completed_at": job.completed_at
+    }
@@ -0,0 +1,308 @@
+import os
+import json
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_, select
+from db.database import SessionLocal
+from db.models import Job, Lesson, Image
+from db.write_queue import WriteQueue
+from .job_progress import JobProgress, job_status
+from .event_bus import EventBus
+
+if TYPE_CHECKING:
+    from .lesson_builder import LessonBuilder  # pulls in the OCR/LLM/SymPy services
+
+# Statuses of a job that a worker currently holds a lease on
+ACTIVE_STATUSES = ["processing", "ocr_done", "llm_done", "lesson_built"]
+
+class JobLeaseLost(RuntimeError):
+    """Raised when the lease on a job expired and the job was claimed again"""
+
+class JobQueue:
+    """Durable job queue on the jobs table, claimed through short renewable leases"""
+
+    def __init__(self, worker_id: Optional[str] = None, lease_seconds: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds or float(os.getenv("JOB_LEASE_SECONDS", "60"))
+        self.max_attempts = max_attempts or int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+    def _claimable(self, now: datetime):
+        """Queued jobs, plus jobs whose worker stopped renewing its lease"""
+        return and_(
+            or_(
+                Job.status == "queued",
+                and_(Job.status.in_(ACTIVE_STATUSES), Job.lease_expires_at < now)
+            ),
+            Job.attempts < self.max_attempts
+        )
+
+    def expired_candidates(self, now: datetime, limit: int = 5):
+        """Jobs whose worker died, longest expired first (index on status, lease_expires_at)"""
+        return (
+            select(Job.id)
+            .where(Job.status.in_(ACTIVE_STATUSES), Job.lease_expires_at < now, Job.attempts < self.max_attempts)
+            .order_by(Job.lease_expires_at.asc())
+            .limit(limit)
+        )
+
+    def queued_candidates(self, limit: int = 5):
+        """Oldest queued jobs (index on status, created_at: no sort, stops after limit rows)"""
+        return (
+            select(Job.id)
+            .where(Job.status == "queued", Job.attempts < self.max_attempts)
+            .order_by(Job.created_at.asc())
+            .limit(limit)
+        )
+
+    def held(self, job_id: str, lease_token: str):
+        """Matches the job only while the lease from that claim is still ours"""
+        return and_(Job.id == job_id, Job.lease_owner == self.worker_id, Job.lease_token == lease_token)
+
+    def claim(self) -> Optional[Tuple[str, List[str], str]]:
+        """Lease a claimable job, retries of dead workers' jobs first; returns (job_id, file_paths, lease_token) or None"""
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            # Two index-friendly queries instead of one OR that needs a sort.
+            # SKIP LOCKED keeps workers off each other's rows on PostgreSQL/MySQL;
+            # SQLite ignores it and the conditional UPDATE below settles races
+            candidates = []
+            for query in (self.expired_candidates(now), self.queued_candidates()):
+                candidates += db.scalars(query.with_for_update(skip_locked=True)).all()
+
+            for job_id in candidates:
+                lease_token = uuid.uuid4().hex
+                claimed = db.query(Job).filter(Job.id == job_id, self._claimable(now)).update({
+                    Job.status: "processing",
+                    Job.lease_owner: self.worker_id,
+                    Job.lease_token: lease_token,
+                    Job.lease_expires_at: now + timedelta(seconds=self.lease_seconds),
+                    Job.heartbeat_at: now,
+                    Job.attempts: Job.attempts + 1,
+                    # A retried job reports progress from scratch
+                    Job.started_at: now,
+                    Job.progress_updated_at: now,
+                    Job.current_stage: "ocr",
+                    Job.images_ocr_done: 0,
+                    Job.images_validated: 0,
+                    Job.images_explained: 0,
+                    Job.ocr_done_at: None,
+                    Job.llm_done_at: None
+                }, synchronize_session=False)
+                db.commit()
+
+                if claimed == 1:
+                    job = db.query(Job).filter(Job.id == job_id).first()
+                    return job.id, list(job.file_paths or []), lease_token
+
+            return None
+        finally:
+            db.close()
+
+    def heartbeat(self, job_id: str, lease_token: str) -> bool:
+        """Extend our lease; False if the job is no longer ours"""
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            renewed = db.query(Job).filter(self.held(job_id, lease_token)).update({
+                Job.lease_expires_at: now + timedelta(seconds=self.lease_seconds),
+                Job.heartbeat_at: now
+            }, synchronize_session=False)
+            db.commit()
+            return renewed == 1
+        finally:
+            db.close()
+
+    def reap(self) -> int:
+        """Fail jobs whose lease expired after their last allowed attempt"""
+
+        db = SessionLocal()
+        try:
+            failed = db.query(Job).filter(
+                Job.status.in_(ACTIVE_STATUSES),
+                Job.lease_expires_at < datetime.utcnow(),
+                Job.attempts >= self.max_attempts
+            ).update({
+                Job.status: "error",
+                Job.error_message: f"Gave up after {self.max_attempts} attempts",
+                Job.lease_owner: None,
+                Job.lease_token: None,
+                Job.lease_expires_at: None
+            }, synchronize_session=False)
+            db.commit()
+            return failed
+        finally:
+            db.close()
+
+    def complete(self, job_id: str, lease_token: str, lesson_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the lesson and complete the job in one transaction; returns the job's status.
+
+        Raises JobLeaseLost, storing nothing, if the lease from that claim
+        expired and the job was claimed again: the other worker's outcome wins.
+        """
+
+        db = SessionLocal()
+        try:
+            lesson = Lesson(
+                id=str(uuid.uuid4()),
+                job_id=job_id,
+                title=lesson_data["title"],
+                steps=lesson_data["steps"]
+            )
+            db.add(lesson)
+
+            # Record each image's OCR result
+            ocr_results = {step["original_image"]: step["ocr_result"] for step in lesson_data["steps"]}
+            processed_at = datetime.utcnow()
+            for image in db.query(Image).filter(Image.job_id == job_id).all():
+                if image.file_path in ocr_results:
+                    image.ocr_result = json.dumps(ocr_results[image.file_path])
+                    image.processed_at = processed_at
+
+            # Update job with lesson ID and release the lease, in the same transaction
+            completed_at = datetime.utcnow()
+            completed = db.query(Job).filter(self.held(job_id, lease_token)).update({
+                Job.lesson_id: lesson.id,
+                Job.status: "completed",
+                Job.current_stage: None,
+                Job.completed_at: completed_at,
+                Job.progress_updated_at: completed_at,
+                Job.lease_owner: None,
+                Job.lease_token: None,
+                Job.lease_expires_at: None
+            }, synchronize_session=False)
+            if completed != 1:
+                db.rollback()
+                raise JobLeaseLost(f"Lost lease on job {job_id} before completing it")
+            db.commit()
+            return job_status(db.query(Job).filter(Job.id == job_id).first())
+        finally:
+            db.close()
+
+    def fail(self, job_id: str, lease_token: str, error: str) -> Optional[Dict[str, Any]]:
+        """Record the job's error and release the lease; returns its status, or None if the lease was lost"""
+
+        db = SessionLocal()
+        try:
+            failed = db.query(Job).filter(self.held(job_id, lease_token)).update({
+                Job.status: "error",
+                Job.error_message: error,
+                Job.lease_owner: None,
+                Job.lease_token: None,
+                Job.lease_expires_at: None
+            }, synchronize_session=False)
+            db.commit()
+            if failed != 1:
+                return None
+            return job_status(db.query(Job).filter(Job.id == job_id).first())
+        finally:
+            db.close()
+
+class JobWorker:
+    """Claims jobs from the queue and builds their lessons"""
+
+    def __init__(self, lesson_builder: "LessonBuilder", queue: Optional[JobQueue] = None,
+                 concurrency: Optional[int] = None, poll_interval: Optional[float] = None,
+                 event_bus: Optional[EventBus] = None, write_queue: Optional[WriteQueue] = None):
+        self.lesson_builder = lesson_builder
+        self.queue = queue or JobQueue()
+        # Progress events for status streams served by this process
+        self.event_bus = event_bus
+        # Batched progress writes shared with the rest of the process
+        self.write_queue = write_queue
+        self.concurrency = max(1, concurrency or int(os.getenv("WORKER_CONCURRENCY", "2")))
+        self.poll_interval = poll_interval or float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+        self._stopping = asyncio.Event()
+        self._running: set = set()
+
+    async def run(self):
+        """Claim and process jobs until stop() is called"""
+
+        slots = asyncio.Semaphore(self.concurrency)
+        while not self._stopping.is_set():
+            await slots.acquire()
+            try:
+                claimed = await asyncio.to_thread(self.queue.claim)
+            except Exception as e:
+                print(f"Job claim failed: {e}")
+                claimed = None
+
+            if claimed is None:
+                slots.release()
+                await asyncio.to_thread(self.queue.reap)
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._run_job(*claimed))
+            self._running.add(task)
+            task.add_done_callback(lambda done: (self._running.discard(done), slots.release()))
+
+        # Let jobs in progress finish; unfinished leases expire and are re-claimed elsewhere
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stop(self):
+        self._stopping.set()
+
+    async def _run_job(self, job_id: str, file_paths: List[str], lease_token: str):
+        """Process one job while a heartbeat keeps its lease alive"""
+
+        processing = asyncio.create_task(self.process_images(job_id, file_paths, lease_token))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, lease_token, processing))
+        try:
+            await processing
+        except asyncio.CancelledError:
+            print(f"Lost lease on job {job_id}, abandoning it")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, lease_token: str, processing: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                still_ours = await asyncio.to_thread(self.queue.heartbeat, job_id, lease_token)
+            except Exception as e:
+                print(f"Heartbeat for job {job_id} failed: {e}")
+                continue
+            if not still_ours:
+                processing.cancel()
+                return
+
+    def _publish(self, job_id: str, status: Dict[str, Any]):
+        if self.event_bus is not None:
+            self.event_bus.publish(job_id, status)
+
+    async def process_images(self, job_id: str, file_paths: List[str], lease_token: str):
+        """Build the lesson for a claimed job and record the outcome"""
+
+        # Outcomes are written on a thread, like claims and heartbeats: a write
+        # can wait for the database lock, and this loop may be serving the API
+        try:
+            # Build lesson from images
+            progress = JobProgress(job_id, len(file_paths), lease_owner=self.queue.worker_id, lease_token=lease_token,
+                                   event_bus=self.event_bus, write_queue=self.write_queue)
+            lesson_data = await self.lesson_builder.build_lesson(job_id, file_paths, progress)
+            await progress.lesson_built()
+
+            status = await asyncio.to_thread(self.queue.complete, job_id, lease_token, lesson_data)
+            self._publish(job_id, status)
+
+        except JobLeaseLost as e:
+            print(str(e))
+
+        except Exception as e:
+            # Update job with error
+            status = await asyncio.to_thread(self.queue.fail, job_id, lease_token, str(e))
+            if status is not None:
+                self._publish(job_id, status)
+            else:
+                print(f"Job {job_id} failed after its lease was lost, leaving it alone: {e}")
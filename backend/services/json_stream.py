@@ -0,0 +1,101 @@
+import json
+from typing import Any, Dict, List, Optional
+
+class JSONArrayStreamParser:
+    """Yields the objects of one top-level array (e.g. "steps") while a JSON document streams in.
+
+    feed() scans only the new characters, tracking string/escape state and
+    nesting depth, so each chunk costs O(len(chunk)) however long the
+    document gets. An element is decoded with json.loads as soon as its
+    closing brace arrives. Text before the root object (a ```json fence)
+    is skipped. Scalar keys of the root object that precede the array,
+    like "problem_type", are available from `fields` once complete.
+    """
+
+    def __init__(self, key: str = "steps"):
+        self.key = key
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add streamed text; returns the array elements completed by it"""
+
+        self.text += chunk
+        text = self.text
+        items = []
+
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start:pos + 1]
+                        if self._value_start is not None:
+                            self._store_field(text[self._value_start:pos + 1])
+            elif char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                if self._depth == 1 and char == "[" and self._current_key == self.key:
+                    self._in_array = True
+                elif self._in_array and self._depth == 2 and char == "{":
+                    self._item_start = pos
+                self._value_start = None
+                self._started = True
+                self._depth += 1
+            elif char in "}]":
+                self._depth = max(0, self._depth - 1)
+                if self._in_array and self._depth == 2 and self._item_start is not None:
+                    try:
+                        items.append(json.loads(text[self._item_start:pos + 1]))
+                    except ValueError:
+                        pass  # malformed element; the final parse of the whole document decides
+                    self._item_start = None
+                elif self._in_array and self._depth == 1:
+                    self._in_array = False
+            elif self._depth == 1:
+                if char == ":" and self._last_string is not None:
+                    self._current_key = self._decode(self._last_string)
+                    self._last_string = None
+                    self._value_start = pos + 1
+                elif char == ",":
+                    if self._value_start is not None:
+                        self._store_field(text[self._value_start:pos])
+                    self._current_key = None
+
+        self._pos = len(text)
+        return items
+
+    @property
+    def finished(self) -> bool:
+        """The root object has closed; False for a truncated document"""
+        return self._started and self._depth == 0
+
+    def _store_field(self, raw: str):
+        value = self._decode(raw.strip())
+        if self._current_key is not None and value is not None:
+            self.fields[self._current_key] = value
+        self._value_start = None
+
+    def _decode(self, raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
@@ -1,80 +1,105 @@
 import os
-import torch
-import numpy as np
-from PIL import Image
-import cv2
-from typing import Dict, Any, Optional
+import re
+import time
+import asyncio
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 import subprocess
 import tempfile
+from .ocr_pool import OCRWorkerPool, OCRPoolBusy
+from .preprocessing import PreprocessingPipeline
+
+if TYPE_CHECKING:
+    import numpy as np  # OpenCV, NumPy and PIL are imported where used; they are slow to import
+
+# Tesseract config tuned for math symbols
+TESSERACT_MATH_CONFIG = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+-=(){}[]^_/\|<>≤≥≠±∞∫∑√πθλμσαβγδ'
 
 class LaTeXOCR:
     def __init__(self):
         """Initialize LaTeX OCR service with automatic model detection"""
         
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = None
         self.processor = None
         self.ocr_method = self._detect_best_ocr_method()
         
-        # Initialize the selected OCR method
-        self._initialize_ocr_model()
+        # The model itself loads lazily (or in warm_up), once, on an OCR worker thread
+        self.model_loaded = False
+        self.load_state = "pending"  # pending -> loading -> ready | failed
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._load_lock = threading.Lock()
         
         # Add confidence threshold for filtering bad results
         self.min_confidence_threshold = 0.3
         
-    def _detect_best_ocr_method(self) -> str:
-        """Detect the best available OCR method"""
+        # Single in-memory preprocessing pass, profiled per OCR backend
+        self.preprocessing = PreprocessingPipeline()
         
-        # Try to import pix2tex (LaTeX-OCR)
-        try:
-            from pix2tex.cli import LatexOCR
-            print("Using pix2tex LaTeX-OCR (best for math)")
-            return "pix2tex"
-        except ImportError:
-            pass
+        # Threads used to preprocess images of a batch in parallel
+        self.preprocess_workers = int(os.getenv("OCR_PREPROCESS_WORKERS", "4"))
         
-        # Try to use EasyOCR with math preprocessing
-        try:
-            import easyocr
-            print("Using EasyOCR with math preprocessing")
-            return "easyocr"
-        except ImportError:
-            pass
+        # Dedicated pool so OCR never competes for the default executor
+        self.pool = OCRWorkerPool()
         
-        # Try to use PaddleOCR
-        try:
-            from paddleocr import PaddleOCR
-            print("Using PaddleOCR")
-            return "paddleocr"
-        except ImportError:
-            pass
+        # Concurrent extract_latex calls arriving within the linger window share one
+        # batched model call, for backends with real batched inference (EasyOCR)
+        self.batch_max_size = max(1, int(os.getenv("OCR_BATCH_MAX_SIZE", "8")))
+        self.batch_linger = float(os.getenv("OCR_BATCH_LINGER_MS", "10")) / 1000
+        self._pending: List[tuple] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: set = set()
+        self.batches = 0
+        self.batched_images = 0
         
-        # Fallback to Tesseract
-        try:
-            import pytesseract
-            print("Using Tesseract OCR with math config")
-            return "tesseract"
-        except ImportError:
-            pass
+    def _detect_best_ocr_method(self) -> str:
+        """Pick the best installed OCR backend without importing it (imports happen in _load_model)"""
+        
+        candidates = [
+            ("pix2tex", "pix2tex", "Using pix2tex LaTeX-OCR (best for math)"),
+            ("easyocr", "easyocr", "Using EasyOCR with math preprocessing"),
+            ("paddleocr", "paddleocr", "Using PaddleOCR"),
+            ("pytesseract", "tesseract", "Using Tesseract OCR with math config")
+        ]
+        for module, method, message in candidates:
+            if importlib.util.find_spec(module) is not None:
+                print(message)
+                return method
         
         print("No OCR libraries found, using fallback")
         return "fallback"
         
     def _load_model(self):
-        """Load the appropriate OCR model"""
-        if self.model_loaded:
+        """Load the selected OCR model once; safe to call from several threads"""
+        if self.load_state in ("ready", "failed"):
             return
-            
+        
+        with self._load_lock:
+            if self.load_state in ("ready", "failed"):
+                return
+            self.load_state = "loading"
+            start = time.perf_counter()
+            self._load_model_locked()
+            self.load_seconds = round(time.perf_counter() - start, 3)
+    
+    def _load_model_locked(self):
+        # Preprocessing needs OpenCV; load it with the model, off the event loop
+        importlib.import_module("cv2")
         try:
+            # torch and the OCR libraries are imported here, not at module import
             if self.ocr_method == "pix2tex":
                 from pix2tex.cli import LatexOCR
                 self.model = LatexOCR()
                 
             elif self.ocr_method == "easyocr":
+                import torch
                 import easyocr
                 self.model = easyocr.Reader(['en'], gpu=torch.cuda.is_available())
                 
             elif self.ocr_method == "paddleocr":
+                import torch
                 from paddleocr import PaddleOCR
                 self.model = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=torch.cuda.is_available())
                 
@@ -84,110 +109,287 @@ class LaTeXOCR:
                 pytesseract.get_tesseract_version()
                 
             self.model_loaded = True
+            self.load_state = "ready"
             print(f"OCR model ({self.ocr_method}) loaded successfully")
             
         except Exception as e:
             print(f"Failed to load OCR model ({self.ocr_method}): {e}")
+            self.load_error = f"{self.ocr_method}: {e}"
             self.ocr_method = "fallback"
             self.model_loaded = False
+            self.load_state = "failed"
     
-    async def extract_latex(self, image_path: str) -> Dict[str, Any]:
-        """Extract LaTeX from image using local OCR model"""
+    def status(self) -> Dict[str, Any]:
+        """Model lifecycle for /ready"""
+        return {
+            "method": self.ocr_method,
+            "state": self.load_state,
+            "load_seconds": self.load_seconds,
+            "error": self.load_error
+        }
+    
+    async def extract_latex(self, image_path: str, image: Optional["np.ndarray"] = None) -> Dict[str, Any]:
+        """Extract LaTeX from image using local OCR model; `image` is the already preprocessed array, if any"""
         
-        # Load model if not already loaded
-        self._load_model()
+        if image is not None and self.ocr_method == "easyocr" and self.batch_max_size > 1:
+            return await self._extract_batched(image_path, image)
         
-        if not self.model_loaded:
+        try:
+            # Run the heavy computation (and a first model load) on the dedicated OCR pool
+            return await self.pool.run(self._process_image_sync, image_path, image)
+            
+        except OCRPoolBusy:
+            raise
+        except Exception as e:
+            print(f"LaTeX OCR extraction failed: {e}")
             return self._fallback_ocr(image_path)
+    
+    async def extract_latex_batch(self, image_paths: List[str],
+                                  images: Optional[List["np.ndarray"]] = None) -> List[Dict[str, Any]]:
+        """Extract LaTeX from several images in one pool task; only EasyOCR batches
+        the model call, pix2tex, Tesseract and PaddleOCR still go one image at a time"""
+        
+        if not image_paths:
+            return []
         
         try:
-            import asyncio
+            return await self.pool.run(self._process_batch_sync, image_paths, images)
             
-            # Run the heavy computation in a thread pool
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, self._process_image_sync, image_path)
-            return result
+        except OCRPoolBusy:
+            raise
+        except Exception as e:
+            print(f"Batched LaTeX OCR extraction failed: {e}")
+            return [self._fallback_ocr(path) for path in image_paths]
+    
+    async def _extract_batched(self, image_path: str, image: "np.ndarray") -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((image_path, image, future))
+        
+        if len(self._pending) >= self.batch_max_size:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = loop.call_later(self.batch_linger, self._flush_batch)
+        return await future
+    
+    def _flush_batch(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.batched_images += len(batch)
+        task = asyncio.create_task(self._run_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _run_batch(self, batch: List[tuple]):
+        try:
+            results = await self.extract_latex_batch([path for path, _, _ in batch], [image for _, image, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    def batch_stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "images": self.batched_images,
+            "avg_batch_size": round(self.batched_images / self.batches, 2) if self.batches else 0.0,
+            "max_size": self.batch_max_size,
+            "linger_ms": self.batch_linger * 1000
+        }
+    
+    async def warm_up(self):
+        """Load the model and start OCR worker threads ahead of the first request"""
+        await self.pool.warm_up(self._load_model)
+    
+    async def shutdown(self):
+        """Stop the OCR worker pool"""
+        await self.pool.shutdown()
+    
+    def _process_batch_sync(self, image_paths: List[str],
+                            images: Optional[List["np.ndarray"]] = None) -> List[Dict[str, Any]]:
+        """Synchronous batch processing for thread pool execution"""
+        
+        self._load_model()
+        
+        # PaddleOCR has no batched entry point
+        if self.ocr_method not in ("pix2tex", "easyocr", "tesseract"):
+            return [self._process_image_sync(path, images[i] if images else None) for i, path in enumerate(image_paths)]
+        
+        # Preprocess in parallel unless the caller already did; OpenCV releases the GIL
+        if images is None:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.preprocess_workers, len(image_paths)))) as pool:
+                images = list(pool.map(self._try_preprocess_for_math, image_paths))
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+        ready = []
+        for i, image in enumerate(images):
+            if image is None:
+                results[i] = self._fallback_ocr(image_paths[i])
+            else:
+                ready.append(i)
+        
+        if self.ocr_method == "easyocr" and ready:
+            batch_results = self._batch_with_easyocr([images[i] for i in ready])
+            for i, result in zip(ready, batch_results):
+                results[i] = result
+        else:
+            # pix2tex and Tesseract take one image per call; reuse the preprocessed images
+            for i in ready:
+                results[i] = self._recognize_preprocessed(image_paths[i], images[i])
+        
+        return results
+    
+    def _try_preprocess_for_math(self, image_path: str) -> Optional["np.ndarray"]:
+        """Preprocess one image of a batch, returning None on failure"""
+        try:
+            return self._preprocess_image_for_math(image_path)
+        except Exception as e:
+            print(f"Preprocessing failed for {image_path}: {e}")
+            return None
+    
+    def _recognize_preprocessed(self, image_path: str, image: "np.ndarray") -> Dict[str, Any]:
+        """Run a single-image backend on an already preprocessed image"""
+        
+        try:
+            if self.ocr_method == "pix2tex":
+                import torch
+                from PIL import Image
+                with torch.inference_mode():
+                    return self._build_pix2tex_result(self.model(Image.fromarray(image)))
             
+            import pytesseract
+            text = pytesseract.image_to_string(image, config=TESSERACT_MATH_CONFIG)
+            return self._build_text_result(text, 0.70, "tesseract_math")
         except Exception as e:
-            print(f"LaTeX OCR extraction failed: {e}")
+            print(f"{self.ocr_method} processing failed: {e}")
             return self._fallback_ocr(image_path)
     
-    def _process_image_sync(self, image_path: str) -> Dict[str, Any]:
+    def _batch_with_easyocr(self, arrays: List["np.ndarray"]) -> List[Dict[str, Any]]:
+        """Run EasyOCR recognition over a whole batch in one call"""
+        import cv2
+        
+        # readtext_batched needs equally sized inputs; pad with white background
+        max_height = max(array.shape[0] for array in arrays)
+        max_width = max(array.shape[1] for array in arrays)
+        padded = [
+            cv2.copyMakeBorder(array, 0, max_height - array.shape[0], 0, max_width - array.shape[1],
+                               cv2.BORDER_CONSTANT, value=255)
+            for array in arrays
+        ]
+        
+        batch_results = self.model.readtext_batched(padded, batch_size=len(padded))
+        
+        return [
+            self._build_text_result(
+                " ".join(result[1] for result in results if result[2] > 0.5),
+                0.80,
+                "easyocr_math"
+            )
+            for results in batch_results
+        ]
+    
+    def _build_pix2tex_result(self, latex_result: str) -> Dict[str, Any]:
+        """Build the result dict for pix2tex output"""
+        
+        # Check if result is garbled and filter it
+        if self._is_garbled_output(latex_result):
+            print(f"Detected garbled output from pix2tex, simplifying...")
+            latex_result = self._simplify_garbled_expression(latex_result)
+            confidence = 0.4  # Lower confidence for simplified results
+        else:
+            confidence = 0.90
+        
+        return {
+            "latex": latex_result,
+            "confidence": confidence,
+            "text": self._latex_to_readable(latex_result),
+            "source": "pix2tex_latex_ocr"
+        }
+    
+    def _build_text_result(self, text: str, confidence: float, source: str) -> Dict[str, Any]:
+        """Build the result dict for plain-text OCR backends"""
+        
+        latex_text = self._postprocess_latex(text)
+        
+        return {
+            "latex": latex_text,
+            "confidence": confidence,
+            "text": self._latex_to_readable(latex_text),
+            "source": source
+        }
+    
+    def _process_image_sync(self, image_path: str, image: Optional["np.ndarray"] = None) -> Dict[str, Any]:
         """Synchronous image processing for thread pool execution"""
         
+        self._load_model()
+        
         if self.ocr_method == "pix2tex":
-            return self._process_with_pix2tex(image_path)
+            return self._process_with_pix2tex(image_path, image)
         elif self.ocr_method == "easyocr":
-            return self._process_with_easyocr(image_path)
+            return self._process_with_easyocr(image_path, image)
         elif self.ocr_method == "paddleocr":
-            return self._process_with_paddleocr(image_path)
+            return self._process_with_paddleocr(image_path, image)
         elif self.ocr_method == "tesseract":
-            return self._process_with_tesseract(image_path)
+            return self._process_with_tesseract(image_path, image)
         else:
             return self._fallback_ocr(image_path)
     
-    def _process_with_pix2tex(self, image_path: str) -> Dict[str, Any]:
+    def _process_with_pix2tex(self, image_path: str, image: Optional["np.ndarray"] = None) -> Dict[str, Any]:
         """Process image with pix2tex LaTeX-OCR"""
         try:
-            # Load and preprocess image
-            image = self._preprocess_image_for_math(image_path)
+            # Load and preprocess image unless the caller already did
+            if image is None:
+                image = self._preprocess_image_for_math(image_path)
             
             # Use pix2tex for LaTeX extraction
-            latex_result = self.model(image)
-            
-            # Check if result is garbled and filter it
-            if self._is_garbled_output(latex_result):
-                print(f"Detected garbled output from pix2tex, simplifying...")
-                latex_result = self._simplify_garbled_expression(latex_result)
-                confidence = 0.4  # Lower confidence for simplified results
-            else:
-                confidence = 0.90
+            import torch
+            from PIL import Image
+            with torch.inference_mode():
+                latex_result = self.model(Image.fromarray(image))
             
-            return {
-                "latex": latex_result,
-                "confidence": confidence,
-                "text": self._latex_to_readable(latex_result),
-                "source": "pix2tex_latex_ocr"
-            }
+            return self._build_pix2tex_result(latex_result)
         except Exception as e:
             print(f"Pix2tex processing failed: {e}")
             return self._fallback_ocr(image_path)
     
-    def _process_with_easyocr(self, image_path: str) -> Dict[str, Any]:
+    def _process_with_easyocr(self, image_path: str, image: Optional["np.ndarray"] = None) -> Dict[str, Any]:
         """Process image with EasyOCR and math post-processing"""
         try:
             # Preprocess for better math recognition
-            processed_image = self._preprocess_image_for_math(image_path)
-            
-            # Convert PIL to numpy for EasyOCR
-            if isinstance(processed_image, Image.Image):
-                processed_image = np.array(processed_image)
+            if image is None:
+                image = self._preprocess_image_for_math(image_path)
             
             # Extract text with EasyOCR
-            results = self.model.readtext(processed_image)
+            results = self.model.readtext(image)
             
             # Combine all detected text
             text_parts = [result[1] for result in results if result[2] > 0.5]  # confidence > 0.5
             combined_text = " ".join(text_parts)
             
             # Post-process for LaTeX
-            latex_text = self._postprocess_latex(combined_text)
-            
-            return {
-                "latex": latex_text,
-                "confidence": 0.80,
-                "text": self._latex_to_readable(latex_text),
-                "source": "easyocr_math"
-            }
+            return self._build_text_result(combined_text, 0.80, "easyocr_math")
         except Exception as e:
             print(f"EasyOCR processing failed: {e}")
             return self._fallback_ocr(image_path)
     
-    def _process_with_paddleocr(self, image_path: str) -> Dict[str, Any]:
+    def _process_with_paddleocr(self, image_path: str, image: Optional["np.ndarray"] = None) -> Dict[str, Any]:
         """Process image with PaddleOCR"""
         try:
+            if image is None:
+                image = self._preprocess_image_for_math(image_path)
+            
             # Use PaddleOCR
-            result = self.model.ocr(image_path, cls=True)
+            result = self.model.ocr(image, cls=True)
             
             # Extract text from results
             text_parts = []
@@ -198,124 +400,30 @@ class LaTeXOCR:
                             text_parts.append(word_info[1][0])
             
             combined_text = " ".join(text_parts)
-            latex_text = self._postprocess_latex(combined_text)
-            
-            return {
-                "latex": latex_text,
-                "confidence": 0.75,
-                "text": self._latex_to_readable(latex_text),
-                "source": "paddleocr_math"
-            }
+            return self._build_text_result(combined_text, 0.75, "paddleocr_math")
         except Exception as e:
             print(f"PaddleOCR processing failed: {e}")
             return self._fallback_ocr(image_path)
     
-    def _process_with_tesseract(self, image_path: str) -> Dict[str, Any]:
+    def _process_with_tesseract(self, image_path: str, image: Optional["np.ndarray"] = None) -> Dict[str, Any]:
         """Process image with Tesseract OCR optimized for math"""
         try:
             import pytesseract
             
             # Preprocess image for better OCR
-            processed_image = self._preprocess_image_for_math(image_path)
-            
-            # Convert PIL to numpy if needed
-            if isinstance(processed_image, Image.Image):
-                processed_image = np.array(processed_image)
+            if image is None:
+                image = self._preprocess_image_for_math(image_path)
             
             # Use Tesseract with math-optimized config
-            custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+-=(){}[]^_/\|<>≤≥≠±∞∫∑√πθλμσαβγδ'
-            
-            text = pytesseract.image_to_string(processed_image, config=custom_config)
-            latex_text = self._postprocess_latex(text)
-            
-            return {
-                "latex": latex_text,
-                "confidence": 0.70,
-                "text": self._latex_to_readable(latex_text),
-                "source": "tesseract_math"
-            }
+            text = pytesseract.image_to_string(image, config=TESSERACT_MATH_CONFIG)
+            return self._build_text_result(text, 0.70, "tesseract_math")
         except Exception as e:
             print(f"Tesseract processing failed: {e}")
             return self._fallback_ocr(image_path)
     
-    def _preprocess_image(self, image_path: str) -> Image.Image:
-        """Preprocess image for better OCR results"""
-        
-        # Read image with OpenCV
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Could not read image: {image_path}")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Enhance contrast
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(enhanced)
-        
-        # Threshold to get clean binary image
-        _, binary = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # Convert back to PIL Image
-        return Image.fromarray(binary)
-    
-    def _preprocess_image_for_math(self, image_path: str) -> Image.Image:
-        """Enhanced preprocessing specifically for mathematical expressions"""
-        
-        # Read image with OpenCV
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Could not read image: {image_path}")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Resize if too small (math OCR works better with larger images)
-        height, width = gray.shape
-        if height < 64 or width < 64:
-            scale_factor = max(64/height, 64/width, 2.0)
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            gray = cv2.resize(gray, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-        
-        # Deskew the image
-        coords = np.column_stack(np.where(gray > 0))
-        if len(coords) > 0:
-            angle = cv2.minAreaRect(coords)[-1]
-            if angle < -45:
-                angle = -(90 + angle)
-            else:
-                angle = -angle
-            
-            if abs(angle) > 0.5:
-                (h, w) = gray.shape[:2]
-                center = (w // 2, h // 2)
-                M = cv2.getRotationMatrix2D(center, angle, 1.0)
-                gray = cv2.warpAffine(gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-        
-        # Enhance contrast specifically for math symbols
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        
-        # Denoise while preserving edges (important for math symbols)
-        denoised = cv2.bilateralFilter(enhanced, 9, 75, 75)
-        
-        # Morphological operations to clean up math symbols
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-        cleaned = cv2.morphologyEx(denoised, cv2.MORPH_CLOSE, kernel)
-        
-        # Adaptive threshold for better symbol recognition
-        binary = cv2.adaptiveThreshold(cleaned, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        
-        # Invert if background is dark
-        if np.mean(binary) < 127:
-            binary = cv2.bitwise_not(binary)
-        
-        # Convert back to PIL Image
-        return Image.fromarray(binary)
+    def _preprocess_image_for_math(self, image_path: str) -> "np.ndarray":
+        """Load and preprocess an image with this backend's preprocessing profile"""
+        return self.preprocessing.run(image_path, self.ocr_method)
     
     def _postprocess_latex(self, text: str) -> str:
         """Post-process OCR output to improve LaTeX formatting"""
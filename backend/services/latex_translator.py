@@ -0,0 +1,172 @@
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import sympy as sp  # imported where used; SymPy is slow to import
+
+# Greek letters and function names share one alternation, longest names first
+GREEK_LETTERS = {
+    'varepsilon': 'epsilon', 'epsilon': 'epsilon', 'lambda': 'lambda', 'alpha': 'alpha',
+    'gamma': 'gamma', 'delta': 'delta', 'theta': 'theta', 'sigma': 'sigma',
+    'beta': 'beta', 'pi': 'pi', 'mu': 'mu', 'nu': 'nu'
+}
+FUNCTION_NAMES = {'sin': 'sin', 'cos': 'cos', 'tan': 'tan', 'log': 'log', 'ln': 'ln'}
+
+def _alternation(names) -> str:
+    return '|'.join(sorted(names, key=len, reverse=True))
+
+GREEK_PATTERN = re.compile(r'\\(' + _alternation(GREEK_LETTERS) + ')')
+GREEK_AND_FUNCTION_PATTERN = re.compile(r'\\(' + _alternation({**GREEK_LETTERS, **FUNCTION_NAMES}) + ')')
+NAME_REPLACEMENTS = {**GREEK_LETTERS, **FUNCTION_NAMES}
+
+OVERLINE_PATTERN = re.compile(r'\\overline\{([^}]+)\}')
+CAL_PATTERN = re.compile(r'\\cal\{([^}]+)\}')
+LANGLE_PATTERN = re.compile(r'\\langle([^\\]+)\\rangle')
+FRAC_PATTERN = re.compile(r'\\frac\{([^}]+)\}\{([^}]+)\}')
+GROUP_POWER_PATTERN = re.compile(r'\^\{([^}]+)\}')
+POWER_PATTERN = re.compile(r'\^([a-zA-Z0-9])')
+SQRT_PATTERN = re.compile(r'\\sqrt\{([^}]+)\}')
+GROUP_SUBSCRIPT_PATTERN = re.compile(r'_\{([^}]+)\}')
+NAMED_SUBSCRIPT_PATTERN = re.compile(r'([a-zA-Z]+)_\{([^}]+)\}')
+INTEGRAL_PATTERN = re.compile(r'\\int(_\{[^}]+\})?\^?\{?[^}]*\}?')
+DIFFERENTIAL_PATTERN = re.compile(r'\\,?\s*dx?')
+SUM_PATTERN = re.compile(r'\\sum(_\{[^}]+\})?\^?\{?[^}]*\}?')
+COMMAND_PATTERN = re.compile(r'\\[a-zA-Z]+')
+DISALLOWED_CHARS_PATTERN = re.compile(r'[^\w\d\+\-\*\/\(\)\.\=\,\_]')
+BRACE_TRANSLATION = str.maketrans('{}', '()')
+
+ARRAY_PATTERN = re.compile(r'\\begin\{array\}.*?\\end\{array\}', re.DOTALL)
+ARRAY_BEGIN_PATTERN = re.compile(r'\\begin\{array\}\{[^}]*\}')
+ARRAY_END_PATTERN = re.compile(r'\\end\{array\}')
+REPEATED_OPEN_BRACES_PATTERN = re.compile(r'\{+')
+REPEATED_CLOSE_BRACES_PATTERN = re.compile(r'\}+')
+
+def _replace_name(match: re.Match) -> str:
+    return NAME_REPLACEMENTS[match.group(1)]
+
+def _strip_decorations(expr: str) -> str:
+    """Drop overlines and calligraphic fonts, turn inner products into parentheses"""
+
+    expr = OVERLINE_PATTERN.sub(r'\1', expr)
+    expr = CAL_PATTERN.sub(r'\1', expr)
+    return LANGLE_PATTERN.sub(r'(\1)', expr)
+
+def _fractions_and_powers(expr: str) -> str:
+    expr = FRAC_PATTERN.sub(r'(\1)/(\2)', expr)
+    expr = GROUP_POWER_PATTERN.sub(r'**(\1)', expr)
+    return POWER_PATTERN.sub(r'**\1', expr)
+
+class LatexTranslator:
+    """Translates OCR'd LaTeX into SymPy expressions, memoizing results per input"""
+
+    def __init__(self, cache_size: int = 4096):
+        self.to_sympy = lru_cache(maxsize=cache_size)(self._to_sympy_uncached)
+
+    def translate(self, latex_expr: str) -> str:
+        """Rewrite LaTeX into a string SymPy can parse"""
+
+        expr = _strip_decorations(latex_expr)
+        expr = _fractions_and_powers(expr)
+
+        # Square roots: \sqrt{x} -> sqrt(x)
+        expr = SQRT_PATTERN.sub(r'sqrt(\1)', expr)
+
+        # Subscripts: x_{n} -> x_n (keep for variable names)
+        expr = GROUP_SUBSCRIPT_PATTERN.sub(r'_\1', expr)
+
+        # Greek letters and function names in one pass
+        expr = GREEK_AND_FUNCTION_PATTERN.sub(_replace_name, expr)
+
+        # Integrals: \int -> (remove for now, handle separately)
+        expr = INTEGRAL_PATTERN.sub('', expr)
+        expr = DIFFERENTIAL_PATTERN.sub('', expr)
+
+        # Sum notation
+        expr = SUM_PATTERN.sub('sum', expr)
+
+        # Remove remaining LaTeX commands, then spaces and braces
+        expr = COMMAND_PATTERN.sub('', expr)
+        expr = expr.replace(' ', '').translate(BRACE_TRANSLATION)
+
+        # Handle special characters that might cause issues
+        return DISALLOWED_CHARS_PATTERN.sub('', expr)
+
+    def clean(self, expr: str) -> str:
+        """Lighter rewrite used for individual array cells"""
+
+        expr = _strip_decorations(expr)
+        expr = _fractions_and_powers(expr)
+        # Subscripts of names: x_{n} -> x_n, not x_(n), which SymPy reads as a call
+        expr = NAMED_SUBSCRIPT_PATTERN.sub(r'\1_\2', expr)
+        expr = GREEK_PATTERN.sub(_replace_name, expr)
+        expr = COMMAND_PATTERN.sub('', expr)
+        expr = expr.translate(BRACE_TRANSLATION)
+        expr = DISALLOWED_CHARS_PATTERN.sub('', expr)
+        return expr.replace(' ', '')
+
+    def _to_sympy_uncached(self, latex_expr: str) -> Optional["sp.Expr"]:
+        """Convert LaTeX expression to SymPy expression with enhanced error handling"""
+        import sympy as sp
+
+        try:
+            expr = latex_expr.strip()
+
+            # Handle complex array structures - extract meaningful content
+            if '\\begin{array}' in expr:
+                return self._array_to_sympy(expr)
+
+            expr = self.translate(expr)
+
+            # If expression is too complex or empty, return a simple placeholder
+            if len(expr) < 2 or len(expr) > 200:
+                return sp.Symbol('complex_expression')
+
+            return sp.sympify(expr)
+
+        except Exception as e:
+            # Return a symbolic representation for complex expressions
+            print(f"LaTeX parsing failed: {e}")
+            return sp.Symbol('unparseable_expression')
+
+    def _array_to_sympy(self, latex_expr: str) -> "sp.Expr":
+        """Handle LaTeX array expressions by extracting meaningful mathematical content"""
+        import sympy as sp
+
+        try:
+            array_content = ARRAY_PATTERN.search(latex_expr)
+            if not array_content:
+                return sp.Symbol('array_expression')
+
+            content = ARRAY_BEGIN_PATTERN.sub('', array_content.group(0))
+            content = ARRAY_END_PATTERN.sub('', content)
+
+            # Split rows and columns, keeping cells that contain operators
+            expressions = []
+            for row in content.split('\\\\'):
+                for cell in row.split('&'):
+                    cell = cell.strip()
+                    if cell and len(cell) > 2:
+                        cell = REPEATED_OPEN_BRACES_PATTERN.sub('{', cell)
+                        cell = REPEATED_CLOSE_BRACES_PATTERN.sub('}', cell)
+                        if any(char in cell for char in '+-*/^=()[]'):
+                            expressions.append(cell)
+
+            # Parse the first meaningful cell
+            for expr in expressions:
+                try:
+                    cleaned = self.clean(expr)
+                    if cleaned and len(cleaned) > 1:
+                        return sp.sympify(cleaned)
+                except Exception:
+                    continue
+
+            return sp.Symbol('complex_array_expression')
+
+        except Exception as e:
+            print(f"Array parsing failed: {e}")
+            return sp.Symbol('array_expression')
+
+    def cache_stats(self) -> Dict[str, Any]:
+        info = self.to_sympy.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
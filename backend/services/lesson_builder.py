@@ -1,53 +1,83 @@
-from typing import List, Dict, Any
+import os
+import asyncio
+from typing import List, Dict, Any, Optional
 from .ocr_service import OCRService
 from .llm_service import LLMService
+from .llm_batcher import ExplanationBatcher
 from .sympy_service import SymPyService
+from .pipeline import PipelineStage, StagedPipeline
+from .job_progress import JobProgress
 
 class LessonBuilder:
-    def __init__(self, ocr_service: OCRService, llm_service: LLMService, sympy_service: SymPyService):
+    def __init__(self, ocr_service: OCRService, llm_service: LLMService, sympy_service: SymPyService,
+                 max_concurrency: Optional[int] = None, build_mode: Optional[str] = None):
         self.ocr_service = ocr_service
         self.llm_service = llm_service
         self.sympy_service = sympy_service
+        
+        # "pipeline" overlaps OCR, SymPy and LLM stages across images;
+        # "concurrent" runs whole images in parallel up to max_concurrency
+        self.build_mode = build_mode or os.getenv("LESSON_BUILD_MODE", "pipeline")
+        
+        # Number of images processed at once; 1 keeps the original sequential behaviour
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("LESSON_MAX_CONCURRENCY", "4"))
+        self.max_concurrency = max(1, max_concurrency)
+        
+        # Explanations requested together by LLM stage workers share one OpenRouter request
+        self.batcher = None
+        if os.getenv("LLM_BATCH_ENABLED", "true").lower() == "true":
+            self.batcher = ExplanationBatcher(llm_service)
+        
+        queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", "16"))
+        self.pipeline = StagedPipeline([
+            PipelineStage("ocr", self._ocr_stage,
+                          workers=int(os.getenv("PIPELINE_OCR_WORKERS", "2")), queue_size=queue_size),
+            PipelineStage("sympy", self._validation_stage,
+                          workers=int(os.getenv("PIPELINE_SYMPY_WORKERS", "2")), queue_size=queue_size),
+            PipelineStage("llm", self._explanation_stage,
+                          workers=int(os.getenv("PIPELINE_LLM_WORKERS", "8")), queue_size=queue_size),
+        ])
     
-    async def build_lesson(self, job_id: str, image_paths: List[str]) -> Dict[str, Any]:
-        """Build structured lesson from processed images"""
+    async def build_lesson(self, job_id: str, image_paths: List[str],
+                           progress: Optional[JobProgress] = None) -> Dict[str, Any]:
+        """Build structured lesson from processed images, reporting each stage to progress"""
+        
+        if self.build_mode == "pipeline":
+            items = [{"index": i, "image_path": path, "progress": progress} for i, path in enumerate(image_paths)]
+            results = await self.pipeline.run(items)
+        else:
+            # Fan out images, bounded by the concurrency limit
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            async def process_with_limit(index: int, image_path: str) -> Optional[Dict[str, Any]]:
+                async with semaphore:
+                    return await self._process_image(index, image_path, progress)
+            
+            results = await asyncio.gather(
+                *(process_with_limit(i, path) for i, path in enumerate(image_paths)),
+                return_exceptions=True
+            )
         
+        # Collect steps in original image order, skipping failed or empty images
         lesson_steps = []
         all_expressions = []
+        failed_images = []
         
-        # Process each image
-        for i, image_path in enumerate(image_paths):
-            # Extract mathematical content
-            ocr_result = await self.ocr_service.extract_math(image_path)
-            latex_expression = ocr_result["latex"]
-            
-            if not latex_expression:
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                failed_images.append({
+                    "image_index": i,
+                    "original_image": image_paths[i],
+                    "error": str(result)
+                })
                 continue
             
-            all_expressions.append(latex_expression)
-            
-            # Validate with SymPy
-            validation_result = await self.sympy_service.validate_expression(latex_expression)
-            
-            # Generate explanation
-            explanation = await self.llm_service.generate_explanation(
-                latex_expression, 
-                f"This is image {i+1} from a sequence of math problems"
-            )
-            
-            # Build step data
-            step_data = {
-                "step_id": f"step_{i+1}",
-                "image_index": i,
-                "original_image": image_path,
-                "ocr_result": ocr_result,
-                "validation": validation_result,
-                "explanation": explanation,
-                "latex": latex_expression,
-                "step_type": self._determine_step_type(latex_expression, explanation)
-            }
+            if result is None:
+                continue
             
-            lesson_steps.append(step_data)
+            all_expressions.append(result["latex"])
+            lesson_steps.append(result)
         
         # Generate lesson title
         lesson_title = self._generate_lesson_title(all_expressions, lesson_steps)
@@ -60,9 +90,106 @@ class LessonBuilder:
             "summary": lesson_summary,
             "total_steps": len(lesson_steps),
             "steps": lesson_steps,
-            "expressions_covered": all_expressions
+            "expressions_covered": all_expressions,
+            "failed_images": failed_images
+        }
+    
+    def pipeline_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage queue depth and throughput"""
+        return self.pipeline.stats()
+    
+    def batching_stats(self) -> Optional[Dict[str, Any]]:
+        """Explanation micro-batches formed by the LLM stage, or None when batching is off"""
+        return self.batcher.stats() if self.batcher is not None else None
+    
+    async def shutdown(self):
+        """Stop pipeline workers"""
+        await self.pipeline.shutdown()
+    
+    async def _process_image(self, i: int, image_path: str,
+                             progress: Optional[JobProgress] = None) -> Optional[Dict[str, Any]]:
+        """Run OCR, validation and explanation for a single image"""
+        
+        item = await self._ocr_stage({"index": i, "image_path": image_path, "progress": progress})
+        if item is None:
+            return None
+        
+        item = await self._validation_stage(item)
+        return await self._explanation_stage(item)
+    
+    async def _ocr_stage(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Extract mathematical content; drops images without LaTeX"""
+        
+        try:
+            ocr_result = await self.ocr_service.extract_math(item["image_path"])
+        except Exception:
+            self._report(item, "ocr", finished=True)
+            raise
+        
+        if not ocr_result["latex"]:
+            self._report(item, "ocr", finished=True)
+            return None
+        
+        self._report(item, "ocr")
+        item["ocr_result"] = ocr_result
+        item["latex"] = ocr_result["latex"]
+        return item
+    
+    async def _validation_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate with SymPy"""
+        
+        try:
+            item["validation"] = await self.sympy_service.validate_expression(item["latex"])
+        except Exception:
+            self._report(item, "sympy", finished=True)
+            raise
+        
+        self._report(item, "sympy")
+        return item
+    
+    async def _explanation_stage(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate explanation and build step data"""
+        
+        i = item["index"]
+        latex_expression = item["latex"]
+        progress = item.get("progress")
+        on_step = None
+        if progress is not None:
+            # Stream steps to status subscribers while the rest of the explanation is generated
+            on_step = lambda step: progress.explanation_step(i, latex_expression, item["validation"], step)
+        context = f"This is image {i+1} from a sequence of math problems"
+        try:
+            if self.batcher is not None and self.llm_service.use_openrouter:
+                explanation = await self.batcher.explain(latex_expression, context, on_step=on_step)
+            else:
+                explanation = await self.llm_service.generate_explanation(latex_expression, context, on_step=on_step)
+            if progress is not None:
+                progress.explanation_done(i, latex_expression, item["validation"], explanation)
+        finally:
+            self._report(item, "llm")
+        
+        return {
+            "step_id": f"step_{i+1}",
+            "image_index": i,
+            "original_image": item["image_path"],
+            "ocr_result": item["ocr_result"],
+            "validation": item["validation"],
+            "explanation": explanation,
+            "latex": latex_expression,
+            "step_type": self._determine_step_type(latex_expression, explanation)
         }
     
+    def _report(self, item: Dict[str, Any], stage: str, finished: bool = False):
+        """Count the image as past stage (and every later stage if finished)"""
+        
+        progress = item.get("progress")
+        if progress is None:
+            return
+        if finished:
+            progress.finish_image(stage)
+        else:
+            progress.advance(stage)
+    
     def _determine_step_type(self, latex_expression: str, explanation: Dict[str, Any]) -> str:
         """Determine the type of mathematical step"""
         
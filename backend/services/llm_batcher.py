@@ -0,0 +1,85 @@
+import os
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from .llm_service import LLMService
+
+class ExplanationBatcher:
+    """Micro-batches explanation requests from concurrent pipeline workers.
+
+    Requests arriving within `linger_ms` of each other are sent together
+    through LLMService.generate_explanations_batch, up to the service's
+    current batch_size(); a full batch goes out immediately. Each caller is
+    resumed as soon as its own explanation is parsed. A batch of one keeps
+    the single-request path, so its steps still stream to on_step.
+    """
+
+    def __init__(self, llm_service: LLMService, linger_ms: Optional[float] = None):
+        self.llm_service = llm_service
+        self.linger = (linger_ms if linger_ms is not None else float(os.getenv("LLM_BATCH_LINGER_MS", "50"))) / 1000
+
+        self._pending: List[Tuple[str, str, Optional[Callable[[Dict[str, Any]], None]], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: Set[asyncio.Task] = set()
+
+        self.flushes = 0
+        self.items = 0
+
+    async def explain(self, latex_expression: str, context: str = "",
+                      on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((latex_expression, context, on_step, future))
+
+        if len(self._pending) >= self.llm_service.batch_size():
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.flushes += 1
+        self.items += len(batch)
+        task = asyncio.create_task(self._run(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch):
+        try:
+            if len(batch) == 1:
+                latex_expression, context, on_step, future = batch[0]
+                results = [await self.llm_service.generate_explanation(latex_expression, context, on_step=on_step)]
+            else:
+                def resume(index: int, explanation: Dict[str, Any]):
+                    future = batch[index][3]
+                    if not future.done():
+                        future.set_result(explanation)
+
+                results = await self.llm_service.generate_explanations_batch(
+                    [latex_expression for latex_expression, _, _, _ in batch],
+                    [context for _, context, _, _ in batch],
+                    on_explanation=resume
+                )
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "flushes": self.flushes,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.flushes, 2) if self.flushes else 0.0,
+            "pending": len(self._pending),
+            "linger_ms": self.linger * 1000
+        }
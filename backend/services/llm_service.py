@@ -1,34 +1,323 @@
 import os
+import re
 import json
-from typing import Dict, Any, List
+import time
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import httpx
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Callable, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
+from .json_stream import JSONArrayStreamParser
+from .rate_limiter import TokenBucket
+from .result_cache import ResultCache
+from .single_flight import SingleFlight
 
 load_dotenv()
 
+# Bump whenever the explanation prompt changes so stale cache entries are not reused
+PROMPT_VERSION = "1"
+
+SYSTEM_PROMPT = "You are a helpful math tutor that explains mathematical concepts clearly. Always respond with valid JSON."
+
+# Shape of one explanation, shared by the single and batched prompts
+EXPLANATION_FORMAT = """{
+            "problem_type": "description of problem type",
+            "steps": [
+                {
+                    "step_number": 1,
+                    "description": "what we're doing in this step",
+                    "latex": "mathematical expression for this step",
+                    "explanation": "why we do this step"
+                }
+            ],
+            "key_concepts": ["concept1", "concept2"],
+            "common_mistakes": ["mistake1", "mistake2"],
+            "final_answer": "final result in LaTeX"
+        }"""
+
+# Rough size of generated text, used to adapt the batch size to the token budget
+CHARS_PER_TOKEN = 4
+
+# LaTeX tokens: control words, control symbols, whitespace runs, anything else
+LATEX_TOKEN_PATTERN = re.compile(r'\\[a-zA-Z]+|\\.|\s+|.', re.DOTALL)
+SPACING_COMMANDS = {'\\,', '\\;', '\\:', '\\!', '\\ ', '\\quad', '\\qquad', '\\left', '\\right'}
+COMMAND_ALIASES = {'\\dfrac': '\\frac', '\\tfrac': '\\frac', '\\le': '\\leq', '\\ge': '\\geq', '\\ne': '\\neq'}
+SINGLE_TOKEN_GROUP_PATTERN = re.compile(r'([\^_])\{([a-zA-Z0-9])\}')
+
+def normalize_latex(latex_expression: str) -> str:
+    """Canonicalize whitespace, spacing commands and redundant braces in LaTeX"""
+    
+    tokens = []
+    for token in LATEX_TOKEN_PATTERN.findall(latex_expression.strip()):
+        if token.isspace() or token in SPACING_COMMANDS:
+            continue
+        token = COMMAND_ALIASES.get(token, token)
+        # Keep a separator where dropping it would merge a command with the next letter
+        if tokens and tokens[-1][0] == '\\' and tokens[-1][1:].isalpha() and token[0].isalpha():
+            tokens.append(' ')
+        tokens.append(token)
+    
+    return SINGLE_TOKEN_GROUP_PATTERN.sub(r'\1\2', ''.join(tokens))
+
+class StepFanout:
+    """Explanation steps of one in-flight request, passed on to every caller sharing it"""
+    
+    def __init__(self):
+        self.steps: List[Dict[str, Any]] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+    
+    def subscribe(self, on_step: Callable[[Dict[str, Any]], None]):
+        """Replay the steps streamed so far, then pass on new ones"""
+        for step in self.steps:
+            on_step(step)
+        self._listeners.append(on_step)
+    
+    def publish(self, step: Dict[str, Any]):
+        self.steps.append(step)
+        for on_step in self._listeners:
+            on_step(step)
+
 class LLMService:
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.use_openrouter = bool(self.api_key)
-        if self.use_openrouter:
-            self.client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=self.api_key
-            )
+        self.model = os.getenv("OPENROUTER_MODEL", "nvidia/nemotron-nano-9b-v2:free")
+        self.base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+        self._client = None
+        self._client_lock = asyncio.Lock()
+        
+        # Requests to OpenRouter: shared connection pool, concurrency cap, provider rate limit
+        self.max_concurrency = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "16")))
+        self.timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+        self.connect_timeout = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+        self.max_retries = max(0, int(os.getenv("LLM_MAX_RETRIES", "2")))
+        # HTTP/2 multiplexes concurrent requests over one connection; needs the h2 package
+        self.http2 = (os.getenv("LLM_HTTP2", "true").lower() == "true"
+                      and importlib.util.find_spec("h2") is not None)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        rate_per_minute = float(os.getenv("LLM_RATE_LIMIT_RPM", "20"))
+        self.rate_limiter = TokenBucket(rate_per_minute / 60, float(os.getenv("LLM_RATE_LIMIT_BURST", "5")))
+        # Stream completions when the caller wants explanation steps as they are generated
+        self.streaming = os.getenv("LLM_STREAMING", "true").lower() == "true"
+        
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.failures = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+        self.request_seconds = 0.0
+        self.streamed = 0
+        self.streamed_with_steps = 0
+        self.first_step_seconds = 0.0
+        
+        # Batched explanations: several expressions per request, as many as the output budget allows.
+        # The per-explanation token estimate adapts to what responses actually use.
+        self.batch_max_size = max(1, int(os.getenv("LLM_BATCH_MAX_SIZE", "8")))
+        self.batch_max_tokens = int(os.getenv("LLM_BATCH_MAX_TOKENS", "8000"))
+        self.tokens_per_explanation = float(os.getenv("LLM_BATCH_TOKENS_PER_ITEM", "700"))
+        self.batch_requests = 0
+        self.batched_items = 0
+        self.batch_fallbacks = 0
+        self.batch_truncated = 0
+        
+        # Persistent cache of model explanations keyed by normalized LaTeX
+        self.cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.cache = ResultCache(
+            "llm",
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+        )
+        
+        # Concurrent requests for the same expression share one explanation, batched or not;
+        # callers joining a streamed request get its steps through the request's StepFanout
+        self.single_flight = SingleFlight()
+        self._step_fanouts: Dict[str, StepFanout] = {}
+    
+    async def _get_client(self):
+        """AsyncOpenAI client, created on first use; openai is imported on a thread since it takes ~0.5s"""
+        if self._client is not None:
+            return self._client
+        async with self._client_lock:
+            if self._client is None:
+                openai = await asyncio.to_thread(importlib.import_module, "openai")
+                self._client = openai.AsyncOpenAI(
+                    base_url=self.base_url,
+                    api_key=self.api_key,
+                    max_retries=self.max_retries,
+                    timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                    http_client=httpx.AsyncClient(
+                        http2=self.http2,
+                        limits=httpx.Limits(max_connections=self.max_concurrency,
+                                            max_keepalive_connections=self.max_concurrency)
+                    )
+                )
+            return self._client
+    
+    @asynccontextmanager
+    async def _request_slot(self):
+        """Hold a concurrency slot and a rate-limit token for one request, with timing"""
+        
+        start = time.perf_counter()
+        self.waiting += 1
+        waiting = True
+        try:
+            async with self._slots:
+                await self.rate_limiter.acquire()
+                self.waiting -= 1
+                waiting = False
+                waited = time.perf_counter() - start
+                self.queue_wait_seconds += waited
+                self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, waited)
+                
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                self.requests += 1
+                request_start = time.perf_counter()
+                try:
+                    yield
+                except Exception:
+                    self.failures += 1
+                    raise
+                finally:
+                    self.in_flight -= 1
+                    self.request_seconds += time.perf_counter() - request_start
+        finally:
+            if waiting:  # cancelled before getting a slot
+                self.waiting -= 1
+    
+    async def _create_completion(self, **kwargs):
+        """chat.completions.create under the concurrency cap and rate limit"""
+        
+        client = await self._get_client()
+        async with self._request_slot():
+            return await client.chat.completions.create(**kwargs)
+    
+    async def _stream_completion(self, on_item: Callable[[Dict[str, Any]], None], key: str = "steps",
+                                 **kwargs) -> JSONArrayStreamParser:
+        """Streamed completion; on_item gets each element of the `key` array as soon as its JSON closes.
+        
+        The slot is held until the stream ends, so streamed requests count
+        against the concurrency cap for their whole duration. Returns the
+        parser, holding the full text.
+        """
+        
+        client = await self._get_client()
+        parser = JSONArrayStreamParser(key)
+        async with self._request_slot():
+            start = time.perf_counter()
+            first_step = True
+            stream = await client.chat.completions.create(stream=True, **kwargs)
+            try:
+                async for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    for item in parser.feed(chunk.choices[0].delta.content):
+                        if first_step:
+                            first_step = False
+                            self.streamed_with_steps += 1
+                            self.first_step_seconds += time.perf_counter() - start
+                        try:
+                            on_item(item)
+                        except Exception as e:
+                            print(f"Streamed {key} callback failed: {e}")
+            finally:
+                await stream.close()
+        self.streamed += 1
+        return parser
+    
+    async def shutdown(self):
+        """Close pooled OpenRouter connections"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.use_openrouter,
+            "http2": self.http2,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "failures": self.failures,
+            "avg_queue_wait_ms": round(1000 * self.queue_wait_seconds / self.requests, 2) if self.requests else 0.0,
+            "max_queue_wait_ms": round(1000 * self.max_queue_wait_seconds, 2),
+            "avg_request_ms": round(1000 * self.request_seconds / self.requests, 2) if self.requests else 0.0,
+            "streamed": self.streamed,
+            "avg_time_to_first_step_ms": round(1000 * self.first_step_seconds / self.streamed_with_steps, 2)
+                                         if self.streamed_with_steps else None,
+            "batch": {
+                "requests": self.batch_requests,
+                "items": self.batched_items,
+                "fallbacks": self.batch_fallbacks,
+                "truncated": self.batch_truncated,
+                "size": self.batch_size(),
+                "tokens_per_explanation": round(self.tokens_per_explanation)
+            },
+            "rate_limit": self.rate_limiter.stats()
+        }
     
-    async def generate_explanation(self, latex_expression: str, context: str = "") -> Dict[str, Any]:
-        """Generate step-by-step explanation for mathematical expression"""
+    async def generate_explanation(self, latex_expression: str, context: str = "",
+                                   on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Generate step-by-step explanation for mathematical expression.
         
+        With on_step (and LLM_STREAMING on), the completion is streamed and
+        on_step is called with each step while the rest is still generated.
+        A call for an expression that is already being explained shares that
+        request: on_step gets the steps streamed so far, then the rest.
+        Cached and mock explanations, and ones coming from a batched request,
+        arrive whole, without on_step calls.
+        """
+        
+        key = self._cache_key(latex_expression)
+        if self.single_flight.in_flight(key):
+            # None when a batched request holds the key; those do not stream
+            fanout = self._step_fanouts.get(key)
+        else:
+            fanout = StepFanout()
+            self._step_fanouts[key] = fanout
+        if fanout is not None and on_step is not None:
+            fanout.subscribe(on_step)
+        
+        async def explain():
+            try:
+                return await self._generate_explanation(latex_expression, context, fanout.publish)
+            finally:
+                self._step_fanouts.pop(key, None)
+        
+        # Starts explain() only when no request for key is in flight
+        return await self.single_flight.do(key, explain)
+    
+    async def _generate_explanation(self, latex_expression: str, context: str = "",
+                                    on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         if self.use_openrouter:
             try:
-                return await self._nemotron_explanation(latex_expression, context)
+                if self.cache_enabled:
+                    return await self.cache.get_or_compute(
+                        self._cache_key(latex_expression),
+                        lambda: self._nemotron_explanation(latex_expression, context, on_step)
+                    )
+                return await self._nemotron_explanation(latex_expression, context, on_step)
             except Exception as e:
                 print(f"Nemotron API failed: {e}, falling back to mock")
         
         # Fallback to mock explanations
         return await self._mock_explanation(latex_expression, context)
     
-    async def _nemotron_explanation(self, latex_expression: str, context: str = "") -> Dict[str, Any]:
+    def _cache_key(self, latex_expression: str) -> str:
+        """Normalized LaTeX plus model and prompt version"""
+        
+        raw_key = f"{normalize_latex(latex_expression)}|{self.model}|v{PROMPT_VERSION}"
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+    
+    async def _nemotron_explanation(self, latex_expression: str, context: str = "",
+                                    on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """Use Nemotron via OpenRouter for explanation generation"""
         
         prompt = f"""
@@ -44,43 +333,17 @@ class LLMService:
         4. Common mistakes to avoid
         
         Format your response as JSON with the following structure:
-        {{
-            "problem_type": "description of problem type",
-            "steps": [
-                {{
-                    "step_number": 1,
-                    "description": "what we're doing in this step",
-                    "latex": "mathematical expression for this step",
-                    "explanation": "why we do this step"
-                }}
-            ],
-            "key_concepts": ["concept1", "concept2"],
-            "common_mistakes": ["mistake1", "mistake2"],
-            "final_answer": "final result in LaTeX"
-        }}
+        {EXPLANATION_FORMAT}
         """
         
         try:
-            import asyncio
-            loop = asyncio.get_event_loop()
-            completion = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    extra_headers={
-                        "HTTP-Referer": "https://mathscrap.local",
-                        "X-Title": "Math Scrap to Lesson App",
-                    },
-                    model="nvidia/nemotron-nano-9b-v2:free",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful math tutor that explains mathematical concepts clearly. Always respond with valid JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=1500
-                )
-            )
+            request = self._completion_request(prompt, max_tokens=1500)
             
-            content = completion.choices[0].message.content.strip()
+            if on_step is not None and self.streaming:
+                content = (await self._stream_completion(on_step, **request)).text.strip()
+            else:
+                completion = await self._create_completion(**request)
+                content = completion.choices[0].message.content.strip()
             
             # Clean content and try to parse JSON
             if content.startswith('```json'):
@@ -114,6 +377,221 @@ class LLMService:
             print(f"Nemotron API error: {e}")
             raise
     
+    def _completion_request(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        return dict(
+            extra_headers={
+                "HTTP-Referer": "https://mathscrap.local",
+                "X-Title": "Math Scrap to Lesson App",
+            },
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+    
+    def batch_size(self) -> int:
+        """Explanations per batched request that fit the output token budget"""
+        return max(1, min(self.batch_max_size, int(self.batch_max_tokens // self.tokens_per_explanation)))
+    
+    async def generate_explanations_batch(
+        self, latex_expressions: List[str], contexts: Optional[List[str]] = None,
+        on_explanation: Optional[Callable[[int, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """Explanations for several expressions, packed into as few requests as the token budget allows.
+        
+        Cached expressions are answered from the cache; the rest go out in
+        chunks of batch_size(), each asking for a JSON array keyed by index.
+        Explanations are taken from the response as they stream in (and from
+        whatever parses of a truncated one); only items missing afterwards
+        are retried one by one. Expressions already being explained by another
+        call are awaited rather than requested again, and concurrent callers
+        likewise wait for this batch. on_explanation(index, explanation) fires
+        as each one is ready. Results are in input order.
+        """
+        
+        contexts = contexts or [""] * len(latex_expressions)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(latex_expressions)
+        keys = [self._cache_key(latex_expression) for latex_expression in latex_expressions]
+        # Single-flight entries this batch has to resolve, by cache key
+        owned: Dict[str, asyncio.Future] = {}
+        
+        def deliver(index: int, explanation: Dict[str, Any]):
+            results[index] = explanation
+            future = owned.get(keys[index])
+            if future is not None and not future.done():
+                future.set_result(explanation)
+            if on_explanation is not None:
+                on_explanation(index, explanation)
+        
+        if not self.use_openrouter:
+            for index, (latex_expression, context) in enumerate(zip(latex_expressions, contexts)):
+                deliver(index, await self._mock_explanation(latex_expression, context))
+            return results
+        
+        # Cache first, and one request slot per distinct expression
+        pending: Dict[str, List[int]] = {}
+        for index, key in enumerate(keys):
+            cached = None
+            if self.cache_enabled and key not in pending:
+                try:
+                    cached = await self.cache.get(key)
+                except Exception as e:
+                    print(f"LLM cache lookup failed: {e}")
+            if cached is not None:
+                deliver(index, cached)
+            else:
+                pending.setdefault(key, []).append(index)
+        
+        # Join explanations already in flight; register the rest as this batch's own
+        loop = asyncio.get_running_loop()
+        joined: Dict[str, asyncio.Future] = {}
+        for key in pending:
+            future = loop.create_future()
+            flight = self.single_flight.task(key, lambda future=future: future)
+            if flight is future:
+                owned[key] = future
+            else:
+                joined[key] = flight
+        
+        async def join(key: str, flight: asyncio.Future):
+            index = pending[key][0]
+            try:
+                explanation = await asyncio.shield(flight)
+            except Exception as e:
+                print(f"Shared explanation failed: {e}, explaining it here")
+                explanation = await self._generate_explanation(latex_expressions[index], contexts[index])
+            for other in pending[key]:
+                deliver(other, explanation)
+        
+        groups = [pending[key] for key in owned]
+        size = self.batch_size()
+        try:
+            await asyncio.gather(
+                *(self._explain_chunk(groups[start:start + size], latex_expressions, contexts, deliver)
+                  for start in range(0, len(groups), size)),
+                *(join(key, flight) for key, flight in joined.items())
+            )
+        finally:
+            # Never leave callers waiting on this batch hanging
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Batched explanation was not produced"))
+        return results
+    
+    async def _explain_chunk(self, groups: List[List[int]], latex_expressions: List[str], contexts: List[str],
+                             deliver: Callable[[int, Dict[str, Any]], None]):
+        """One batched request for groups (input indices sharing an expression), then per-item fallbacks"""
+        
+        done = set()
+        stores = []
+        
+        def accept(position: int, explanation: Dict[str, Any]):
+            if position in done:
+                return
+            done.add(position)
+            for index in groups[position]:
+                deliver(index, explanation)
+            if self.cache_enabled:
+                stores.append(asyncio.create_task(self._cache_store(latex_expressions[groups[position][0]], explanation)))
+        
+        if len(groups) > 1:
+            try:
+                await self._batch_request(
+                    [latex_expressions[group[0]] for group in groups],
+                    [contexts[group[0]] for group in groups],
+                    accept
+                )
+            except Exception as e:
+                print(f"Batched explanation request failed: {e}, explaining {len(groups) - len(done)} items one by one")
+        
+        async def single(position: int):
+            index = groups[position][0]
+            # Not generate_explanation: its single-flight entry is the one this batch holds
+            explanation = await self._generate_explanation(latex_expressions[index], contexts[index])
+            for other in groups[position]:
+                deliver(other, explanation)
+        
+        missing = [position for position in range(len(groups)) if position not in done]
+        if len(groups) > 1:
+            self.batch_fallbacks += len(missing)
+        await asyncio.gather(*(single(position) for position in missing), *stores)
+    
+    async def _batch_request(self, latex_expressions: List[str], contexts: List[str],
+                             accept: Callable[[int, Dict[str, Any]], None]):
+        """Ask for every explanation in one completion; accept(position, explanation) for each usable one"""
+        
+        problems = "\n".join(
+            f"        {number}. Expression: {latex_expression}" + (f" (Context: {context})" if context else "")
+            for number, (latex_expression, context) in enumerate(zip(latex_expressions, contexts), start=1)
+        )
+        prompt = f"""
+        You are a math tutor. For each of the following {len(latex_expressions)} mathematical expressions in LaTeX format, provide a clear, step-by-step explanation.
+        
+{problems}
+        
+        For each expression provide:
+        1. A brief description of what type of problem this is
+        2. Step-by-step solution with explanations
+        3. Key concepts involved
+        4. Common mistakes to avoid
+        
+        Format your response as one JSON object with an "explanations" array holding one entry per expression,
+        in order, each with the expression's number in "index" and otherwise this structure:
+        {EXPLANATION_FORMAT}
+        """
+        
+        count = len(latex_expressions)
+        max_tokens = min(self.batch_max_tokens, int(1.5 * count * self.tokens_per_explanation))
+        request = self._completion_request(prompt, max_tokens=max_tokens)
+        
+        received = 0
+        
+        def on_item(item: Any):
+            nonlocal received
+            if not isinstance(item, dict) or not isinstance(item.get("steps"), list):
+                return
+            try:
+                position = int(item.pop("index")) - 1
+            except (KeyError, TypeError, ValueError):
+                return
+            if 0 <= position < count:
+                received += 1
+                item["source"] = "nemotron_openrouter"
+                accept(position, item)
+        
+        self.batch_requests += 1
+        self.batched_items += count
+        if self.streaming:
+            parser = await self._stream_completion(on_item, key="explanations", **request)
+        else:
+            completion = await self._create_completion(**request)
+            parser = JSONArrayStreamParser("explanations")
+            for item in parser.feed(completion.choices[0].message.content or ""):
+                on_item(item)
+        
+        self._adapt_batch_size(len(parser.text), received, truncated=not parser.finished)
+    
+    def _adapt_batch_size(self, response_chars: int, explanations: int, truncated: bool):
+        """Track tokens per explanation from responses; back off when the budget cut one short"""
+        
+        if explanations:
+            observed = response_chars / CHARS_PER_TOKEN / explanations
+            # Headroom over the observed size, smoothed across batches
+            self.tokens_per_explanation = 0.7 * self.tokens_per_explanation + 0.3 * 1.2 * observed
+        if truncated:
+            self.batch_truncated += 1
+            self.tokens_per_explanation *= 1.5
+        self.tokens_per_explanation = min(max(self.tokens_per_explanation, 100.0), float(self.batch_max_tokens))
+    
+    async def _cache_store(self, latex_expression: str, explanation: Dict[str, Any]):
+        try:
+            await self.cache.set(self._cache_key(latex_expression), explanation)
+        except Exception as e:
+            print(f"LLM cache store failed: {e}")
+    
     async def _mock_explanation(self, latex_expression: str, context: str = "") -> Dict[str, Any]:
         """Generate mock explanations for development"""
         
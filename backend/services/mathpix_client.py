@@ -0,0 +1,175 @@
+import os
+import time
+import random
+import asyncio
+import httpx
+from typing import Any, Dict, Optional
+
+class MathpixUnavailable(RuntimeError):
+    """Raised without calling Mathpix while the circuit breaker is open"""
+
+class MathpixClient:
+    """Async Mathpix client on a shared keep-alive connection pool.
+
+    At most `max_concurrency` requests are in flight; 429, 5xx and
+    transport errors are retried with full-jitter exponential backoff
+    (honouring Retry-After). After `breaker_threshold` consecutive calls
+    that still failed that way the breaker opens and calls fail fast with MathpixUnavailable for
+    `breaker_reset_seconds`, then a single probe decides whether it closes.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, app_id: Optional[str] = None, app_key: Optional[str] = None,
+                 api_url: Optional[str] = None):
+        self.app_id = app_id or os.getenv("MATHPIX_APP_ID")
+        self.app_key = app_key or os.getenv("MATHPIX_APP_KEY")
+        self.api_url = api_url or os.getenv("MATHPIX_API_URL", "https://api.mathpix.com/v3/text")
+        self.max_concurrency = max(1, int(os.getenv("MATHPIX_MAX_CONCURRENCY", "4")))
+        self.timeout = float(os.getenv("MATHPIX_TIMEOUT", "30"))
+        self.connect_timeout = float(os.getenv("MATHPIX_CONNECT_TIMEOUT", "5"))
+        self.max_retries = max(0, int(os.getenv("MATHPIX_MAX_RETRIES", "3")))
+        self.backoff_base = float(os.getenv("MATHPIX_BACKOFF_BASE", "0.5"))
+        self.backoff_max = float(os.getenv("MATHPIX_BACKOFF_MAX", "8"))
+        self.breaker_threshold = max(1, int(os.getenv("MATHPIX_BREAKER_THRESHOLD", "5")))
+        self.breaker_reset_seconds = float(os.getenv("MATHPIX_BREAKER_RESET_SECONDS", "30"))
+
+        # Created on first use so it binds to the running event loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.breaker_opens = 0
+        self.request_seconds = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.app_id and self.app_key)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={"app_id": self.app_id or "", "app_key": self.app_key or ""},
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+        return self._client
+
+    async def recognize(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST payload to the Mathpix text endpoint and return the JSON response"""
+
+        async with self._slots:
+            # Checked once a slot is free, so calls queued behind a failing batch fail fast too
+            self._check_breaker()
+            try:
+                result = await self._post_with_retries(payload)
+            except httpx.HTTPStatusError as e:
+                # Other 4xx (bad image, bad credentials) mean Mathpix is up and answering
+                if e.response.status_code in self.RETRY_STATUSES:
+                    self._record_failure()
+                else:
+                    self.failures += 1
+                    self._record_success()
+                raise
+            except Exception:
+                self._record_failure()
+                raise
+            except BaseException:
+                # Cancelled: no verdict, but let a later call probe again
+                self._probing = False
+                raise
+            self._record_success()
+            return result
+
+    async def _post_with_retries(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            self.requests += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(self.api_url, json=payload)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = self._retry_after(response)
+            finally:
+                self.request_seconds += time.perf_counter() - start
+
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full jitter: uniform in [0, base * 2^attempt], capped; Retry-After is a floor"""
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        try:
+            return float(response.headers["retry-after"])
+        except (KeyError, ValueError):
+            return None
+
+    def _check_breaker(self):
+        if self._opened_at is None:
+            return
+        if self._probing or time.monotonic() - self._opened_at < self.breaker_reset_seconds:
+            self.short_circuited += 1
+            raise MathpixUnavailable("Mathpix circuit breaker is open")
+        # Half-open: let this call through as the probe
+        self._probing = True
+
+    def _record_success(self):
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def _record_failure(self):
+        self.failures += 1
+        self._consecutive_failures += 1
+        if self._probing or self._consecutive_failures >= self.breaker_threshold:
+            if self._opened_at is None or self._probing:
+                self.breaker_opens += 1
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def breaker_state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self._opened_at < self.breaker_reset_seconds:
+            return "open"
+        return "half_open"
+
+    async def close(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.configured,
+            "breaker": self.breaker_state(),
+            "consecutive_failures": self._consecutive_failures,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "breaker_opens": self.breaker_opens,
+            "avg_request_ms": round(1000 * self.request_seconds / self.requests, 2) if self.requests else 0.0,
+            "max_concurrency": self.max_concurrency
+        }
@@ -0,0 +1,91 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+class OCRPoolBusy(RuntimeError):
+    """Raised when every OCR worker is busy and the queue is full"""
+
+class OCRWorkerPool:
+    """Bounded thread pool reserved for OCR preprocessing and model inference.
+
+    Keeps OCR off the event loop's default executor. At most `workers` calls
+    run at once and at most `max_queue` more wait for a worker; a call
+    beyond that fails fast with OCRPoolBusy instead of queueing unbounded.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.workers = max(1, workers or int(os.getenv("OCR_WORKERS", "2")))
+        self.max_queue = max(0, max_queue if max_queue is not None else int(os.getenv("OCR_MAX_QUEUE", "32")))
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Calls admitted to the executor, running or queued; never more than workers + max_queue
+        self.admitted = 0
+        # Updated from worker threads
+        self._counter_lock = threading.Lock()
+        self.running = 0
+
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr-worker")
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) on an OCR worker; OCRPoolBusy at once if the queue is full"""
+
+        if self.admitted >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise OCRPoolBusy(f"OCR pool saturated ({self.workers} running, {self.max_queue} queued)")
+
+        self.admitted += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), self._run_counted, fn, *args)
+        finally:
+            self.admitted -= 1
+            self.completed += 1
+
+    def _run_counted(self, fn: Callable[..., Any], *args) -> Any:
+        with self._counter_lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._counter_lock:
+                self.running -= 1
+
+    async def warm_up(self, initializer: Optional[Callable[[], Any]] = None):
+        """Start every worker thread and optionally run an initializer (e.g. model load) once"""
+
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        if initializer is not None:
+            await loop.run_in_executor(executor, initializer)
+        # ThreadPoolExecutor spawns threads lazily; one no-op per worker starts them all
+        await asyncio.gather(*(loop.run_in_executor(executor, lambda: None) for _ in range(self.workers)))
+
+    async def shutdown(self, wait: bool = True):
+        """Drop queued work and wait for running OCR calls to finish"""
+
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: executor.shutdown(wait=wait, cancel_futures=True)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": max(0, self.admitted - self.running),
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
@@ -1,38 +1,111 @@
 import os
-import cv2
-import numpy as np
-import requests
 import base64
-from typing import Optional, Dict, Any
+import asyncio
+import hashlib
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from dotenv import load_dotenv
 from .latex_ocr import LaTeXOCR
+from .mathpix_client import MathpixClient
+from .ocr_pool import OCRPoolBusy
+from .result_cache import ResultCache
+from .single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    import numpy as np  # OpenCV and NumPy are imported where used; they are slow to import
 
 load_dotenv()
 
+# Bump whenever preprocessing or post-processing changes what OCR returns
+OCR_CACHE_VERSION = "4"
+
 class OCRService:
     def __init__(self):
-        self.mathpix_app_id = os.getenv("MATHPIX_APP_ID")
-        self.mathpix_app_key = os.getenv("MATHPIX_APP_KEY")
-        self.use_mathpix = bool(self.mathpix_app_id and self.mathpix_app_key)
+        self.mathpix = MathpixClient()
+        self.use_mathpix = self.mathpix.configured
         self.latex_ocr = LaTeXOCR()
+        
+        # Content-addressed cache of OCR results
+        self.cache_enabled = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+        self.cache = ResultCache("ocr", int(os.getenv("OCR_CACHE_MAX_ENTRIES", "10000")))
+        
+        # Concurrent uploads of the same image share one extraction
+        self.single_flight = SingleFlight()
+        
+        # Shared with LaTeXOCR so each image is preprocessed once
+        self.preprocessing = self.latex_ocr.preprocessing
     
     async def extract_math(self, image_path: str) -> Dict[str, Any]:
+        """Extract mathematical content from image, reusing results for identical images"""
+        
+        try:
+            cache_key = await self._cache_key(image_path)
+        except Exception as e:
+            print(f"OCR cache key failed: {e}")
+            return await self._extract_math_uncached(image_path)
+        
+        return await self.single_flight.do(cache_key, lambda: self._extract_math_cached(image_path, cache_key))
+    
+    async def _extract_math_cached(self, image_path: str, cache_key: str) -> Dict[str, Any]:
+        if not self.cache_enabled:
+            return await self._extract_math_uncached(image_path)
+        
+        try:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            print(f"OCR cache lookup failed: {e}")
+        
+        result = await self._extract_math_uncached(image_path)
+        
+        if self._is_cacheable(result):
+            try:
+                await self.cache.set(cache_key, result)
+            except Exception as e:
+                print(f"OCR cache store failed: {e}")
+        
+        return result
+    
+    def _is_cacheable(self, result: Dict[str, Any]) -> bool:
+        """Mock and fallback results depend on the filename, not the content"""
+        source = result.get("source", "")
+        return bool(result.get("latex")) and "mock" not in source and "fallback" not in source
+    
+    async def _cache_key(self, image_path: str) -> str:
+        """SHA-256 of the raw image bytes plus OCR method and version"""
+        
+        digest = await asyncio.to_thread(self._hash_file, image_path)
+        return f"{digest}:{self.latex_ocr.ocr_method}:v{OCR_CACHE_VERSION}"
+    
+    def _hash_file(self, image_path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(image_path, 'rb') as image_file:
+            for chunk in iter(lambda: image_file.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
+    async def _extract_math_uncached(self, image_path: str) -> Dict[str, Any]:
         """Extract mathematical content from image"""
         
-        # Preprocess image
-        processed_image_path = await self._preprocess_image(image_path)
+        # Decode once, then preprocess in memory for the local backend
+        gray = await self.latex_ocr.pool.run(self.preprocessing.load, image_path)
         
         # Try local LaTeX OCR first (more reliable)
+        pool_busy = False
         try:
-            result = await self.latex_ocr.extract_latex(processed_image_path)
+            image = await self.latex_ocr.pool.run(self.preprocessing.run, gray, self.latex_ocr.ocr_method)
+            result = await self.latex_ocr.extract_latex(image_path, image)
             return result
         except Exception as e:
+            pool_busy = isinstance(e, OCRPoolBusy)
             print(f"Local LaTeX OCR failed: {e}, trying Mathpix")
         
         # Fallback to Mathpix if available
-        if self.use_mathpix:
+        # An open breaker means Mathpix is failing; skip it without preprocessing
+        if self.use_mathpix and self.mathpix.breaker_state() != "open":
             try:
-                result = await self._mathpix_ocr(processed_image_path)
+                image = await self.latex_ocr.pool.run(self.preprocessing.run, gray, "mathpix")
+                result = await self._mathpix_ocr(image)
                 return {
                     "latex": result.get("latex_styled", ""),
                     "confidence": result.get("latex_confidence", 0.0),
@@ -42,62 +115,33 @@ class OCRService:
             except Exception as e:
                 print(f"Mathpix OCR failed: {e}, falling back to mock")
         
+        # An overloaded pool is a real failure, not a reason to return mock data
+        if pool_busy:
+            raise OCRPoolBusy("OCR workers are saturated, try again later")
+        
         # Final fallback to mock LaTeX-OCR
-        return await self._mock_latex_ocr(processed_image_path)
+        return await self._mock_latex_ocr(image_path)
     
-    async def _preprocess_image(self, image_path: str) -> str:
-        """Preprocess image: deskew, denoise, enhance contrast"""
-        
-        # Read image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Could not read image: {image_path}")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Deskew
-        coords = np.column_stack(np.where(gray > 0))
-        if len(coords) > 0:
-            angle = cv2.minAreaRect(coords)[-1]
-            if angle < -45:
-                angle = -(90 + angle)
-            else:
-                angle = -angle
-            
-            if abs(angle) > 0.5:  # Only rotate if significant skew
-                (h, w) = gray.shape[:2]
-                center = (w // 2, h // 2)
-                M = cv2.getRotationMatrix2D(center, angle, 1.0)
-                gray = cv2.warpAffine(gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-        
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(gray)
-        
-        # Enhance contrast
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(denoised)
-        
-        # Save processed image
-        processed_path = image_path.replace('.', '_processed.')
-        cv2.imwrite(processed_path, enhanced)
-        
-        return processed_path
+    async def warm_up(self):
+        """Warm up the local OCR model and worker pool"""
+        await self.latex_ocr.warm_up()
     
-    async def _mathpix_ocr(self, image_path: str) -> Dict[str, Any]:
+    async def shutdown(self):
+        """Release OCR workers and Mathpix connections"""
+        await self.latex_ocr.shutdown()
+        await self.mathpix.close()
+    
+    async def _mathpix_ocr(self, image: "np.ndarray") -> Dict[str, Any]:
         """Use Mathpix API for OCR"""
+        import cv2
         
-        with open(image_path, 'rb') as image_file:
-            image_data = base64.b64encode(image_file.read()).decode()
-        
-        headers = {
-            'app_id': self.mathpix_app_id,
-            'app_key': self.mathpix_app_key,
-            'Content-type': 'application/json'
-        }
+        encoded, png = cv2.imencode('.png', image)
+        if not encoded:
+            raise ValueError("Could not encode image for Mathpix")
+        image_data = base64.b64encode(png.tobytes()).decode()
         
         data = {
-            'src': f'data:image/jpeg;base64,{image_data}',
+            'src': f'data:image/png;base64,{image_data}',
             'formats': ['latex_styled', 'text'],
             'data_options': {
                 'include_latex': True,
@@ -105,11 +149,7 @@ class OCRService:
             }
         }
         
-        response = requests.post('https://api.mathpix.com/v3/text', 
-                               headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        
-        return response.json()
+        return await self.mathpix.recognize(data)
     
     async def _mock_latex_ocr(self, image_path: str) -> Dict[str, Any]:
         """Mock LaTeX-OCR for development (replace with actual LaTeX-OCR)"""
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# A stage handler receives the item produced by the previous stage and returns
+# the item for the next one, or None to finish the item early.
+StageHandler = Callable[[Any], Awaitable[Optional[Any]]]
+
+class PipelineStage:
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1, queue_size: int = 16):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.queue: Optional[asyncio.Queue] = None
+
+        # Counters used to size workers
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0
+        self.total_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self._completions: deque = deque()
+
+    def record(self, elapsed: float, failed: bool = False):
+        """Record one handled item"""
+
+        if failed:
+            self.failed += 1
+        else:
+            self.processed += 1
+        self.total_seconds += elapsed
+
+        now = time.monotonic()
+        self._completions.append(now)
+        while self._completions and now - self._completions[0] > 60:
+            self._completions.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and throughput for this stage"""
+
+        handled = self.processed + self.failed
+        now = time.monotonic()
+        while self._completions and now - self._completions[0] > 60:
+            self._completions.popleft()
+        window = min(60.0, now - self.started_at) if self.started_at else 0.0
+
+        return {
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_capacity": self.queue_size,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_latency_ms": round(1000 * self.total_seconds / handled, 2) if handled else None,
+            "throughput_per_sec": round(len(self._completions) / window, 3) if window > 0 else 0.0
+        }
+
+class StagedPipeline:
+    """Long-lived producer/consumer pipeline with bounded queues between stages"""
+
+    def __init__(self, stages: List[PipelineStage]):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        """Start stage workers on the running event loop"""
+
+        if self._tasks:
+            return
+
+        for position, stage in enumerate(self.stages):
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+            stage.started_at = time.monotonic()
+            for _ in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._worker(position)))
+
+    async def _worker(self, position: int):
+        stage = self.stages[position]
+        next_stage = self.stages[position + 1] if position + 1 < len(self.stages) else None
+
+        while True:
+            item, future = await stage.queue.get()
+            try:
+                # Caller gave up on this item (cancelled or failed elsewhere)
+                if future.done():
+                    continue
+
+                stage.busy += 1
+                start = time.perf_counter()
+                try:
+                    result = await stage.handler(item)
+                except Exception as e:
+                    stage.record(time.perf_counter() - start, failed=True)
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                finally:
+                    stage.busy -= 1
+
+                stage.record(time.perf_counter() - start)
+
+                if result is None or next_stage is None:
+                    if not future.done():
+                        future.set_result(result)
+                else:
+                    # Blocks while the next stage is saturated (backpressure)
+                    await next_stage.queue.put((result, future))
+            finally:
+                stage.queue.task_done()
+
+    async def run(self, items: List[Any]) -> List[Any]:
+        """Push items through every stage; returns results or exceptions in input order"""
+
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in items]
+        first_queue = self.stages[0].queue
+
+        async def produce():
+            for item, future in zip(items, futures):
+                await first_queue.put((item, future))
+
+        producer = asyncio.create_task(produce())
+        try:
+            return await asyncio.gather(*futures, return_exceptions=True)
+        finally:
+            producer.cancel()
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+
+    async def shutdown(self):
+        """Cancel all stage workers"""
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -0,0 +1,196 @@
+import os
+import time
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+from .deskew import Deskewer
+
+if TYPE_CHECKING:
+    import numpy as np  # OpenCV, NumPy and PIL are imported where used; they are slow to import
+
+# Stages run per OCR backend, in order, after "load" (decode + resolution normalization).
+# Override one with OCR_PREPROCESS_<BACKEND>, e.g. OCR_PREPROCESS_PIX2TEX=deskew,clahe,threshold
+PROFILES: Dict[str, List[str]] = {
+    "pix2tex": ["upscale", "deskew", "denoise", "clahe", "bilateral", "close", "threshold"],
+    "easyocr": ["upscale", "deskew", "denoise", "clahe", "bilateral", "close", "threshold"],
+    "tesseract": ["upscale", "deskew", "denoise", "clahe", "bilateral", "close", "threshold"],
+    "paddleocr": ["deskew", "denoise", "clahe"],
+    "mathpix": ["deskew", "denoise", "clahe"],
+    "fallback": []
+}
+
+class PreprocessingPipeline:
+    """One preprocessing pass per image, on in-memory grayscale arrays.
+
+    The image is decoded once at OCR resolution and each backend's profile
+    picks which stages run after that, so nothing is written to disk or
+    repeated. Time spent per stage is tracked for /metrics.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, List[str]]] = None):
+        # Resolution normalization before the expensive filters (0 disables either step)
+        self.max_dimension = int(os.getenv("OCR_MAX_DIMENSION", "2048"))
+        self.target_text_height = int(os.getenv("OCR_TARGET_TEXT_HEIGHT", "32"))
+        self.deskewer = Deskewer()
+
+        self.stages: Dict[str, Callable[["np.ndarray"], "np.ndarray"]] = {
+            "upscale": self._upscale,
+            "deskew": self._deskew,
+            "denoise": self._denoise,
+            "clahe": self._clahe,
+            "bilateral": self._bilateral,
+            "close": self._close,
+            "threshold": self._threshold
+        }
+
+        self.profiles = {backend: list(stages) for backend, stages in (profiles or PROFILES).items()}
+        for backend in self.profiles:
+            override = os.getenv(f"OCR_PREPROCESS_{backend.upper()}")
+            if override is not None:
+                self.profiles[backend] = [stage.strip() for stage in override.split(",") if stage.strip()]
+        for backend, stages in self.profiles.items():
+            unknown = [stage for stage in stages if stage not in self.stages]
+            if unknown:
+                raise ValueError(f"Unknown preprocessing stages for {backend}: {', '.join(unknown)}")
+
+        self._lock = threading.Lock()
+        self._runs: Dict[str, int] = {}
+        self._seconds: Dict[str, float] = {}
+
+    def run(self, image: Union[str, "np.ndarray"], backend: str) -> "np.ndarray":
+        """Grayscale image (path or already loaded array) preprocessed for backend"""
+
+        if isinstance(image, str):
+            image = self.load(image)
+        for stage in self.profiles.get(backend, self.profiles["fallback"]):
+            image = self._timed(stage, self.stages[stage], image)
+        return image
+
+    def load(self, image_path: str) -> "np.ndarray":
+        """Decode as grayscale and normalize resolution"""
+        return self._timed("load", lambda path: self._normalize_resolution(self._read_gray(path)), image_path)
+
+    def _timed(self, stage: str, fn: Callable[[Any], "np.ndarray"], image: Any) -> "np.ndarray":
+        start = time.perf_counter()
+        result = fn(image)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._runs[stage] = self._runs.get(stage, 0) + 1
+            self._seconds[stage] = self._seconds.get(stage, 0.0) + elapsed
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                stage: {
+                    "runs": runs,
+                    "avg_ms": round(1000 * self._seconds[stage] / runs, 2),
+                    "total_seconds": round(self._seconds[stage], 3)
+                }
+                for stage, runs in self._runs.items()
+            }
+        return {"profiles": self.profiles, "stages": stages}
+
+    def _read_gray(self, image_path: str) -> "np.ndarray":
+        """Decode as grayscale; JPEGs far above max_dimension are decoded at 1/2, 1/4 or 1/8 scale"""
+        import cv2
+        from PIL import Image as PILImage
+
+        flags = cv2.IMREAD_GRAYSCALE
+        if self.max_dimension:
+            try:
+                with PILImage.open(image_path) as header:  # reads the size without decoding
+                    longest = max(header.size)
+            except Exception:
+                longest = 0
+            for factor, reduced in ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8), (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                                    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)):
+                if longest // factor >= self.max_dimension:
+                    flags = reduced
+                    break
+
+        gray = cv2.imread(image_path, flags)
+        if gray is None:
+            raise ValueError(f"Could not read image: {image_path}")
+        return gray
+
+    def _normalize_resolution(self, gray: "np.ndarray") -> "np.ndarray":
+        """Shrink to max_dimension, then further until typical glyphs are target_text_height tall"""
+        import cv2
+
+        scale = 1.0
+        if self.max_dimension:
+            scale = min(scale, self.max_dimension / max(gray.shape[:2]))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        if self.target_text_height:
+            text_height = self._estimate_text_height(gray)
+            # Only downscale, and keep enough pixels for thin strokes like fraction bars
+            if text_height and text_height > self.target_text_height:
+                scale = max(self.target_text_height / text_height, 512 / max(gray.shape[:2]))
+                if scale < 1.0:
+                    gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _estimate_text_height(self, gray: "np.ndarray") -> Optional[float]:
+        """Median height in pixels of glyph-sized dark components, or None if there are too few"""
+        import cv2
+        import numpy as np
+
+        # A ~1024px copy is plenty to measure glyphs and keeps this step cheap
+        scale = min(1.0, 1024 / max(gray.shape[:2]))
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+        _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        # Drop specks and page-sized blobs (shadows, edges of the sheet)
+        glyphs = heights[(heights >= 4) & (areas >= 8) & (heights < small.shape[0] / 4)]
+        if len(glyphs) < 5:
+            return None
+        return float(np.median(glyphs)) / scale
+
+    def _upscale(self, gray: "np.ndarray") -> "np.ndarray":
+        """Enlarge tiny crops; math OCR works better with larger images"""
+        import cv2
+
+        height, width = gray.shape
+        if height < 64 or width < 64:
+            scale_factor = max(64 / height, 64 / width, 2.0)
+            gray = cv2.resize(gray, (int(width * scale_factor), int(height * scale_factor)),
+                              interpolation=cv2.INTER_CUBIC)
+        return gray
+
+    def _deskew(self, gray: "np.ndarray") -> "np.ndarray":
+        return self.deskewer.deskew(gray)
+
+    def _denoise(self, gray: "np.ndarray") -> "np.ndarray":
+        import cv2
+        return cv2.fastNlMeansDenoising(gray)
+
+    def _clahe(self, gray: "np.ndarray") -> "np.ndarray":
+        import cv2
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        return clahe.apply(gray)
+
+    def _bilateral(self, gray: "np.ndarray") -> "np.ndarray":
+        """Smooth while preserving edges (important for math symbols)"""
+        import cv2
+        return cv2.bilateralFilter(gray, 9, 75, 75)
+
+    def _close(self, gray: "np.ndarray") -> "np.ndarray":
+        """Morphological close to clean up broken math symbols"""
+        import cv2
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+        return cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
+
+    def _threshold(self, gray: "np.ndarray") -> "np.ndarray":
+        """Adaptive threshold to a black-on-white binary image"""
+        import cv2
+        import numpy as np
+
+        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        if np.mean(binary) < 127:
+            binary = cv2.bitwise_not(binary)
+        return binary
@@ -0,0 +1,182 @@
+import os
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from db.database import SessionLocal
+from db.models import CacheEntry
+
+class ResultCache:
+    """Size-bounded LRU cache of JSON results persisted in the cache_entries table"""
+
+    def __init__(self, namespace: str, max_entries: int = 10000, ttl_seconds: Optional[float] = None):
+        self.namespace = namespace
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+
+        # Hits are read-only: last_accessed is written at most once per touch interval
+        # per entry, and the hits counted in between are added with that write
+        self.touch_interval = timedelta(seconds=float(os.getenv("CACHE_TOUCH_INTERVAL_SECONDS", "300")))
+        self._unrecorded_hits: Dict[str, int] = {}
+        self._hits_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.computes = 0
+        self.compute_seconds = 0.0
+        self.latency_saved_seconds = 0.0
+
+    def _full_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+
+        value = await asyncio.to_thread(self._get_sync, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.latency_saved_seconds += self._avg_compute_seconds()
+        return value
+
+    async def set(self, key: str, value: Any):
+        """Store value under key, evicting least recently used entries past max_entries"""
+
+        self.evictions += await asyncio.to_thread(self._set_sync, key, value)
+        self.stores += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value, or compute and store it.
+
+        Concurrent misses for one key are not collapsed here; callers that need
+        that wrap the call in their SingleFlight.
+        """
+
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+        return await self._compute_and_store(key, compute, should_cache)
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Any]],
+                                 should_cache: Optional[Callable[[Any], bool]]) -> Any:
+        start = time.perf_counter()
+        value = await compute()
+        self.computes += 1
+        self.compute_seconds += time.perf_counter() - start
+
+        if should_cache is None or should_cache(value):
+            try:
+                await self.set(key, value)
+            except Exception as e:
+                print(f"Cache store failed ({self.namespace}): {e}")
+
+        return value
+
+    def _avg_compute_seconds(self) -> float:
+        return self.compute_seconds / self.computes if self.computes else 0.0
+
+    def _get_sync(self, key: str) -> Optional[Any]:
+        db = SessionLocal()
+        try:
+            entry = db.query(CacheEntry).filter(CacheEntry.key == self._full_key(key)).first()
+            if entry is None:
+                return None
+
+            now = datetime.utcnow()
+            if entry.expires_at is not None and entry.expires_at <= now:
+                db.delete(entry)
+                db.commit()
+                return None
+
+            value = entry.value
+            with self._hits_lock:
+                hits = self._unrecorded_hits.pop(key, 0) + 1
+                if entry.last_accessed is not None and now - entry.last_accessed < self.touch_interval:
+                    self._unrecorded_hits[key] = hits
+                    return value
+
+            entry.last_accessed = now
+            entry.hits = (entry.hits or 0) + hits
+            db.commit()
+            return value
+        finally:
+            db.close()
+
+    def _set_sync(self, key: str, value: Any) -> int:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.ttl_seconds) if self.ttl_seconds else None
+            entry = db.query(CacheEntry).filter(CacheEntry.key == self._full_key(key)).first()
+            if entry is None:
+                db.add(CacheEntry(
+                    key=self._full_key(key),
+                    namespace=self.namespace,
+                    value=value,
+                    created_at=now,
+                    last_accessed=now,
+                    expires_at=expires_at,
+                    hits=0
+                ))
+            else:
+                entry.value = value
+                entry.last_accessed = now
+                entry.expires_at = expires_at
+
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another writer stored the same key first
+                db.rollback()
+
+            return self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db) -> int:
+        """Delete expired entries, then least recently used entries beyond max_entries"""
+
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += db.query(CacheEntry).filter(
+                CacheEntry.namespace == self.namespace,
+                CacheEntry.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+
+        # count(*) is answered from the (namespace, last_accessed) index alone
+        count = db.query(func.count()).select_from(CacheEntry).filter(CacheEntry.namespace == self.namespace).scalar()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            stale_keys = [
+                key for (key,) in db.query(CacheEntry.key)
+                .filter(CacheEntry.namespace == self.namespace)
+                .order_by(CacheEntry.last_accessed.asc())
+                .limit(overflow)
+            ]
+            db.query(CacheEntry).filter(CacheEntry.key.in_(stale_keys)).delete(synchronize_session=False)
+            evicted += len(stale_keys)
+
+        if evicted:
+            db.commit()
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "avg_compute_ms": round(1000 * self._avg_compute_seconds(), 2),
+            "latency_saved_seconds": round(self.latency_saved_seconds, 3)
+        }
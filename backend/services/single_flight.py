@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key onto one in-flight computation.
+
+    The first caller for a key starts fn(); callers arriving while it runs
+    await the same task and get the same result or exception. Nothing is
+    kept once it finishes; ResultCache is the layer that remembers results.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._in_flight
+
+    def task(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """The shared task for key, starting fn() if none is running; registers synchronously"""
+
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of fn(), shared with every concurrent caller of key"""
+
+        # Shield so one cancelled caller does not cancel the shared computation
+        return await asyncio.shield(self.task(key, fn))
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "failures": self.failures
+        }
@@ -0,0 +1,215 @@
+import os
+import asyncio
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+from .latex_translator import LatexTranslator
+
+# Worker-side tasks. Expressions cross the process boundary as srepr strings,
+# which round-trip symbols and structure exactly. SymPy is imported inside them
+# (and preloaded by _import_sympy when a worker starts) so the API process does
+# not pay for it on import.
+
+# Per-worker memo of parsed LaTeX
+_translator: Optional[LatexTranslator] = None
+
+def _import_sympy():
+    import sympy  # noqa: F401
+
+def classify_expression(expr) -> str:
+    """Classify the type of mathematical expression"""
+    import sympy as sp
+
+    if expr.is_number:
+        return "constant"
+    elif expr.is_symbol:
+        return "variable"
+    elif expr.is_Add:
+        return "sum"
+    elif expr.is_Mul:
+        return "product"
+    elif expr.is_Pow:
+        return "power"
+    elif expr.has(sp.sin, sp.cos, sp.tan):
+        return "trigonometric"
+    elif expr.has(sp.exp, sp.log):
+        return "exponential"
+    elif expr.is_polynomial():
+        return "polynomial"
+    elif expr.is_rational_function():
+        return "rational"
+    else:
+        return "general"
+
+def _parse(latex: str):
+    global _translator
+    if _translator is None:
+        _translator = LatexTranslator(cache_size=int(os.getenv("SYMPY_PARSE_CACHE_SIZE", "4096")))
+    return _translator.to_sympy(latex)
+
+def parse_and_analyze(latex: str) -> Optional[Dict[str, Any]]:
+    """Parse LaTeX and describe the expression; None if it does not parse.
+
+    Parsing belongs in a worker too: sympify evaluates while it parses, so
+    9^{99999999} is computed in full before anything can look at it.
+    """
+    import sympy as sp
+
+    expr = _parse(latex)
+    if expr is None:
+        return None
+
+    variables = [str(v) for v in expr.free_symbols]
+    special_forms = []
+    if expr.has(sp.sin, sp.cos, sp.tan):
+        special_forms.append("trigonometric")
+    if expr.has(sp.exp, sp.log):
+        special_forms.append("exponential/logarithmic")
+    if expr.has(sp.sqrt):
+        special_forms.append("radical")
+
+    return {
+        "expression": str(expr),
+        "srepr": sp.srepr(expr),
+        "is_atom": expr.is_Atom,
+        "main_variable": sp.srepr(sp.Symbol(variables[0])) if variables else None,
+        "analysis": {
+            "type": classify_expression(expr),
+            "variables": variables,
+            "constants": [str(atom) for atom in expr.atoms() if atom.is_number and not atom.is_symbol],
+            "degree": None,
+            "is_polynomial": expr.is_polynomial(),
+            "is_rational": expr.is_rational_function(),
+            "special_forms": special_forms
+        }
+    }
+
+def parse_equation(left_latex: str, right_latex: str) -> Optional[Dict[str, Any]]:
+    """Parse both sides of an equation; None if either does not parse"""
+    import sympy as sp
+
+    left_expr, right_expr = _parse(left_latex), _parse(right_latex)
+    if left_expr is None or right_expr is None:
+        return None
+
+    equation = sp.Eq(left_expr, right_expr)
+    return {
+        "equation": str(equation),
+        "srepr": sp.srepr(equation),
+        "variables": [(str(v), sp.srepr(v)) for v in equation.free_symbols]
+    }
+
+def cheap_simplify(expr_srepr: str) -> str:
+    """Smallest of expand/cancel/factor - fast transforms that rarely blow up"""
+    import sympy as sp
+
+    expr = sp.sympify(expr_srepr)
+    candidates = [expr]
+    for transform in (sp.expand, sp.cancel, sp.factor):
+        try:
+            candidates.append(transform(expr))
+        except Exception:
+            continue
+    return str(min(candidates, key=sp.count_ops))
+
+def full_simplify(expr_srepr: str) -> str:
+    import sympy as sp
+    return str(sp.simplify(sp.sympify(expr_srepr)))
+
+def polynomial_degree(expr_srepr: str, variable_srepr: str) -> int:
+    import sympy as sp
+    return sp.Poly(sp.sympify(expr_srepr), sp.sympify(variable_srepr)).degree()
+
+def solve_for(equation_srepr: str, variable_srepr: str) -> List[str]:
+    import sympy as sp
+    return [str(s) for s in sp.solve(sp.sympify(equation_srepr), sp.sympify(variable_srepr))]
+
+def _noop():
+    return None
+
+class SymPyWorkerPool:
+    """Process pool for SymPy calls that may run away, with per-call wall-clock limits.
+
+    A call that overruns its timeout cannot be interrupted inside a worker,
+    so the pool is torn down (workers killed) and rebuilt on next use.
+    Calls that were collateral damage of such a reset are retried once.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers or int(os.getenv("SYMPY_WORKERS", "2")))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.completed = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_import_sympy
+            )
+        return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        """Kill the workers of executor and forget it"""
+
+        if self._executor is executor:
+            self._executor = None
+            self.restarts += 1
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: float) -> Any:
+        """Run fn(*args) in a worker; raises asyncio.TimeoutError after timeout seconds"""
+
+        if timeout <= 0:
+            self.timeouts += 1
+            raise asyncio.TimeoutError("SymPy time budget already spent")
+
+        deadline = time.monotonic() + timeout
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(executor, fn, *args),
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+                self.completed += 1
+                return result
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._reset(executor)
+                raise asyncio.TimeoutError(f"SymPy call exceeded {timeout}s")
+            except BrokenProcessPool:
+                # Another call's timeout killed this worker; retry once on a fresh pool
+                self._reset(executor)
+                if attempt == 1:
+                    raise
+
+    async def warm_up(self):
+        """Spawn every worker so the first request does not pay for importing SymPy"""
+
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, _noop) for _ in range(self.workers)))
+
+    async def shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: executor.shutdown(wait=True, cancel_futures=True)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts
+        }
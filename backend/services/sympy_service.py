@@ -1,37 +1,67 @@
-import sympy as sp
-from typing import Dict, Any, List, Optional
-import re
+import os
+import copy
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from .single_flight import SingleFlight
+from .sympy_pool import (SymPyWorkerPool, cheap_simplify, full_simplify, parse_and_analyze, parse_equation,
+                         polynomial_degree, solve_for)
 
 class SymPyService:
     def __init__(self):
-        # Define common symbols
-        self.x, self.y, self.z = sp.symbols('x y z')
-        self.t = sp.symbols('t')
+        # Parsing, analysis, simplify and solve run in worker processes under a
+        # wall-clock budget per call; none of them is safe on the event loop
+        self.pool = SymPyWorkerPool()
+        self.time_budget = float(os.getenv("SYMPY_TIME_BUDGET", "5"))
+        self.cheap_budget = float(os.getenv("SYMPY_CHEAP_BUDGET", "1"))
+        
+        # Concurrent validations of the same LaTeX share one pool job
+        self.single_flight = SingleFlight()
+        
+        # Bounded memo of parse results, so repeated LaTeX skips the pool round trip
+        self.parse_cache_size = int(os.getenv("SYMPY_PARSE_CACHE_SIZE", "4096"))
+        self._parsed: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self.parse_hits = 0
+        self.parse_misses = 0
     
     async def validate_expression(self, latex_expression: str) -> Dict[str, Any]:
         """Validate and analyze mathematical expression using SymPy"""
         
+        return await self.single_flight.do(latex_expression, lambda: self._validate_expression(latex_expression))
+    
+    async def _validate_expression(self, latex_expression: str) -> Dict[str, Any]:
         try:
-            # Convert LaTeX to SymPy expression
-            sympy_expr = self._latex_to_sympy(latex_expression)
+            deadline = time.monotonic() + self.time_budget
             
-            if sympy_expr is None:
+            # Convert LaTeX to SymPy expression and analyze it
+            try:
+                parsed = await self._parse(latex_expression, deadline)
+            except asyncio.TimeoutError:
+                return {
+                    "valid": False,
+                    "error": f"Parsing exceeded the {self.time_budget}s SymPy time budget",
+                    "timed_out": True,
+                    "original_latex": latex_expression
+                }
+            
+            if parsed is None:
                 return {
                     "valid": False,
                     "error": "Could not parse LaTeX expression",
                     "original_latex": latex_expression
                 }
             
-            # Analyze the expression
-            analysis = await self._analyze_expression(sympy_expr, latex_expression)
+            analysis = await self._analyze_expression(parsed, deadline)
             
-            return {
+            result = {
                 "valid": True,
-                "sympy_expression": str(sympy_expr),
-                "simplified": str(sp.simplify(sympy_expr)),
+                "sympy_expression": parsed["expression"],
                 "analysis": analysis,
                 "original_latex": latex_expression
             }
+            result.update(await self._simplify(parsed, deadline))
+            return result
             
         except Exception as e:
             return {
@@ -52,22 +82,29 @@ class SymPyService:
                     "original_latex": latex_equation
                 }
             
+            # Parse both sides and build the equation in a worker, within one shared time budget
+            deadline = time.monotonic() + self.time_budget
             left_side, right_side = latex_equation.split('=', 1)
-            left_expr = self._latex_to_sympy(left_side.strip())
-            right_expr = self._latex_to_sympy(right_side.strip())
+            try:
+                equation = await self.pool.run(parse_equation, left_side.strip(), right_side.strip(),
+                                               timeout=self.time_budget)
+            except asyncio.TimeoutError:
+                return {
+                    "solvable": False,
+                    "error": f"Parsing exceeded the {self.time_budget}s SymPy time budget",
+                    "timed_out": True,
+                    "original_latex": latex_equation
+                }
             
-            if left_expr is None or right_expr is None:
+            if equation is None:
                 return {
                     "solvable": False,
                     "error": "Could not parse equation sides",
                     "original_latex": latex_equation
                 }
             
-            # Create equation
-            equation = sp.Eq(left_expr, right_expr)
-            
             # Find variables to solve for
-            variables = list(equation.free_symbols)
+            variables = equation["variables"]
             
             if not variables:
                 return {
@@ -76,20 +113,31 @@ class SymPyService:
                     "original_latex": latex_equation
                 }
             
-            # Solve for each variable
+            # Solve for each variable with what is left of the budget
             solutions = {}
-            for var in variables:
+            timed_out = False
+            for var, var_srepr in variables:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    solutions[var] = "Timed out"
+                    timed_out = True
+                    continue
                 try:
-                    sol = sp.solve(equation, var)
-                    solutions[str(var)] = [str(s) for s in sol]
-                except:
-                    solutions[str(var)] = "Could not solve"
+                    solutions[var] = await self.pool.run(
+                        solve_for, equation["srepr"], var_srepr, timeout=remaining
+                    )
+                except asyncio.TimeoutError:
+                    solutions[var] = "Timed out"
+                    timed_out = True
+                except Exception:
+                    solutions[var] = "Could not solve"
             
             return {
                 "solvable": True,
-                "equation": str(equation),
-                "variables": [str(v) for v in variables],
+                "equation": equation["equation"],
+                "variables": [var for var, _ in variables],
                 "solutions": solutions,
+                "timed_out": timed_out,
                 "original_latex": latex_equation
             }
             
@@ -100,236 +148,73 @@ class SymPyService:
                 "original_latex": latex_equation
             }
     
-    def _latex_to_sympy(self, latex_expr: str) -> Optional[sp.Expr]:
-        """Convert LaTeX expression to SymPy expression with enhanced error handling"""
-        
-        try:
-            # Clean up the LaTeX
-            expr = latex_expr.strip()
-            
-            # Handle complex array structures - extract meaningful content
-            if '\\begin{array}' in expr:
-                return self._handle_array_expression(expr)
-            
-            # Handle overline notation
-            expr = re.sub(r'\\overline\{([^}]+)\}', r'\1', expr)
-            
-            # Handle calligraphic fonts
-            expr = re.sub(r'\\cal\{([^}]+)\}', r'\1', expr)
-            
-            # Handle angle brackets (inner products)
-            expr = re.sub(r'\\langle([^\\]+)\\rangle', r'(\1)', expr)
-            
-            # Handle common LaTeX patterns
-            # Fractions: \frac{a}{b} -> a/b
-            expr = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'(\1)/(\2)', expr)
-            
-            # Powers: x^{n} -> x**n, x^n -> x**n
-            expr = re.sub(r'\^\{([^}]+)\}', r'**(\1)', expr)
-            expr = re.sub(r'\^([a-zA-Z0-9])', r'**\1', expr)
-            
-            # Square roots: \sqrt{x} -> sqrt(x)
-            expr = re.sub(r'\\sqrt\{([^}]+)\}', r'sqrt(\1)', expr)
-            
-            # Subscripts: x_{n} -> x_n (keep for variable names)
-            expr = re.sub(r'_\{([^}]+)\}', r'_\1', expr)
-            
-            # Greek letters - convert to English equivalents
-            greek_map = {
-                r'\\gamma': 'gamma', r'\\alpha': 'alpha', r'\\beta': 'beta',
-                r'\\delta': 'delta', r'\\epsilon': 'epsilon', r'\\varepsilon': 'epsilon',
-                r'\\lambda': 'lambda', r'\\mu': 'mu', r'\\nu': 'nu',
-                r'\\pi': 'pi', r'\\theta': 'theta', r'\\sigma': 'sigma'
-            }
-            for latex_greek, english in greek_map.items():
-                expr = re.sub(latex_greek, english, expr)
-            
-            # Integrals: \int -> (remove for now, handle separately)
-            expr = re.sub(r'\\int(_\{[^}]+\})?\^?\{?[^}]*\}?', '', expr)
-            expr = re.sub(r'\\,?\s*dx?', '', expr)
-            
-            # Trigonometric functions
-            expr = re.sub(r'\\sin', 'sin', expr)
-            expr = re.sub(r'\\cos', 'cos', expr)
-            expr = re.sub(r'\\tan', 'tan', expr)
-            
-            # Logarithms
-            expr = re.sub(r'\\log', 'log', expr)
-            expr = re.sub(r'\\ln', 'ln', expr)
-            
-            # Sum notation
-            expr = re.sub(r'\\sum(_\{[^}]+\})?\^?\{?[^}]*\}?', 'sum', expr)
-            
-            # Remove remaining LaTeX commands
-            expr = re.sub(r'\\[a-zA-Z]+', '', expr)
-            
-            # Clean up spaces and formatting
-            expr = expr.replace(' ', '')
-            expr = expr.replace('{', '(').replace('}', ')')
-            
-            # Handle special characters that might cause issues
-            expr = re.sub(r'[^\w\d\+\-\*\/\(\)\.\=\,\_]', '', expr)
-            
-            # If expression is too complex or empty, return a simple placeholder
-            if len(expr) < 2 or len(expr) > 200:
-                return sp.Symbol('complex_expression')
-            
-            # Parse with SymPy
-            return sp.sympify(expr)
-            
-        except Exception as e:
-            # Return a symbolic representation for complex expressions
-            print(f"LaTeX parsing failed: {e}")
-            return sp.Symbol('unparseable_expression')
-    
-    def _handle_array_expression(self, latex_expr: str) -> sp.Expr:
-        """Handle LaTeX array expressions by extracting meaningful mathematical content"""
-        
-        try:
-            # Extract content between array delimiters
-            array_content = re.search(r'\\begin\{array\}.*?\\end\{array\}', latex_expr, re.DOTALL)
-            if not array_content:
-                return sp.Symbol('array_expression')
-            
-            content = array_content.group(0)
-            
-            # Remove array structure commands
-            content = re.sub(r'\\begin\{array\}\{[^}]*\}', '', content)
-            content = re.sub(r'\\end\{array\}', '', content)
-            
-            # Split by row separators and extract meaningful expressions
-            rows = content.split('\\\\')
-            expressions = []
-            
-            for row in rows:
-                # Split by column separators
-                cells = re.split(r'&', row)
-                for cell in cells:
-                    cell = cell.strip()
-                    if cell and len(cell) > 2:
-                        # Clean up cell content
-                        cell = re.sub(r'\{+', '{', cell)
-                        cell = re.sub(r'\}+', '}', cell)
-                        
-                        # Extract mathematical expressions (ignore pure formatting)
-                        if any(char in cell for char in '+-*/^=()[]'):
-                            expressions.append(cell)
-            
-            # If we found expressions, try to parse the first meaningful one
-            for expr in expressions:
-                try:
-                    cleaned = self._clean_expression_for_parsing(expr)
-                    if cleaned and len(cleaned) > 1:
-                        return sp.sympify(cleaned)
-                except:
-                    continue
-            
-            # Fallback to symbolic representation
-            return sp.Symbol('complex_array_expression')
-            
-        except Exception as e:
-            print(f"Array parsing failed: {e}")
-            return sp.Symbol('array_expression')
-    
-    def _clean_expression_for_parsing(self, expr: str) -> str:
-        """Clean expression for SymPy parsing"""
-        
-        # Remove complex LaTeX formatting
-        expr = re.sub(r'\\overline\{([^}]+)\}', r'\1', expr)
-        expr = re.sub(r'\\cal\{([^}]+)\}', r'\1', expr)
-        expr = re.sub(r'\\langle([^\\]+)\\rangle', r'(\1)', expr)
-        
-        # Handle fractions
-        expr = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'(\1)/(\2)', expr)
+    async def _simplify(self, parsed: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        """Cheap transforms first, then full simplify with whatever budget is left"""
         
-        # Handle powers
-        expr = re.sub(r'\^\{([^}]+)\}', r'**(\1)', expr)
-        expr = re.sub(r'\^([a-zA-Z0-9])', r'**\1', expr)
+        if parsed["is_atom"]:
+            return {"simplified": parsed["expression"], "simplify_strategy": "none", "timed_out": False}
         
-        # Handle subscripts (convert to variable names)
-        expr = re.sub(r'([a-zA-Z]+)_\{([^}]+)\}', r'\1_\2', expr)
-        expr = re.sub(r'([a-zA-Z]+)_([a-zA-Z0-9])', r'\1_\2', expr)
+        expr_srepr = parsed["srepr"]
         
-        # Convert Greek letters
-        greek_map = {
-            r'\\gamma': 'gamma', r'\\alpha': 'alpha', r'\\beta': 'beta',
-            r'\\delta': 'delta', r'\\epsilon': 'epsilon', r'\\varepsilon': 'epsilon',
-            r'\\lambda': 'lambda', r'\\mu': 'mu', r'\\nu': 'nu',
-            r'\\pi': 'pi', r'\\theta': 'theta', r'\\sigma': 'sigma'
-        }
-        for latex_greek, english in greek_map.items():
-            expr = re.sub(latex_greek, english, expr)
-        
-        # Remove remaining LaTeX commands
-        expr = re.sub(r'\\[a-zA-Z]+', '', expr)
+        try:
+            remaining = deadline - time.monotonic()
+            cheap = await self.pool.run(cheap_simplify, expr_srepr, timeout=min(self.cheap_budget, remaining))
+        except asyncio.TimeoutError:
+            return {"simplified": parsed["expression"], "simplify_strategy": "none", "timed_out": True}
         
-        # Clean up formatting
-        expr = expr.replace('{', '(').replace('}', ')')
-        expr = re.sub(r'[^\w\d\+\-\*\/\(\)\.\=\,\_]', '', expr)
-        expr = expr.replace(' ', '')
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return {"simplified": cheap, "simplify_strategy": "cheap", "timed_out": True}
         
-        return expr
+        try:
+            full = await self.pool.run(full_simplify, expr_srepr, timeout=remaining)
+            return {"simplified": full, "simplify_strategy": "simplify", "timed_out": False}
+        except asyncio.TimeoutError:
+            return {"simplified": cheap, "simplify_strategy": "cheap", "timed_out": True}
     
-    async def _analyze_expression(self, expr: sp.Expr, original_latex: str) -> Dict[str, Any]:
-        """Analyze SymPy expression for mathematical properties"""
-        
-        analysis = {
-            "type": self._classify_expression(expr),
-            "variables": [str(v) for v in expr.free_symbols],
-            "constants": [],
-            "degree": None,
-            "is_polynomial": expr.is_polynomial(),
-            "is_rational": expr.is_rational_function(),
-        }
+    async def warm_up(self):
+        """Start SymPy worker processes, which import SymPy as they start"""
+        await self.pool.warm_up()
+    
+    async def shutdown(self):
+        """Stop SymPy worker processes"""
+        await self.pool.shutdown()
+    
+    async def _parse(self, latex_expr: str, deadline: float) -> Optional[Dict[str, Any]]:
+        """Parse and describe LaTeX in a worker (memoized); raises asyncio.TimeoutError past deadline"""
+        
+        if latex_expr in self._parsed:
+            self._parsed.move_to_end(latex_expr)
+            self.parse_hits += 1
+            return self._parsed[latex_expr]
+        
+        self.parse_misses += 1
+        parsed = await self.pool.run(parse_and_analyze, latex_expr, timeout=deadline - time.monotonic())
+        self._parsed[latex_expr] = parsed
+        if len(self._parsed) > self.parse_cache_size:
+            self._parsed.popitem(last=False)
+        return parsed
+    
+    def parse_cache_stats(self) -> Dict[str, Any]:
+        return {"hits": self.parse_hits, "misses": self.parse_misses, "size": len(self._parsed),
+                "max_size": self.parse_cache_size}
+    
+    async def _analyze_expression(self, parsed: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        """Analysis of the parsed expression, plus the degree of polynomials"""
         
-        # Get numeric constants
-        for atom in expr.atoms():
-            if atom.is_number and not atom.is_symbol:
-                analysis["constants"].append(str(atom))
+        # Copied: the memoized parse result is shared between validations
+        analysis = copy.deepcopy(parsed["analysis"])
         
-        # For polynomials, get degree
-        if analysis["is_polynomial"] and analysis["variables"]:
+        # For polynomials, get degree (expands the polynomial, so bounded in a worker)
+        if analysis["is_polynomial"] and parsed["main_variable"] is not None:
             try:
-                main_var = sp.Symbol(analysis["variables"][0])
-                poly = sp.Poly(expr, main_var)
-                analysis["degree"] = poly.degree()
-            except:
+                analysis["degree"] = await self.pool.run(
+                    polynomial_degree, parsed["srepr"], parsed["main_variable"],
+                    timeout=deadline - time.monotonic()
+                )
+            except asyncio.TimeoutError:
+                analysis["timed_out"] = True
+            except Exception:
                 pass
         
-        # Check for special forms
-        analysis["special_forms"] = []
-        
-        if expr.has(sp.sin, sp.cos, sp.tan):
-            analysis["special_forms"].append("trigonometric")
-        
-        if expr.has(sp.exp, sp.log):
-            analysis["special_forms"].append("exponential/logarithmic")
-        
-        if expr.has(sp.sqrt):
-            analysis["special_forms"].append("radical")
-        
         return analysis
-    
-    def _classify_expression(self, expr: sp.Expr) -> str:
-        """Classify the type of mathematical expression"""
-        
-        if expr.is_number:
-            return "constant"
-        elif expr.is_symbol:
-            return "variable"
-        elif expr.is_Add:
-            return "sum"
-        elif expr.is_Mul:
-            return "product"
-        elif expr.is_Pow:
-            return "power"
-        elif expr.has(sp.sin, sp.cos, sp.tan):
-            return "trigonometric"
-        elif expr.has(sp.exp, sp.log):
-            return "exponential"
-        elif expr.is_polynomial():
-            return "polynomial"
-        elif expr.is_rational_function():
-            return "rational"
-        else:
-            return "general"
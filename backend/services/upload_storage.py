@@ -0,0 +1,138 @@
+import os
+import uuid
+import hashlib
+import aiofiles
+import aiofiles.os
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+class UploadStorage:
+    """Streams uploaded files to disk in chunks with per-file and per-request byte limits.
+
+    Each file is written to a `.part` name, hashed (SHA-256) as it is written
+    and renamed into place only once complete, so the pipeline never sees a
+    partial file. Exceeding a limit aborts with 413 and removes everything
+    the request has written.
+    """
+
+    def __init__(self, upload_dir: Optional[str] = None, max_file_size: Optional[int] = None,
+                 max_request_size: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.upload_dir = upload_dir or os.getenv("UPLOAD_DIR", "uploads")
+        self.max_file_size = max_file_size or int(os.getenv("MAX_FILE_SIZE", str(10 * 1024 * 1024)))
+        self.max_request_size = max_request_size or int(os.getenv("MAX_UPLOAD_REQUEST_SIZE", str(50 * 1024 * 1024)))
+        self.chunk_size = chunk_size or int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+        os.makedirs(self.upload_dir, exist_ok=True)
+
+        self.files_saved = 0
+        self.bytes_saved = 0
+        self.rejected = 0
+
+    async def save_all(self, files: List[UploadFile], job_id: str) -> List[Dict[str, Any]]:
+        """Save a request's files as {job_id}_{i}.{ext}; all or nothing"""
+
+        for file in files:
+            if not (file.content_type or "").startswith('image/'):
+                raise HTTPException(status_code=400, detail=f"File {file.filename} is not an image")
+            # Size is known once the multipart body is parsed; reject before copying anything
+            if file.size is not None and file.size > self.max_file_size:
+                self.rejected += 1
+                raise HTTPException(status_code=413, detail=f"File {file.filename} exceeds {self.max_file_size} bytes")
+
+        saved = []
+        budget = self.max_request_size
+        try:
+            for i, file in enumerate(files):
+                file_extension = file.filename.split('.')[-1]
+                filename = f"{job_id}_{i}.{file_extension}"
+                saved.append(await self._save(file, filename, budget))
+                budget -= saved[-1]["size"]
+        except BaseException:
+            await self.discard([entry["file_path"] for entry in saved])
+            raise
+
+        self.files_saved += len(saved)
+        self.bytes_saved += sum(entry["size"] for entry in saved)
+        return saved
+
+    async def _save(self, file: UploadFile, filename: str, budget: int) -> Dict[str, Any]:
+        file_path = f"{self.upload_dir}/{filename}"
+        part_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        limit = min(self.max_file_size, budget)
+
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(part_path, "wb") as buffer:
+                while chunk := await file.read(self.chunk_size):
+                    size += len(chunk)
+                    if size > limit:
+                        self.rejected += 1
+                        if limit == self.max_file_size:
+                            detail = f"File {file.filename} exceeds {self.max_file_size} bytes"
+                        else:
+                            detail = f"Upload exceeds {self.max_request_size} bytes"
+                        raise HTTPException(status_code=413, detail=detail)
+                    sha256.update(chunk)
+                    await buffer.write(chunk)
+            await aiofiles.os.replace(part_path, file_path)
+        except BaseException:
+            await self.discard([part_path])
+            raise
+
+        return {"filename": filename, "file_path": file_path, "content_hash": sha256.hexdigest(), "size": size}
+
+    async def discard(self, paths: List[str]):
+        for path in paths:
+            try:
+                await aiofiles.os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "files_saved": self.files_saved,
+            "bytes_saved": self.bytes_saved,
+            "rejected": self.rejected,
+            "max_file_size": self.max_file_size,
+            "max_request_size": self.max_request_size
+        }
+
+class RequestSizeLimit:
+    """ASGI middleware that stops reading request bodies on `paths` past max_bytes.
+
+    A declared Content-Length over the limit is refused with 413 before any
+    of the body is read; otherwise the body is counted as it streams in, so
+    multipart parsing aborts as soon as the limit is crossed instead of
+    spooling the whole request to disk first.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: tuple = ("/upload",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse({"detail": f"Request body exceeds {self.max_bytes} bytes"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the endpoint's body parsing, so FastAPI answers 413
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {self.max_bytes} bytes")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,54 @@
+"""SymPy validation stays within its time budget, off the event loop.
+
+Run from the backend directory:
+
+    python -m unittest discover -s tests -t .
+"""
+import asyncio
+import time
+import unittest
+
+from services.sympy_service import SymPyService
+
+class ValidateExpressionTimeoutTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = SymPyService()
+        self.service.time_budget = 1.0
+        await self.service.warm_up()
+
+    async def asyncTearDown(self):
+        await self.service.shutdown()
+
+    async def test_huge_exponent_returns_timeout_error(self):
+        # sympify evaluates 9**99999999 while parsing; that must not block the loop
+        longest_gap = 0.0
+
+        async def ticker():
+            nonlocal longest_gap
+            while True:
+                before = time.monotonic()
+                await asyncio.sleep(0.01)
+                longest_gap = max(longest_gap, time.monotonic() - before)
+
+        ticks = asyncio.create_task(ticker())
+        start = time.monotonic()
+        try:
+            result = await self.service.validate_expression("9^{99999999}")
+        finally:
+            ticks.cancel()
+
+        self.assertFalse(result["valid"])
+        self.assertTrue(result["timed_out"])
+        self.assertIn("time budget", result["error"])
+        self.assertLess(time.monotonic() - start, 3.0)
+        self.assertLess(longest_gap, 0.5)
+
+    async def test_pool_recovers_after_timeout(self):
+        await self.service.validate_expression("9^{99999999}")
+
+        result = await self.service.validate_expression("x^{2} - 4")
+        self.assertTrue(result["valid"])
+        self.assertEqual(result["analysis"]["degree"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import signal
+import asyncio
+
+from db.database import engine
+from db.models import Base
+from db.write_queue import WriteQueue
+from services.ocr_service import OCRService
+from services.llm_service import LLMService
+from services.sympy_service import SymPyService
+from services.lesson_builder import LessonBuilder
+from services.job_queue import JobWorker
+
+async def main():
+    """Standalone job worker: claims queued jobs until SIGINT/SIGTERM"""
+
+    Base.metadata.create_all(bind=engine)
+
+    ocr_service = OCRService()
+    llm_service = LLMService()
+    sympy_service = SymPyService()
+    lesson_builder = LessonBuilder(ocr_service, llm_service, sympy_service)
+    write_queue = WriteQueue()
+    job_worker = JobWorker(lesson_builder, write_queue=write_queue)
+
+    if os.getenv("OCR_WARMUP", "true").lower() == "true":
+        await ocr_service.warm_up()
+    await sympy_service.warm_up()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, job_worker.stop)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+    print(f"Worker {job_worker.queue.worker_id} started ({job_worker.concurrency} concurrent jobs)")
+    try:
+        await job_worker.run()
+    finally:
+        await lesson_builder.shutdown()
+        await write_queue.close()
+        await ocr_service.shutdown()
+        await llm_service.shutdown()
+        await sympy_service.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -11,13 +11,69 @@ interface ImageFile {
 interface ImageUploadProps {
   onFilesChange: (files: ImageFile[]) => void;
   maxFiles?: number;
+  // Longest side in pixels before upload; 0 keeps originals. Matches the backend's OCR_MAX_DIMENSION.
+  maxDimension?: number;
 }
 
-const ImageUpload: React.FC<ImageUploadProps> = ({ onFilesChange, maxFiles = 5 }) => {
+const DEFAULT_MAX_DIMENSION = Number(process.env.REACT_APP_UPLOAD_MAX_DIMENSION || 2048);
+
+// Downscale a photo in the browser so 12-48 MP originals don't cost upload bandwidth
+// and server CPU; returns the original file when it is already small enough or on failure.
+const downscaleImage = async (file: File, maxDimension: number): Promise<File> => {
+  if (!maxDimension || file.type === 'image/gif') {
+    return file;
+  }
+
+  try {
+    const bitmap = await createImageBitmap(file);
+    const scale = maxDimension / Math.max(bitmap.width, bitmap.height);
+    if (scale >= 1) {
+      bitmap.close();
+      return file;
+    }
+
+    const canvas = document.createElement('canvas');
+    canvas.width = Math.round(bitmap.width * scale);
+    canvas.height = Math.round(bitmap.height * scale);
+    const context = canvas.getContext('2d');
+    if (!context) {
+      bitmap.close();
+      return file;
+    }
+    context.imageSmoothingQuality = 'high';
+    context.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+    bitmap.close();
+
+    // PNG screenshots stay lossless; photos are re-encoded as JPEG
+    const type = file.type === 'image/png' ? 'image/png' : 'image/jpeg';
+    const blob = await new Promise<Blob | null>(resolve => canvas.toBlob(resolve, type, 0.92));
+    if (!blob || blob.size >= file.size) {
+      return file;
+    }
+
+    const name = type === 'image/jpeg' ? file.name.replace(/\.[^.]+$/, '') + '.jpg' : file.name;
+    return new File([blob], name, { type, lastModified: file.lastModified });
+  } catch {
+    return file;
+  }
+};
+
+const ImageUpload: React.FC<ImageUploadProps> = ({
+  onFilesChange,
+  maxFiles = 5,
+  maxDimension = DEFAULT_MAX_DIMENSION
+}) => {
   const [files, setFiles] = useState<ImageFile[]>([]);
+  const [isResizing, setIsResizing] = useState(false);
+
+  const onDrop = useCallback(async (acceptedFiles: File[]) => {
+    setIsResizing(true);
+    const resized = await Promise.all(
+      acceptedFiles.slice(0, maxFiles - files.length).map(file => downscaleImage(file, maxDimension))
+    );
+    setIsResizing(false);
 
-  const onDrop = useCallback((acceptedFiles: File[]) => {
-    const newFiles = acceptedFiles.map(file => ({
+    const newFiles = resized.map(file => ({
       file,
       preview: URL.createObjectURL(file),
       tag: ''
@@ -26,7 +82,7 @@ const ImageUpload: React.FC<ImageUploadProps> = ({ onFilesChange, maxFiles = 5 }
     const updatedFiles = [...files, ...newFiles].slice(0, maxFiles);
     setFiles(updatedFiles);
     onFilesChange(updatedFiles);
-  }, [files, maxFiles, onFilesChange]);
+  }, [files, maxFiles, maxDimension, onFilesChange]);
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     onDrop,
@@ -34,7 +90,7 @@ const ImageUpload: React.FC<ImageUploadProps> = ({ onFilesChange, maxFiles = 5 }
       'image/*': ['.jpeg', '.jpg', '.png', '.gif', '.bmp', '.webp']
     },
     maxFiles: maxFiles - files.length,
-    disabled: files.length >= maxFiles
+    disabled: files.length >= maxFiles || isResizing
   });
 
   const removeFile = (index: number) => {
@@ -68,7 +124,9 @@ const ImageUpload: React.FC<ImageUploadProps> = ({ onFilesChange, maxFiles = 5 }
         <input {...getInputProps()} />
         <CloudArrowUpIcon className="mx-auto h-12 w-12 text-gray-400 mb-4" />
         
-        {isDragActive ? (
+        {isResizing ? (
+          <p className="text-primary-600 font-medium">Optimizing images...</p>
+        ) : isDragActive ? (
           <p className="text-primary-600 font-medium">Drop the images here...</p>
         ) : (
           <div>
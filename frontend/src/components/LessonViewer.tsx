@@ -6,24 +6,26 @@ interface LessonStep {
   step_id: string;
   image_index: number;
   latex: string;
-  step_type: string;
+  // Missing while the explanation is still streaming (see StatusPage)
+  step_type?: string;
   explanation: {
-    problem_type: string;
+    problem_type?: string;
     steps: Array<{
       step_number: number;
       description: string;
       latex: string;
       explanation: string;
     }>;
-    key_concepts: string[];
-    common_mistakes: string[];
-    final_answer: string;
+    key_concepts?: string[];
+    common_mistakes?: string[];
+    final_answer?: string;
   };
   validation: {
     valid: boolean;
     simplified?: string;
     error?: string;
   };
+  complete?: boolean;
 }
 
 interface LessonData {
@@ -36,13 +38,16 @@ interface LessonData {
 
 interface LessonViewerProps {
   lesson: LessonData;
+  // Steps are still arriving: show what is there and mark explanations in progress
+  streaming?: boolean;
 }
 
-const LessonViewer: React.FC<LessonViewerProps> = ({ lesson }) => {
+const LessonViewer: React.FC<LessonViewerProps> = ({ lesson, streaming = false }) => {
   const [currentStepIndex, setCurrentStepIndex] = useState(0);
   const [expandedSections, setExpandedSections] = useState<Set<string>>(new Set(['explanation']));
 
-  const currentStep = lesson.steps[currentStepIndex];
+  const currentStep = lesson.steps[Math.min(currentStepIndex, lesson.steps.length - 1)];
+  const stepInProgress = streaming && currentStep.complete === false;
 
   const toggleSection = (section: string) => {
     const newExpanded = new Set(expandedSections);
@@ -81,9 +86,11 @@ const LessonViewer: React.FC<LessonViewerProps> = ({ lesson }) => {
             <div className="text-sm text-gray-500">
               Step {currentStepIndex + 1} of {lesson.total_steps}
             </div>
-            <div className="text-xs text-gray-400 mt-1">
-              {currentStep.step_type.replace('_', ' ').toUpperCase()}
-            </div>
+            {currentStep.step_type && (
+              <div className="text-xs text-gray-400 mt-1">
+                {currentStep.step_type.replace('_', ' ').toUpperCase()}
+              </div>
+            )}
           </div>
         </div>
       </div>
@@ -167,10 +174,12 @@ const LessonViewer: React.FC<LessonViewerProps> = ({ lesson }) => {
           
           {expandedSections.has('explanation') && (
             <div className="px-6 pb-6 space-y-4">
-              <div className="bg-blue-50 rounded-lg p-4">
-                <h3 className="font-medium text-blue-900 mb-2">Problem Type</h3>
-                <p className="text-blue-800">{currentStep.explanation.problem_type}</p>
-              </div>
+              {currentStep.explanation.problem_type && (
+                <div className="bg-blue-50 rounded-lg p-4">
+                  <h3 className="font-medium text-blue-900 mb-2">Problem Type</h3>
+                  <p className="text-blue-800">{currentStep.explanation.problem_type}</p>
+                </div>
+              )}
               
               <div className="space-y-4">
                 {currentStep.explanation.steps.map((step, index) => (
@@ -189,64 +198,75 @@ const LessonViewer: React.FC<LessonViewerProps> = ({ lesson }) => {
                     </div>
                   </div>
                 ))}
+                
+                {stepInProgress && (
+                  <div className="flex items-center space-x-3 pl-5 text-sm text-gray-500">
+                    <div className="w-4 h-4 border-2 border-primary-500 border-t-transparent rounded-full animate-spin" />
+                    <span>Writing the next step...</span>
+                  </div>
+                )}
               </div>
               
               {/* Final Answer */}
-              <div className="bg-green-50 rounded-lg p-4">
-                <h3 className="font-medium text-green-900 mb-2">Final Answer</h3>
-                <MathRenderer latex={currentStep.explanation.final_answer} />
-              </div>
+              {currentStep.explanation.final_answer && (
+                <div className="bg-green-50 rounded-lg p-4">
+                  <h3 className="font-medium text-green-900 mb-2">Final Answer</h3>
+                  <MathRenderer latex={currentStep.explanation.final_answer} />
+                </div>
+              )}
             </div>
           )}
         </div>
 
-        {/* Key Concepts */}
-        <div className="bg-white rounded-lg border border-gray-200">
-          <button
-            onClick={() => toggleSection('concepts')}
-            className="w-full flex items-center justify-between p-6 text-left"
-          >
-            <div className="flex items-center space-x-3">
-              <LightBulbIcon className="h-5 w-5 text-yellow-600" />
-              <h2 className="text-lg font-semibold text-gray-900">Key Concepts</h2>
-            </div>
-            <ChevronRightIcon 
-              className={`h-5 w-5 text-gray-400 transform transition-transform ${
-                expandedSections.has('concepts') ? 'rotate-90' : ''
-              }`}
-            />
-          </button>
+        {/* Key Concepts (arrive with the end of the explanation) */}
+        {!stepInProgress && (
+          <div className="bg-white rounded-lg border border-gray-200">
+            <button
+              onClick={() => toggleSection('concepts')}
+              className="w-full flex items-center justify-between p-6 text-left"
+            >
+              <div className="flex items-center space-x-3">
+                <LightBulbIcon className="h-5 w-5 text-yellow-600" />
+                <h2 className="text-lg font-semibold text-gray-900">Key Concepts</h2>
+              </div>
+              <ChevronRightIcon 
+                className={`h-5 w-5 text-gray-400 transform transition-transform ${
+                  expandedSections.has('concepts') ? 'rotate-90' : ''
+                }`}
+              />
+            </button>
           
-          {expandedSections.has('concepts') && (
-            <div className="px-6 pb-6">
-              <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
-                <div>
-                  <h3 className="font-medium text-gray-900 mb-3">Important Concepts</h3>
-                  <ul className="space-y-2">
-                    {currentStep.explanation.key_concepts.map((concept, index) => (
-                      <li key={index} className="flex items-center space-x-2">
-                        <div className="w-2 h-2 bg-yellow-500 rounded-full"></div>
-                        <span className="text-gray-700">{concept}</span>
-                      </li>
-                    ))}
-                  </ul>
-                </div>
+            {expandedSections.has('concepts') && (
+              <div className="px-6 pb-6">
+                <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+                  <div>
+                    <h3 className="font-medium text-gray-900 mb-3">Important Concepts</h3>
+                    <ul className="space-y-2">
+                      {(currentStep.explanation.key_concepts ?? []).map((concept, index) => (
+                        <li key={index} className="flex items-center space-x-2">
+                          <div className="w-2 h-2 bg-yellow-500 rounded-full"></div>
+                          <span className="text-gray-700">{concept}</span>
+                        </li>
+                      ))}
+                    </ul>
+                  </div>
                 
-                <div>
-                  <h3 className="font-medium text-gray-900 mb-3">Common Mistakes</h3>
-                  <ul className="space-y-2">
-                    {currentStep.explanation.common_mistakes.map((mistake, index) => (
-                      <li key={index} className="flex items-start space-x-2">
-                        <ExclamationTriangleIcon className="h-4 w-4 text-red-500 mt-0.5 flex-shrink-0" />
-                        <span className="text-gray-700 text-sm">{mistake}</span>
-                      </li>
-                    ))}
-                  </ul>
+                  <div>
+                    <h3 className="font-medium text-gray-900 mb-3">Common Mistakes</h3>
+                    <ul className="space-y-2">
+                      {(currentStep.explanation.common_mistakes ?? []).map((mistake, index) => (
+                        <li key={index} className="flex items-start space-x-2">
+                          <ExclamationTriangleIcon className="h-4 w-4 text-red-500 mt-0.5 flex-shrink-0" />
+                          <span className="text-gray-700 text-sm">{mistake}</span>
+                        </li>
+                      ))}
+                    </ul>
+                  </div>
                 </div>
               </div>
-            </div>
-          )}
-        </div>
+            )}
+          </div>
+        )}
       </div>
     </div>
   );
@@ -6,6 +6,8 @@ interface ProcessingStatusProps {
   ocrDone: boolean;
   llmDone: boolean;
   lessonBuilt: boolean;
+  percentComplete?: number;
+  etaSeconds?: number | null;
   error?: string;
 }
 
@@ -14,6 +16,8 @@ const ProcessingStatus: React.FC<ProcessingStatusProps> = ({
   ocrDone,
   llmDone,
   lessonBuilt,
+  percentComplete,
+  etaSeconds,
   error
 }) => {
   const steps = [
@@ -21,7 +25,7 @@ const ProcessingStatus: React.FC<ProcessingStatusProps> = ({
       name: 'Image Processing & OCR',
       description: 'Extracting mathematical content from images',
       completed: ocrDone,
-      current: status === 'processing' && !ocrDone
+      current: (status === 'queued' || status === 'processing') && !ocrDone
     },
     {
       name: 'Mathematical Analysis',
@@ -37,6 +41,9 @@ const ProcessingStatus: React.FC<ProcessingStatusProps> = ({
     }
   ];
 
+  // Prefer the backend's per-image progress; fall back to counting finished steps
+  const percent = percentComplete ?? (steps.filter(s => s.completed).length / steps.length) * 100;
+
   if (error) {
     return (
       <div className="bg-red-50 border border-red-200 rounded-lg p-6">
@@ -94,12 +101,15 @@ const ProcessingStatus: React.FC<ProcessingStatusProps> = ({
       <div className="mt-6">
         <div className="flex justify-between text-sm text-gray-600 mb-2">
           <span>Progress</span>
-          <span>{Math.round((steps.filter(s => s.completed).length / steps.length) * 100)}%</span>
+          <span>
+            {Math.round(percent)}%
+            {etaSeconds != null && etaSeconds > 0 && ` · about ${Math.ceil(etaSeconds)}s left`}
+          </span>
         </div>
         <div className="w-full bg-gray-200 rounded-full h-2">
           <div 
             className="bg-primary-600 h-2 rounded-full transition-all duration-300"
-            style={{ width: `${(steps.filter(s => s.completed).length / steps.length) * 100}%` }}
+            style={{ width: `${percent}%` }}
           />
         </div>
       </div>
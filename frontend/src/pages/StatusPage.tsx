@@ -1,7 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import ProcessingStatus from '../components/ProcessingStatus';
-import { getJobStatus } from '../services/api';
+import LessonViewer from '../components/LessonViewer';
+import { getJobStatus, subscribeJobStatus, PartialLessonStep } from '../services/api';
 import { ArrowRightIcon, ArrowLeftIcon } from '@heroicons/react/24/outline';
 
 interface JobStatus {
@@ -13,6 +14,11 @@ interface JobStatus {
   lesson_built: boolean;
   lesson_id?: string;
   error?: string;
+  current_stage?: string | null;
+  images_total?: number;
+  percent_complete?: number;
+  eta_seconds?: number | null;
+  partial_steps?: PartialLessonStep[];
 }
 
 const StatusPage: React.FC = () => {
@@ -29,7 +35,12 @@ const StatusPage: React.FC = () => {
       return;
     }
 
+    let cancelled = false;
+    let closeStream: (() => void) | null = null;
+    let pollTimer: ReturnType<typeof setTimeout> | null = null;
+
     const pollStatus = async () => {
+      if (cancelled) return;
       try {
         const status = await getJobStatus(jobId);
         setJobStatus(status);
@@ -49,7 +60,7 @@ const StatusPage: React.FC = () => {
 
         // Continue polling if still processing
         if (status.status !== 'completed') {
-          setTimeout(pollStatus, 2000); // Poll every 2 seconds
+          pollTimer = setTimeout(pollStatus, 2000); // Poll every 2 seconds
         } else {
           setLoading(false);
         }
@@ -59,7 +70,33 @@ const StatusPage: React.FC = () => {
       }
     };
 
-    pollStatus();
+    // Prefer pushed updates; poll when EventSource is unavailable or the stream fails
+    if (typeof EventSource === 'undefined') {
+      pollStatus();
+    } else {
+      closeStream = subscribeJobStatus(
+        jobId,
+        (update) => {
+          if (cancelled) return;
+          setJobStatus(prev => ({ ...prev, ...update } as JobStatus));
+          setError(null);
+          if (update.status === 'completed' || update.status === 'error') {
+            setLoading(false);
+            closeStream?.();
+          }
+        },
+        () => {
+          closeStream = null;
+          pollStatus();
+        }
+      );
+    }
+
+    return () => {
+      cancelled = true;
+      closeStream?.();
+      if (pollTimer) clearTimeout(pollTimer);
+    };
   }, [jobId]);
 
   const handleViewLesson = () => {
@@ -105,10 +142,25 @@ const StatusPage: React.FC = () => {
           ocrDone={jobStatus.ocr_done}
           llmDone={jobStatus.llm_done}
           lessonBuilt={jobStatus.lesson_built}
+          percentComplete={jobStatus.percent_complete}
+          etaSeconds={jobStatus.eta_seconds}
           error={jobStatus.error}
         />
       )}
 
+      {/* Explanations so far, streamed step by step while the rest of the lesson is generated */}
+      {jobStatus?.partial_steps && jobStatus.partial_steps.length > 0 && jobStatus.status !== 'error' && (
+        <LessonViewer
+          lesson={{
+            lesson_id: jobStatus.job_id,
+            title: 'Lesson preview',
+            total_steps: jobStatus.partial_steps.length,
+            steps: jobStatus.partial_steps
+          }}
+          streaming={jobStatus.status !== 'completed'}
+        />
+      )}
+
       {/* Loading State */}
       {loading && !jobStatus && (
         <div className="bg-white rounded-lg border border-gray-200 p-8 text-center">
@@ -54,6 +54,36 @@ export interface JobStatusResponse {
   lesson_built: boolean;
   lesson_id?: string;
   error?: string;
+  current_stage?: string | null;
+  images_total?: number;
+  percent_complete?: number;
+  eta_seconds?: number | null;
+  partial_steps?: PartialLessonStep[];
+}
+
+// A lesson step as its explanation streams in; `complete` once the whole explanation arrived
+export interface PartialLessonStep {
+  step_id: string;
+  image_index: number;
+  latex: string;
+  validation: {
+    valid: boolean;
+    simplified?: string;
+    error?: string;
+  };
+  explanation: {
+    problem_type?: string;
+    steps: Array<{
+      step_number: number;
+      description: string;
+      latex: string;
+      explanation: string;
+    }>;
+    key_concepts?: string[];
+    common_mistakes?: string[];
+    final_answer?: string;
+  };
+  complete: boolean;
 }
 
 export interface LessonResponse {
@@ -80,6 +110,28 @@ export const getJobStatus = async (jobId: string): Promise<JobStatusResponse> =>
   return response.data;
 };
 
+// Server-Sent Events push of job status; returns a function that closes the stream.
+// onError fires when the stream cannot be used, so callers can fall back to polling.
+export const subscribeJobStatus = (
+  jobId: string,
+  onStatus: (status: Partial<JobStatusResponse>) => void,
+  onError: () => void
+): (() => void) => {
+  const source = new EventSource(`${API_BASE_URL}/status/${jobId}/stream`);
+
+  source.addEventListener('status', (event) => {
+    onStatus(JSON.parse((event as MessageEvent).data));
+  });
+
+  source.onerror = () => {
+    // EventSource reconnects on its own; hand over to polling instead
+    source.close();
+    onError();
+  };
+
+  return () => source.close();
+};
+
 export const getLesson = async (lessonId: string): Promise<LessonResponse> => {
   const response = await api.get(`/lesson/${lessonId}`);
   return response.data;